@@ -2,6 +2,12 @@
 MongoVault Application Package
 """
 
-from .main_window import MainWindow
-
 __all__ = ["MainWindow"]
+
+
+def __getattr__(name):
+    # Imported lazily so the headless CLI (app.cli) never pulls in PyQt
+    if name == "MainWindow":
+        from .main_window import MainWindow
+        return MainWindow
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
@@ -0,0 +1,530 @@
+"""
+Headless MongoVault: `mongovault <command> ...` (or `python -m app.cli`).
+
+Prints one JSON document on stdout and exits with one of the EXIT_* codes
+(`schedule` also prints a JSON line per job event while it runs; `copy`
+prints progress lines on stderr).
+Never imports PyQt, so it runs on servers without a display.
+"""
+
+import argparse
+import json
+import os
+import signal
+import sys
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from app.utils.constants import APP_NAME, APP_VERSION, DEFAULT_BACKUP_DIR
+
+EXIT_OK = 0
+EXIT_FAILED = 1       # every operation failed
+EXIT_USAGE = 2        # bad arguments (argparse uses 2 as well)
+EXIT_PARTIAL = 3      # some operations succeeded, some failed
+EXIT_INTERRUPTED = 130
+
+DEFAULT_MAX_CONCURRENT = 2
+
+URI_ENV = "MONGOVAULT_URI"
+
+
+# -----------------------------
+# Helpers
+# -----------------------------
+
+def _part_size(args):
+    return args.part_size_mb * 1024 * 1024 if args.part_size_mb else None
+
+
+def _exit_code(results):
+    ok = sum(1 for r in results if r.get("success"))
+    if ok == len(results):
+        return EXIT_OK
+    return EXIT_FAILED if ok == 0 else EXIT_PARTIAL
+
+
+def _run_all(func, items, max_concurrent):
+    # Global cap: never more than `max_concurrent` operations at once
+    with ThreadPoolExecutor(max_workers=max(1, max_concurrent)) as pool:
+        return list(pool.map(func, items))
+
+
+def _trim(result):
+    # The mongodump/mongorestore output tail is only useful when something failed
+    if result.get("success"):
+        result.pop("output", None)
+    return result
+
+
+def _uri(args, parser):
+    uri = args.uri or os.environ.get(URI_ENV)
+    if not uri:
+        parser.error(f"--uri or ${URI_ENV} is required")
+    return uri
+
+
+# -----------------------------
+# Commands
+# -----------------------------
+
+def cmd_backup(args, parser):
+    from app.services.backup_service import backup_database, apply_retention_policy
+
+    uri = _uri(args, parser)
+
+    def run_one(db_name):
+        result = backup_database(
+            uri,
+            db_name,
+            args.out,
+            parallel=args.parallel,
+            include_collections=args.include,
+            exclude_collections=args.exclude,
+            engine=args.engine,
+            compression=args.compression,
+            compression_level=args.compression_level,
+            compression_threads=args.compression_threads,
+            mirror_dirs=args.mirror,
+            part_size=_part_size(args),
+            transfer_concurrency=args.transfer_concurrency,
+        )
+        result["db"] = db_name
+
+        if result.get("success") and args.keep_last:
+            retention = apply_retention_policy(args.out, keep_last=args.keep_last, db_name=db_name)
+            result["deleted"] = retention.get("deleted", [])
+
+        return _trim(result)
+
+    results = _run_all(run_one, args.db, args.max_concurrent)
+    return {"results": results}, _exit_code(results)
+
+
+def cmd_restore(args, parser):
+    from app.services.backup_set_service import is_backup_set
+
+    uri = _uri(args, parser)
+
+    if is_backup_set(args.file):
+        from app.services.set_restore_service import restore_backup_set
+
+        result = restore_backup_set(
+            args.file,
+            uri,
+            args.db,
+            include_collections=args.include,
+            exclude_collections=args.exclude,
+            drop=args.drop,
+            processes=args.processes,
+            parallel=args.parallel,
+            defer_indexes=args.defer_indexes,
+            engine=args.engine,
+            batch_size=args.batch_size,
+            write_concern=args.write_concern,
+        )
+    elif args.engine == "native":
+        from app.services.parallel_restore_service import restore_archive
+
+        result = restore_archive(
+            args.file,
+            uri,
+            args.db,
+            include_collections=args.include,
+            exclude_collections=args.exclude,
+            drop=args.drop,
+            workers=args.parallel,
+            batch_size=args.batch_size,
+            write_concern=args.write_concern,
+            build_indexes=not args.defer_indexes,
+            part_size=_part_size(args),
+            concurrency=args.transfer_concurrency,
+        )
+    else:
+        from app.services.command_runner import run_command
+        from app.services.restore_service import archive_feed, build_restore_command
+
+        command, error = build_restore_command(
+            args.file,
+            uri,
+            args.db,
+            drop=args.drop,
+            parallel=args.parallel,
+            include_collections=args.include,
+            exclude_collections=args.exclude,
+            defer_indexes=args.defer_indexes,
+        )
+        if error:
+            result = {"success": False, "error": error}
+        else:
+            # zstd and parallel gzip are decompressed here, on several threads;
+            # s3:// archives stream in with parallel ranged GETs
+            feed = archive_feed(
+                args.file, args.decompress_threads,
+                part_size=_part_size(args), concurrency=args.transfer_concurrency,
+            )
+            result = run_command(command, stdin_feed=feed)
+
+    # Deferred indexes are built as a separate pass once the data is in
+    if result.get("success") and args.defer_indexes and args.build_indexes:
+        from app.services.index_service import index_plan, rebuild_indexes
+
+        namespaces = index_plan(args.file, args.include, args.exclude)
+        indexes = rebuild_indexes(uri, args.db, namespaces, workers=args.parallel)
+        result["indexes"] = indexes
+        if not indexes.get("success"):
+            result["success"] = False
+            result["error"] = f"Index build failed: {indexes.get('error')}"
+
+    result.update({"backup_file": args.file, "db": args.db})
+    results = [_trim(result)]
+    return {"results": results}, _exit_code(results)
+
+
+def cmd_copy(args, parser):
+    from app.services.copy_service import copy_database
+
+    source_uri = _uri(args, parser)
+    target_uri = args.to_uri or source_uri
+    target_db = args.to_db or args.db
+
+    def on_progress(info):
+        # Live progress on stderr; stdout stays one JSON document
+        if not args.quiet:
+            sys.stderr.write(json.dumps({"event": "progress", **info}) + "\n")
+            sys.stderr.flush()
+
+    result = copy_database(
+        source_uri,
+        args.db,
+        target_uri,
+        target_db,
+        include_collections=args.include,
+        exclude_collections=args.exclude,
+        drop=args.drop,
+        parallel=args.parallel,
+        progress_callback=on_progress,
+    )
+    if result.get("success"):
+        result.pop("dump_output", None)
+    results = [_trim(result)]
+    return {"results": results}, _exit_code(results)
+
+
+def cmd_inspect(args, parser):
+    from app.services.archive_reader import inspect_archive, open_archive, read_prelude
+    from app.services.backup_set_service import is_backup_set, set_namespaces
+    from app.services.manifest_service import read_manifest
+
+    def run_one(path):
+        if args.scan:
+            result = inspect_archive(path)
+        else:
+            # Manifest first; fall back to the archive prelude (no full read)
+            manifest = read_manifest(path)
+            if manifest:
+                result = {"success": True, "source": "manifest", "manifest": manifest}
+            else:
+                try:
+                    if is_backup_set(path):
+                        namespaces = set_namespaces(path)
+                    else:
+                        # Not archive_namespaces(): it maps unreadable files to []
+                        with open_archive(path) as stream:
+                            _, namespaces = read_prelude(stream)
+                    result = {"success": True, "source": "prelude", "namespaces": namespaces}
+                except Exception as e:
+                    result = {"success": False, "error": f"Invalid archive: {e}"}
+        result["archive_file"] = path
+        return result
+
+    results = _run_all(run_one, args.files, args.max_concurrent)
+    return {"results": results}, _exit_code(results)
+
+
+def cmd_verify(args, parser):
+    from app.services.catalog_service import verify_backup
+    from app.services.manifest_service import verify_archive
+    from app.services.storage_service import is_remote
+
+    def run_one(path):
+        if is_remote(path):
+            result = verify_archive(path)  # cataloged backups are local
+        else:
+            # Checks the catalog checksum too, and records the outcome there
+            result = verify_backup(os.path.dirname(os.path.abspath(path)), path)
+        result["archive_file"] = path
+        return result
+
+    results = _run_all(run_one, args.files, args.max_concurrent)
+    return {"results": results}, _exit_code(results)
+
+
+RETENTION_RULES = ("keep_last", "daily", "weekly", "monthly", "yearly", "max_count", "max_bytes")
+
+
+def cmd_retention(args, parser):
+    from app.services.retention_service import apply_retention
+
+    # Rules on the command line replace retention.json for this run
+    policy = {
+        rule: getattr(args, rule) for rule in RETENTION_RULES
+        if getattr(args, rule) is not None
+    } or None
+
+    result = apply_retention(args.dir, db_name=args.db, policy=policy, dry_run=args.dry_run)
+    result["dir"] = args.dir
+    return {"results": [result]}, _exit_code([result])
+
+
+def cmd_catalog(args, parser):
+    from app.services import catalog_service
+
+    if args.action == "import":
+        result = catalog_service.import_existing(args.dir)
+    elif args.action == "trend":
+        if not args.db:
+            parser.error("catalog trend needs --db")
+        result = {
+            "success": True,
+            "db": args.db,
+            "trend": catalog_service.size_trend(args.dir, args.db, limit=args.limit or 30),
+            "predicted_seconds": catalog_service.predict_duration(args.dir, args.db),
+        }
+    else:
+        result = {
+            "success": True,
+            "backups": catalog_service.list_backups(args.dir, db_name=args.db, limit=args.limit),
+        }
+
+    return {"results": [result]}, _exit_code([result])
+
+
+def cmd_benchmark(args, parser):
+    from app.services.benchmark_service import run_benchmark
+
+    result = run_benchmark(
+        scale=args.scale,
+        seed=args.seed,
+        codecs=args.codec,
+        threads=args.threads,
+        output_path=args.out,
+    )
+    if not args.full:
+        result.pop("results", None)  # the JSON file has every row
+    return {"results": [result]}, _exit_code([result])
+
+
+def cmd_schedule(args, parser):
+    from app.services.scheduler_service import BackupScheduler, load_schedule
+
+    try:
+        config = load_schedule(args.config)
+    except ValueError as e:
+        parser.error(str(e))
+
+    print_lock = threading.Lock()
+
+    def on_event(event):
+        # One JSON line per event, so a log shipper can follow the daemon
+        with print_lock:
+            sys.stdout.write(json.dumps(event, default=str) + "\n")
+            sys.stdout.flush()
+
+    scheduler = BackupScheduler(config, on_event=on_event)
+    stop_event = threading.Event()
+
+    def request_stop(signum, frame):
+        stop_event.set()
+        scheduler.stop()
+
+    signal.signal(signal.SIGTERM, request_stop)
+    signal.signal(signal.SIGINT, request_stop)
+
+    # Waits for running backups before returning
+    scheduler.run_forever(stop_event)
+    return {"state_file": scheduler.state_file}, EXIT_OK
+
+
+# -----------------------------
+# Parser
+# -----------------------------
+
+def build_parser():
+    parser = argparse.ArgumentParser(
+        prog="mongovault",
+        description=f"{APP_NAME} headless backup and restore. Prints JSON on stdout.",
+    )
+    parser.add_argument("--version", action="version", version=f"{APP_NAME} {APP_VERSION}")
+    parser.add_argument("--pretty", action="store_true", help="indent the JSON output")
+
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    def add_uri(p):
+        p.add_argument("--uri", help=f"MongoDB connection URI (default: ${URI_ENV})")
+
+    def add_filters(p):
+        p.add_argument("--include", action="append", metavar="COLLECTION",
+                       help="only this collection (repeatable)")
+        p.add_argument("--exclude", action="append", metavar="COLLECTION",
+                       help="skip this collection (repeatable)")
+
+    def add_transfer(p):
+        p.add_argument("--part-size-mb", type=int,
+                       help="s3:// multipart part / ranged GET size in MB (default: 16)")
+        p.add_argument("--transfer-concurrency", type=int,
+                       help="s3:// parts uploaded / ranges fetched at once (default: 8)")
+
+    def add_concurrency(p):
+        p.add_argument("--max-concurrent", type=int, default=DEFAULT_MAX_CONCURRENT,
+                       help=f"operations run at once (default: {DEFAULT_MAX_CONCURRENT})")
+
+    # backup
+    p = sub.add_parser("backup", help="back up one or more databases")
+    add_uri(p)
+    p.add_argument("--db", action="append", required=True,
+                   help="database to back up (repeatable; run concurrently)")
+    p.add_argument("--out", default=DEFAULT_BACKUP_DIR, help="backup directory")
+    p.add_argument("--engine", choices=["mongodump", "native", "largest-first"], default="mongodump",
+                   help="largest-first: one segment per collection, biggest dumped first")
+    p.add_argument("--parallel", type=int, default=1,
+                   help="parallel collections per database (largest-first: dump processes)")
+    p.add_argument("--compression", choices=["gzip", "zstd"],
+                   help="compress here on several threads instead of mongodump --gzip "
+                        "(gzip stays gzip-compatible; zstd writes .archive.zst)")
+    p.add_argument("--compression-level", type=int, help="codec level (default: gzip 6, zstd 3)")
+    p.add_argument("--compression-threads", type=int, help="compression threads (default: all cores)")
+    p.add_argument("--mirror", action="append", metavar="DIR",
+                   help="also write the archive here while it streams: a directory or "
+                        "s3://bucket/prefix (repeatable; implies --compression gzip unless set)")
+    p.add_argument("--keep-last", type=int, default=0,
+                   help="after a successful backup keep only the N newest for that database")
+    add_transfer(p)
+    add_filters(p)
+    add_concurrency(p)
+    p.set_defaults(func=cmd_backup)
+
+    # restore
+    p = sub.add_parser("restore", help="restore an archive into a database")
+    add_uri(p)
+    p.add_argument("--file", required=True,
+                   help="archive (.archive.gz, local or s3://bucket/key) or backup set (.backupset) to restore")
+    p.add_argument("--db", required=True, help="target database")
+    p.add_argument("--engine", choices=["mongorestore", "native"], default="mongorestore")
+    p.add_argument("--parallel", type=int, default=4, help="parallel collections / insert workers")
+    p.add_argument("--processes", type=int, default=4,
+                   help="backup sets: segments restored at once, each in its own process")
+    p.add_argument("--decompress-threads", type=int,
+                   help="threads inflating parallel-gzip / zstd archives (default: all cores)")
+    p.add_argument("--drop", action="store_true", help="drop target collections first")
+    p.add_argument("--defer-indexes", action="store_true",
+                   help="load data first, build indexes in a separate pass")
+    p.add_argument("--no-build-indexes", dest="build_indexes", action="store_false",
+                   help="with --defer-indexes, skip the index pass entirely")
+    p.add_argument("--batch-size", type=int, default=1000, help="native engine insert batch size")
+    p.add_argument("--write-concern", default="1", help="native engine write concern (0, 1, majority)")
+    add_transfer(p)
+    add_filters(p)
+    p.set_defaults(func=cmd_restore)
+
+    # copy
+    p = sub.add_parser(
+        "copy",
+        help="copy a database to another cluster or name, mongodump piped into mongorestore (no archive)",
+    )
+    add_uri(p)
+    p.add_argument("--db", required=True, help="source database")
+    p.add_argument("--to-uri", help="target cluster URI (default: the source cluster)")
+    p.add_argument("--to-db", help="target database (default: same name)")
+    p.add_argument("--parallel", type=int, default=4,
+                   help="collections dumped and restored at once (numParallelCollections)")
+    p.add_argument("--drop", action="store_true", help="drop target collections first")
+    p.add_argument("--quiet", action="store_true", help="no progress lines on stderr")
+    add_filters(p)
+    p.set_defaults(func=cmd_copy)
+
+    # inspect
+    p = sub.add_parser("inspect", help="show what an archive contains")
+    p.add_argument("files", nargs="+", metavar="ARCHIVE")
+    p.add_argument("--scan", action="store_true",
+                   help="read the whole archive for exact counts instead of the manifest")
+    add_concurrency(p)
+    p.set_defaults(func=cmd_inspect)
+
+    # verify
+    p = sub.add_parser("verify", help="read archives end to end and check them against their manifests")
+    p.add_argument("files", nargs="+", metavar="ARCHIVE")
+    add_concurrency(p)
+    p.set_defaults(func=cmd_verify)
+
+    # retention
+    p = sub.add_parser(
+        "retention",
+        help="delete old backups per database (GFS rules; default: the directory's retention.json)",
+    )
+    p.add_argument("--dir", default=DEFAULT_BACKUP_DIR, help="backup directory")
+    p.add_argument("--db", help="only prune this database's archives")
+    p.add_argument("--keep-last", type=int, help="keep the N newest")
+    p.add_argument("--daily", type=int, help="keep the newest backup of each of the last N days")
+    p.add_argument("--weekly", type=int, help="... of each of the last N ISO weeks")
+    p.add_argument("--monthly", type=int, help="... of each of the last N months")
+    p.add_argument("--yearly", type=int, help="... of each of the last N years")
+    p.add_argument("--max-count", type=int, help="never keep more than N")
+    p.add_argument("--max-bytes", type=int, help="cap the kept archives' total compressed size")
+    p.add_argument("--dry-run", action="store_true", help="report what would be deleted")
+    p.set_defaults(func=cmd_retention)
+
+    # catalog
+    p = sub.add_parser("catalog", help="query the backup catalog")
+    p.add_argument("action", choices=["list", "trend", "import"],
+                   help="list backups, show a database's size trend, or catalog archives already on disk")
+    p.add_argument("--dir", default=DEFAULT_BACKUP_DIR, help="backup directory")
+    p.add_argument("--db", help="only this database")
+    p.add_argument("--limit", type=int, help="newest N entries")
+    p.set_defaults(func=cmd_catalog)
+
+    # benchmark
+    p = sub.add_parser(
+        "benchmark",
+        help="compare compression codecs on generated sample data (no MongoDB needed)",
+    )
+    p.add_argument("--scale", type=float, default=1.0,
+                   help="sample data size factor (1.0: 8,000 documents in 6 collections)")
+    p.add_argument("--seed", type=int, default=42, help="data seed; same seed and scale, same bytes")
+    p.add_argument("--codec", action="append", choices=["gzip", "zstd", "lz4"],
+                   help="codec to test (repeatable; default: every installed codec)")
+    p.add_argument("--threads", type=int, action="append",
+                   help="compression threads to test (repeatable; default: 1 and all cores)")
+    p.add_argument("--out", default="benchmark.json", help="where to write the full results (JSON)")
+    p.add_argument("--full", action="store_true", help="print every result row, not only the summary")
+    p.set_defaults(func=cmd_benchmark)
+
+    # schedule
+    p = sub.add_parser(
+        "schedule",
+        help="run scheduled backups until stopped (one JSON line per event)",
+    )
+    p.add_argument("--config", required=True, help="scheduler config (JSON)")
+    p.set_defaults(func=cmd_schedule)
+
+    return parser
+
+
+def main(argv=None):
+    parser = build_parser()
+    args = parser.parse_args(argv)
+
+    try:
+        payload, code = args.func(args, parser)
+        payload = {"command": args.command, "success": code == EXIT_OK, **payload}
+    except KeyboardInterrupt:
+        payload, code = {"command": args.command, "success": False, "error": "Interrupted"}, EXIT_INTERRUPTED
+    except Exception as e:
+        payload, code = {"command": args.command, "success": False, "error": str(e)}, EXIT_FAILED
+
+    json.dump(payload, sys.stdout, indent=2 if args.pretty else None, default=str)
+    sys.stdout.write("\n")
+    return code
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -2,7 +2,6 @@ from PyQt6.QtWidgets import (
     QWidget,
     QVBoxLayout,
     QTabWidget,
-    QTextEdit,
     QLabel,
     QPushButton,
     QHBoxLayout,
@@ -12,12 +11,15 @@ from PyQt6.QtWidgets import (
 )
 from PyQt6.QtCore import Qt
 import os
+import shutil
 import datetime
 
+from app.services.client_registry import close_all_clients
 from app.tabs.backup_tab import BackupTab
 from app.tabs.restore_tab import RestoreTab
-from app.utils.constants import APP_NAME, APP_VERSION
+from app.utils.constants import APP_NAME, APP_VERSION, LOG_DIR
 from app.utils.theme_manager import ThemeManager
+from app.widgets.log_view import LogView
 
 
 class MainWindow(QWidget):
@@ -101,8 +103,7 @@ class MainWindow(QWidget):
         log_header.addWidget(self.export_log_btn)
         log_header.addWidget(self.clear_log_btn)
 
-        self.log_output = QTextEdit()
-        self.log_output.setReadOnly(True)
+        self.log_output = LogView()
 
         log_layout.addLayout(log_header)
         log_layout.addWidget(self.log_output)
@@ -122,10 +123,10 @@ class MainWindow(QWidget):
     # ── Logging ────────────────────────────────────────────────────────────
 
     def append_log(self, text: str):
-        self.log_output.append(text)
+        self.log_output.append_text(text)
 
     def clear_logs(self):
-        self.log_output.clear()
+        self.log_output.clear_log()
 
     # ── Log panel toggle ───────────────────────────────────────────────────
 
@@ -146,15 +147,16 @@ class MainWindow(QWidget):
     # ── Export logs ────────────────────────────────────────────────────────
 
     def export_logs(self):
-        content = self.log_output.toPlainText().strip()
-        if not content:
+        # The view only keeps the newest lines; the spill file has all of them
+        source = self.log_output.full_log_path()
+        if not source or os.path.getsize(source) == 0:
             QMessageBox.information(self, "Nothing to Export", "The log is empty.")
             return
 
-        os.makedirs("./logs", exist_ok=True)
-        default_name = (
-            f"./logs/mongovault_log_"
-            f"{datetime.datetime.now().strftime('%Y-%m-%d_%H-%M-%S')}.txt"
+        os.makedirs(LOG_DIR, exist_ok=True)
+        default_name = os.path.join(
+            LOG_DIR,
+            f"mongovault_log_{datetime.datetime.now().strftime('%Y-%m-%d_%H-%M-%S')}.txt"
         )
 
         path, _ = QFileDialog.getSaveFileName(
@@ -168,8 +170,7 @@ class MainWindow(QWidget):
             return
 
         try:
-            with open(path, "w", encoding="utf-8") as f:
-                f.write(content)
+            shutil.copyfile(source, path)
             self.append_log(f"[Export] Log saved → {path}")
         except OSError as e:
             QMessageBox.critical(self, "Export Failed", str(e))
@@ -177,4 +178,10 @@ class MainWindow(QWidget):
     # ── Theme toggle ───────────────────────────────────────────────────────
 
     def toggle_theme(self):
-        self.theme_manager.toggle_theme()
\ No newline at end of file
+        self.theme_manager.toggle_theme()
+
+    def closeEvent(self, event):
+        self.log_output.full_log_path()  # render/flush anything still queued
+        self.log_output.close_spill()
+        close_all_clients()
+        super().closeEvent(event)
\ No newline at end of file
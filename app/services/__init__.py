@@ -4,6 +4,16 @@ Service Layer Package
 
 from .backup_service import backup_database, validate_connection, apply_retention_policy
 from .restore_service import validate_restore_connection, build_restore_command
+from .archive_reader import inspect_archive, iter_documents
+from .manifest_service import create_manifest, read_manifest, verify_archive
+from .parallel_dump_service import dump_database
+from .parallel_restore_service import restore_archive
+from .backup_set_service import dump_backup_set
+from .set_restore_service import restore_backup_set
+from .client_registry import pooled_client, close_all_clients
+from .catalog_service import list_backups, record_backup, verify_backup
+from .retention_service import apply_retention
+from .copy_service import copy_database
 
 __all__ = [
     "backup_database",
@@ -11,4 +21,20 @@ __all__ = [
     "apply_retention_policy",
     "validate_restore_connection",
     "build_restore_command",
+    "inspect_archive",
+    "iter_documents",
+    "create_manifest",
+    "read_manifest",
+    "verify_archive",
+    "dump_database",
+    "restore_archive",
+    "dump_backup_set",
+    "restore_backup_set",
+    "pooled_client",
+    "close_all_clients",
+    "list_backups",
+    "record_backup",
+    "verify_backup",
+    "apply_retention",
+    "copy_database",
 ]
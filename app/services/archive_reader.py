@@ -0,0 +1,281 @@
+import gzip
+import zlib
+import struct
+from typing import Dict, Any, Iterator, Optional, Tuple
+
+import bson
+from bson import json_util
+from bson.errors import BSONError
+
+from .compression_service import open_decompressed
+
+# mongodump archive layout:
+#   magic (int32) | prelude header doc | collection metadata docs... | terminator
+#   then interleaved blocks of:  namespace header doc | bson docs... | terminator
+ARCHIVE_MAGIC = 0x8199E26D
+TERMINATOR = 0xFFFFFFFF
+
+READ_CHUNK = 1024 * 1024
+
+_INT32 = struct.Struct("<i")
+_UINT32 = struct.Struct("<I")
+
+
+class ArchiveFormatError(Exception):
+    pass
+
+
+def open_archive(path: str, **storage_options):
+    """
+    Open a mongodump archive (local or s3://) for sequential reading.
+    gzip, parallel gzip and zstd are detected by their magic bytes, not the extension.
+    """
+    return open_decompressed(path, **storage_options)
+
+
+def _read_exact(stream, size: int) -> bytes:
+    data = stream.read(size)
+    if len(data) != size:
+        raise ArchiveFormatError("Unexpected end of archive")
+    return data
+
+
+def _read_doc_or_terminator(stream) -> Optional[bytes]:
+    """
+    Read one raw BSON document. Returns None when the block terminator is hit.
+    """
+    size_bytes = _read_exact(stream, 4)
+    if _UINT32.unpack(size_bytes)[0] == TERMINATOR:
+        return None
+
+    size = _INT32.unpack(size_bytes)[0]
+    if size < 5:
+        raise ArchiveFormatError(f"Invalid BSON document size: {size}")
+
+    return size_bytes + _read_exact(stream, size - 4)
+
+
+def _skip_doc_or_terminator(stream) -> int:
+    """
+    Skip one BSON document without keeping it. Returns its size, or -1 on terminator.
+    """
+    size_bytes = _read_exact(stream, 4)
+    if _UINT32.unpack(size_bytes)[0] == TERMINATOR:
+        return -1
+
+    size = _INT32.unpack(size_bytes)[0]
+    if size < 5:
+        raise ArchiveFormatError(f"Invalid BSON document size: {size}")
+
+    remaining = size - 4
+    while remaining > 0:
+        remaining -= len(_read_exact(stream, min(remaining, READ_CHUNK)))
+
+    return size
+
+
+def _parse_collection_metadata(doc: Dict[str, Any]) -> Dict[str, Any]:
+    metadata = {}
+    if doc.get("metadata"):
+        try:
+            metadata = json_util.loads(doc["metadata"])
+        except ValueError:
+            metadata = {}
+
+    return {
+        "db": doc.get("db", ""),
+        "collection": doc.get("collection", ""),
+        "type": doc.get("type") or metadata.get("type", "collection"),
+        "indexes": metadata.get("indexes", []),
+        "options": metadata.get("options", {}),
+        "uuid": metadata.get("uuid"),
+        "size": doc.get("size", 0),
+    }
+
+
+def read_prelude(stream) -> Tuple[Dict[str, Any], list]:
+    """
+    Parse the archive prelude.
+    Returns (header, namespaces) where namespaces is a list of collection metadata dicts.
+    """
+    magic = _UINT32.unpack(_read_exact(stream, 4))[0]
+    if magic != ARCHIVE_MAGIC:
+        raise ArchiveFormatError("Not a mongodump archive (bad magic number)")
+
+    header_raw = _read_doc_or_terminator(stream)
+    if header_raw is None:
+        raise ArchiveFormatError("Archive prelude header is missing")
+    header = bson.decode(header_raw)
+
+    namespaces = []
+    while True:
+        raw = _read_doc_or_terminator(stream)
+        if raw is None:
+            break
+        namespaces.append(_parse_collection_metadata(bson.decode(raw)))
+
+    return header, namespaces
+
+
+def _read_namespace_header(stream) -> Optional[Dict[str, Any]]:
+    """
+    Read the namespace header that opens a block. Returns None at end of archive.
+    """
+    size_bytes = stream.read(4)
+    if not size_bytes:
+        return None
+    if len(size_bytes) != 4:
+        raise ArchiveFormatError("Unexpected end of archive")
+
+    size = _INT32.unpack(size_bytes)[0]
+    if size < 5:
+        raise ArchiveFormatError(f"Invalid namespace header size: {size}")
+
+    return bson.decode(size_bytes + _read_exact(stream, size - 4))
+
+
+def iter_blocks(stream) -> Iterator[Dict[str, Any]]:
+    """
+    Walk the interleaved namespace blocks after the prelude, skipping document bodies.
+    Yields one dict per block: {"db", "collection", "eof", "documents", "bytes"}.
+    """
+    while True:
+        ns_header = _read_namespace_header(stream)
+        if ns_header is None:
+            return
+
+        block = {
+            "db": ns_header.get("db", ""),
+            "collection": ns_header.get("collection", ""),
+            "eof": bool(ns_header.get("EOF", False)),
+            "documents": 0,
+            "bytes": 0,
+        }
+
+        while True:
+            doc_size = _skip_doc_or_terminator(stream)
+            if doc_size < 0:
+                break
+            block["documents"] += 1
+            block["bytes"] += doc_size
+
+        yield block
+
+
+def iter_documents(path: str, namespaces=None) -> Iterator[Tuple[str, str, bytes]]:
+    """
+    Stream (db, collection, raw_bson) for every document in the archive.
+    `namespaces` optionally limits the output to a set of "db.collection" names.
+    """
+    with open_archive(path) as stream:
+        read_prelude(stream)
+        yield from iter_stream_documents(stream, namespaces)
+
+
+def iter_stream_documents(stream, namespaces=None) -> Iterator[Tuple[str, str, bytes]]:
+    """iter_documents over an open archive stream positioned after the prelude."""
+    wanted = set(namespaces) if namespaces else None
+
+    while True:
+        ns_header = _read_namespace_header(stream)
+        if ns_header is None:
+            return
+
+        db = ns_header.get("db", "")
+        coll = ns_header.get("collection", "")
+        keep = wanted is None or f"{db}.{coll}" in wanted
+
+        while True:
+            if keep:
+                raw = _read_doc_or_terminator(stream)
+                if raw is None:
+                    break
+                yield db, coll, raw
+            elif _skip_doc_or_terminator(stream) < 0:
+                break
+
+
+def archive_namespaces(path: str) -> list:
+    """
+    Return the collection metadata listed in the archive prelude ([] if unreadable).
+    Only the prelude is decompressed.
+    """
+    try:
+        with open_archive(path) as stream:
+            _, namespaces = read_prelude(stream)
+    except (OSError, EOFError, ArchiveFormatError, BSONError):
+        return []
+
+    return namespaces
+
+
+def archive_source_db(path: str) -> Optional[str]:
+    """
+    Return the source database recorded in the archive prelude, or None.
+    """
+    namespaces = archive_namespaces(path)
+
+    dbs = {ns["db"] for ns in namespaces if ns["db"]}
+    if len(dbs) == 1:
+        return dbs.pop()
+    return None
+
+
+def scan_archive(stream) -> Dict[str, Any]:
+    """
+    Walk an uncompressed archive stream once (a file, or mongodump's stdout
+    as it is written). Raises ArchiveFormatError / BSONError on bad input.
+    """
+    header, namespaces = read_prelude(stream)
+
+    by_ns = {}
+    for ns in namespaces:
+        ns["documents"] = 0
+        ns["bytes"] = 0
+        by_ns[(ns["db"], ns["collection"])] = ns
+
+    for block in iter_blocks(stream):
+        key = (block["db"], block["collection"])
+        ns = by_ns.get(key)
+        if ns is None:
+            ns = {
+                "db": block["db"],
+                "collection": block["collection"],
+                "type": "collection",
+                "indexes": [],
+                "options": {},
+                "uuid": None,
+                "size": 0,
+                "documents": 0,
+                "bytes": 0,
+            }
+            by_ns[key] = ns
+            namespaces.append(ns)
+
+        ns["documents"] += block["documents"]
+        ns["bytes"] += block["bytes"]
+
+    return {
+        "success": True,
+        "header": header,
+        "namespaces": namespaces,
+        "total_documents": sum(ns["documents"] for ns in namespaces),
+        "total_bytes": sum(ns["bytes"] for ns in namespaces),
+    }
+
+
+def inspect_archive(path: str) -> Dict[str, Any]:
+    """
+    Scan an archive in one sequential pass.
+    Returns per-namespace metadata with document counts and uncompressed byte totals.
+    """
+    try:
+        with open_archive(path) as stream:
+            return scan_archive(stream)
+
+    except (ArchiveFormatError, BSONError, EOFError, gzip.BadGzipFile, zlib.error) as e:
+        return {"success": False, "error": f"Invalid archive: {e}"}
+    except RuntimeError as e:  # codec not installed
+        return {"success": False, "error": str(e)}
+    except OSError as e:
+        return {"success": False, "error": f"Could not read archive: {e}"}
@@ -0,0 +1,161 @@
+import gzip
+import struct
+from typing import Dict, Any, Iterable
+
+import bson
+from bson import json_util
+from bson.int64 import Int64
+
+from .archive_reader import ARCHIVE_MAGIC, TERMINATOR
+from .compression_service import open_compressed_writer
+
+try:
+    import crcmod
+    _crc64 = crcmod.mkCrcFun(
+        0x142F0E1EBA9EA3693, initCrc=0, rev=True, xorOut=0xFFFFFFFFFFFFFFFF
+    )
+except ImportError:  # pure-Python fallback, much slower
+    _crc64 = None
+
+# mongorestore checks a CRC-64 (ECMA, as in Go's hash/crc64) over every
+# document written for a namespace against the CRC in its EOF header
+_CRC64_POLY = 0xC96C5795D7870F42
+_CRC64_MASK = 0xFFFFFFFFFFFFFFFF
+_CRC64_TABLE = []
+for _i in range(256):
+    _c = _i
+    for _ in range(8):
+        _c = (_c >> 1) ^ _CRC64_POLY if _c & 1 else _c >> 1
+    _CRC64_TABLE.append(_c)
+
+ARCHIVE_VERSION = "0.1"
+GZIP_LEVEL = 6  # same default as mongodump --gzip
+
+_TERMINATOR_BYTES = struct.pack("<I", TERMINATOR)
+_MAGIC_BYTES = struct.pack("<I", ARCHIVE_MAGIC)
+
+
+def crc64_update(crc: int, data: bytes) -> int:
+    if _crc64 is not None:
+        return _crc64(data, crc)
+
+    crc ^= _CRC64_MASK
+    table = _CRC64_TABLE
+    for b in data:
+        crc = table[(crc ^ b) & 0xFF] ^ (crc >> 8)
+    return crc ^ _CRC64_MASK
+
+
+def _signed64(value: int) -> int:
+    return value - (1 << 64) if value >= (1 << 63) else value
+
+
+class ArchiveWriter:
+    """
+    Writes the mongodump archive format, readable by `mongorestore --archive`.
+    Not thread-safe: feed it from a single writer thread.
+    `codec` ("gzip" / "zstd") switches to the multi-threaded compressors of
+    compression_service; the default is single-stream gzip.
+    """
+
+    def __init__(self, path: str, compress: bool = True, level: int = None,
+                 codec: str = None, threads: int = None):
+        self.path = path
+        if compress and codec:
+            self._out = open_compressed_writer(path, codec, level, threads)
+        elif compress:
+            self._out = gzip.open(path, "wb", compresslevel=GZIP_LEVEL if level is None else level)
+        else:
+            self._out = open(path, "wb")
+        self._crc = {}
+        self.bytes_written = 0
+
+    def write_prelude(
+        self,
+        namespaces: Iterable[Dict[str, Any]],
+        concurrent_collections: int = 1,
+        server_version: str = "",
+        tool_version: str = "",
+    ):
+        """
+        `namespaces` are dicts with "db", "collection" and optional "indexes"/"options"/"type".
+        """
+        self._out.write(_MAGIC_BYTES)
+        self._out.write(bson.encode({
+            "concurrent_collections": concurrent_collections,
+            "version": ARCHIVE_VERSION,
+            "server_version": server_version,
+            "tool_version": tool_version,
+        }))
+
+        for ns in namespaces:
+            coll_type = ns.get("type", "collection")
+            metadata = {
+                "indexes": ns.get("indexes", []),
+                "options": ns.get("options", {}),
+                "collectionName": ns["collection"],
+                "type": coll_type,
+            }
+            self._out.write(bson.encode({
+                "db": ns["db"],
+                "collection": ns["collection"],
+                "metadata": json_util.dumps(
+                    metadata, json_options=json_util.CANONICAL_JSON_OPTIONS
+                ),
+                "size": 0,
+                "type": coll_type,
+            }))
+            self._crc[(ns["db"], ns["collection"])] = 0
+
+        self._out.write(_TERMINATOR_BYTES)
+
+    def write_block(self, db: str, collection: str, raw_documents):
+        """
+        Write one block of raw BSON documents for a namespace.
+        """
+        if not raw_documents:
+            return
+
+        key = (db, collection)
+        crc = self._crc.get(key, 0)
+
+        self._out.write(bson.encode({
+            "db": db,
+            "collection": collection,
+            "EOF": False,
+            "CRC": Int64(0),
+        }))
+        for raw in raw_documents:
+            self._out.write(raw)
+            crc = crc64_update(crc, raw)
+            self.bytes_written += len(raw)
+        self._out.write(_TERMINATOR_BYTES)
+
+        self._crc[key] = crc
+
+    def end_namespace(self, db: str, collection: str):
+        """
+        Close a namespace with its EOF header and CRC.
+        """
+        crc = self._crc.pop((db, collection), 0)
+        self._out.write(bson.encode({
+            "db": db,
+            "collection": collection,
+            "EOF": True,
+            "CRC": Int64(_signed64(crc)),
+        }))
+        self._out.write(_TERMINATOR_BYTES)
+
+    def close(self):
+        for db, collection in list(self._crc):
+            self.end_namespace(db, collection)
+        self._out.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if exc_type is None:
+            self.close()
+        else:
+            self._out.close()
@@ -1,14 +1,22 @@
 import os
+import time
 import datetime
-from pymongo import MongoClient
 from pymongo.errors import ConnectionFailure, OperationFailure
+from . import storage_service
+from .backup_set_service import dump_backup_set
+from .catalog_service import archive_size, record_backup
+from .client_registry import cluster_key, pooled_client
 from .command_runner import run_command
+from .compression_service import GZIP, archive_extension
+from .manifest_service import SET_SUFFIX, create_manifest, manifest_from_scan, write_manifest
+from .parallel_dump_service import dump_database
+from .retention_service import apply_retention
+from .stream_service import tee_backup_stream
 
 def validate_connection(uri: str, db_name: str):
     try:
-        client = MongoClient(uri, serverSelectionTimeoutMS=5000)
-        client[db_name].command("ping")
-        client.close()
+        with pooled_client(uri) as client:
+            client[db_name].command("ping")
         return {"success": True}
     except ConnectionFailure as e:
         return {"success": False, "error": f"Connection failed: {e}"}
@@ -17,16 +25,61 @@ def validate_connection(uri: str, db_name: str):
     except Exception as e:
         return {"success": False, "error": str(e)}
 
+def collection_filter_args(uri: str, db_name: str, include_collections, exclude_collections):
+    """
+    mongodump flags selecting collections. mongodump honours a single
+    --collection (and not together with --excludeCollection), so several
+    includes become --excludeCollection for every other collection.
+    Returns None if none of the included collections exist; a failed
+    collection listing raises.
+    """
+    if len(include_collections) == 1:
+        return [f"--collection={include_collections[0]}"]
+
+    exclude = set(exclude_collections)
+    if include_collections:
+        with pooled_client(uri) as client:
+            names = client[db_name].list_collection_names()
+        if not set(include_collections) & set(names):
+            return None
+        exclude |= set(names) - set(include_collections)
+
+    return [f"--excludeCollection={col}" for col in sorted(exclude)]
+
+
 def backup_database(
     uri: str,
     db_name: str,
     backup_root: str,
     parallel: int = 1,
     include_collections=None,
-    exclude_collections=None
+    exclude_collections=None,
+    engine: str = "mongodump",
+    partitions: int = 4,
+    compression: str = None,
+    compression_level: int = None,
+    compression_threads: int = None,
+    mirror_dirs=None,
+    part_size: int = None,
+    transfer_concurrency: int = None,
 ):
     """
     Perform MongoDB backup using native archive mode.
+    engine="mongodump" shells out to mongodump; engine="native" uses the
+    pymongo dump engine, which splits each collection into `partitions`
+    `_id` ranges read by `parallel` concurrent cursors.
+    engine="largest-first" writes a backup set (one mongodump segment per
+    collection) with `parallel` dump processes, biggest collections first.
+    compression=None keeps mongodump's single-stream --gzip; "gzip"
+    (parallel, gzip-compatible) or "zstd" has mongodump write the raw
+    archive to stdout and compresses it here on `compression_threads`
+    threads at `compression_level`.
+    On that streaming path the archive is written once and fanned out to
+    every sink as it is compressed: the file, a copy in each of
+    `mirror_dirs` (directories or s3://bucket/prefix, uploaded in parallel
+    multipart of `part_size` bytes, `transfer_concurrency` parts at once),
+    a sha256 hasher and the manifest scan, so nothing is read back
+    afterwards. Mirrors imply compression="gzip".
     Returns structured result.
     """
 
@@ -39,6 +92,12 @@ def backup_database(
     if not uri or not db_name:
         return {"success": False, "error": "URI and DB name required"}
 
+    mirror_dirs = list(mirror_dirs or [])
+    if mirror_dirs and engine != "mongodump":
+        return {"success": False, "error": "Mirrors need the mongodump engine (streaming backup)."}
+    if mirror_dirs and not compression:
+        compression = GZIP
+
     # Ensure backup directory exists
     os.makedirs(backup_root, exist_ok=True)
 
@@ -46,30 +105,91 @@ def backup_database(
 
     archive_file = os.path.join(
         backup_root,
-        f"{db_name}_backup_{timestamp}.archive.gz"
+        f"{db_name}_backup_{timestamp}{archive_extension(compression)}"
     )
 
-    # 🔥 Use Mongo native archive mode (BEST PRACTICE)
-    command = [
-        "mongodump",
-        "--uri", uri,
-        "--db", db_name,
-        f"--archive={archive_file}",
-        "--gzip",
-        f"--numParallelCollections={parallel}"
-    ]
+    if engine == "largest-first":
+        archive_file = os.path.join(backup_root, f"{db_name}_backup_{timestamp}{SET_SUFFIX}")
+
+    if engine == "mongodump":
+        try:
+            filter_args = collection_filter_args(uri, db_name, include_collections, exclude_collections)
+        except Exception as e:
+            return {"success": False, "error": f"Could not list collections in {db_name}: {e}"}
+        if filter_args is None:
+            return {"success": False, "error": f"None of the included collections exist in {db_name}."}
+
+    started = time.monotonic()
+
+    if engine == "largest-first":
+        result = dump_backup_set(
+            uri,
+            db_name,
+            archive_file,
+            include_collections=include_collections,
+            exclude_collections=exclude_collections,
+            workers=parallel,
+        )
+    elif engine == "native":
+        result = dump_database(
+            uri,
+            db_name,
+            archive_file,
+            include_collections=include_collections,
+            exclude_collections=exclude_collections,
+            partitions=partitions,
+            workers=parallel,
+            codec=compression,
+            level=compression_level,
+            threads=compression_threads,
+        )
+    elif compression:
+        # Raw archive on stdout, compressed block-parallel on this side
+        command = [
+            "mongodump",
+            "--uri", uri,
+            "--db", db_name,
+            "--archive",
+            f"--numParallelCollections={parallel}",
+            *filter_args,
+        ]
 
-    # Include specific collections
-    for col in include_collections:
-        command.append(f"--collection={col}")
+        mirrors = [
+            storage_service.join(mirror_dir, os.path.basename(archive_file))
+            for mirror_dir in mirror_dirs
+        ]
 
-    # Exclude collections
-    for col in exclude_collections:
-        command.append(f"--excludeCollection={col}")
+        result = run_command(
+            command,
+            stdout_sink=lambda stdout: tee_backup_stream(
+                stdout, archive_file, mirrors,
+                compression, compression_level, compression_threads,
+                part_size=part_size, concurrency=transfer_concurrency,
+            ),
+        )
+        if not result.get("success"):
+            for path in (archive_file, *mirrors):
+                try:
+                    storage_service.delete(path)  # partial stream
+                except Exception:
+                    pass
+    else:
+        # 🔥 Use Mongo native archive mode (BEST PRACTICE)
+        command = [
+            "mongodump",
+            "--uri", uri,
+            "--db", db_name,
+            f"--archive={archive_file}",
+            "--gzip",
+            f"--numParallelCollections={parallel}",
+            *filter_args,
+        ]
 
-    result = run_command(command)
+        result = run_command(command)
 
-    # 🔥 Check mongodump execution
+    duration = time.monotonic() - started
+
+    # 🔥 Check dump execution
     if not result.get("success"):
         return result
 
@@ -80,7 +200,7 @@ def backup_database(
             "error": "Backup archive was not created."
         }
 
-    size_bytes = os.path.getsize(archive_file)
+    size_bytes = archive_size(archive_file)
 
     # 🔥 Validate archive not empty
     if size_bytes == 0:
@@ -91,34 +211,58 @@ def backup_database(
 
     size_mb = round(size_bytes / (1024 * 1024), 2)
 
+    # Sidecar index so tooling can answer "what's in this backup?" without decompressing
+    stream = result.get("pipe_result")
+    if engine == "largest-first":
+        manifest = result  # the set manifest is assembled from the segments as they finish
+    elif stream:
+        # Scanned and hashed on the way through; the archive isn't read again
+        manifest = {"manifest": manifest_from_scan(
+            archive_file, stream["scan"], db_name, duration, stream["compressed_bytes"]
+        )}
+        try:
+            manifest["manifest_file"] = write_manifest(archive_file, manifest["manifest"])
+        except OSError:
+            pass  # as with create_manifest: the archive itself is fine
+        for path in stream["mirrors"]:
+            try:
+                write_manifest(path, manifest["manifest"])
+            except Exception as e:
+                stream["mirror_errors"][f"manifest:{path}"] = str(e)
+    else:
+        manifest = create_manifest(archive_file, source_db=db_name, duration_seconds=duration)
+
+    catalog = record_backup(
+        backup_root,
+        archive_file,
+        db_name,
+        cluster=cluster_key(uri),
+        engine=engine,
+        duration_seconds=duration,
+        manifest=manifest.get("manifest"),
+        known_checksum=stream["checksum"] if stream else None,
+    )
+
     return {
         "success": True,
         "backup_file": archive_file,
+        "manifest_file": manifest.get("manifest_file"),
         "size_mb": size_mb,
         "timestamp": timestamp,
+        "duration_seconds": round(duration, 2),
         "duplicate_count": result.get("duplicate_count", 0),
         "index_conflicts": result.get("index_conflicts", 0),
+        "compression": compression or "mongodump-gzip",
+        "catalog_id": catalog.get("catalog_id"),
+        "catalog_error": catalog.get("error"),
+        "mirrors": stream["mirrors"] if stream else [],
+        "mirror_errors": stream["mirror_errors"] if stream else {},
     }
 
-def apply_retention_policy(backup_root: str, keep_last: int = 5):
+def apply_retention_policy(backup_root: str, keep_last: int = 5, db_name: str = None):
     """
-    Delete old backups, keeping only the `keep_last` most recent archives.
+    Delete old backups, keeping only the `keep_last` most recent archives
+    (per database). Shorthand for retention_service.apply_retention with a
+    keep_last-only policy.
     """
-    if not os.path.isdir(backup_root):
-        return
-
-    archives = sorted(
-        [
-            os.path.join(backup_root, f)
-            for f in os.listdir(backup_root)
-            if f.endswith(".archive.gz")
-        ],
-        key=os.path.getmtime,
-        reverse=True  # newest first
-    )
-
-    for old_archive in archives[keep_last:]:
-        try:
-            os.remove(old_archive)
-        except OSError:
-            pass
\ No newline at end of file
+    return apply_retention(backup_root, db_name=db_name, policy={"keep_last": keep_last})
@@ -0,0 +1,507 @@
+import os
+import time
+import heapq
+import shutil
+import hashlib
+import datetime
+import threading
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from typing import Dict, Any, List, Optional
+from urllib.parse import quote
+
+from .archive_reader import archive_namespaces, inspect_archive
+from .client_registry import pooled_client
+from .command_runner import run_command
+from .manifest_service import MANIFEST_VERSION, SET_SUFFIX, read_manifest, write_manifest
+from .mongo_service import collection_stats
+from .parallel_dump_service import dump_database
+
+SEGMENT_SUFFIX = ".archive.gz"
+
+# Longest file name most filesystems accept
+_MAX_FILENAME_BYTES = 255
+
+# Collections smaller than this share a segment with other small ones, so a
+# database of thousands of tiny collections isn't thousands of processes
+SMALL_COLLECTION_BYTES = 16 * 1024 * 1024
+
+# Uncompressed bytes per collection-group segment
+GROUP_TARGET_BYTES = 256 * 1024 * 1024
+
+# How often a running set job checks for cancellation
+CANCEL_POLL_SECONDS = 0.2
+
+
+def is_backup_set(path: str) -> bool:
+    """A backup set is a directory of per-collection segment archives."""
+    return path.endswith(SET_SUFFIX) and os.path.isdir(path)
+
+
+def segment_filename(name: str) -> str:
+    """
+    File name of the segment for `name`. Collection names may contain "/",
+    so the name is percent-escaped (and hashed if that gets too long); the
+    real collection names live in the set manifest and segment preludes.
+    """
+    safe = quote(name, safe="")
+    if len(safe.encode()) + len(SEGMENT_SUFFIX) > _MAX_FILENAME_BYTES:
+        safe = f"{safe[:100]}~{hashlib.sha1(name.encode()).hexdigest()[:16]}"
+    return f"{safe}{SEGMENT_SUFFIX}"
+
+
+def segment_files(set_dir: str) -> List[str]:
+    return sorted(
+        os.path.join(set_dir, name) for name in os.listdir(set_dir)
+        if name.endswith(SEGMENT_SUFFIX)
+    )
+
+
+def set_size(set_dir: str) -> int:
+    """Compressed bytes of every segment in the set."""
+    return sum(os.path.getsize(path) for path in segment_files(set_dir))
+
+
+def remove_backup_set(set_dir: str):
+    shutil.rmtree(set_dir, ignore_errors=True)
+
+
+def set_segments(set_dir: str) -> List[Dict[str, Any]]:
+    """
+    Segments of a set with the collections in each, from the set manifest
+    when present, otherwise from each segment's prelude.
+    """
+    manifest = read_manifest(set_dir) or {}
+    listed = {s["file"]: s["collections"] for s in manifest.get("segments", [])}
+
+    segments = []
+    for path in segment_files(set_dir):
+        name = os.path.basename(path)
+        collections = listed.get(name)
+        if collections is None:
+            collections = sorted(ns["collection"] for ns in archive_namespaces(path) if ns["collection"])
+        segments.append({
+            "path": path,
+            "file": name,
+            "collections": collections,
+            "compressed_bytes": os.path.getsize(path),
+        })
+    return segments
+
+
+def set_namespaces(set_dir: str) -> list:
+    """archive_namespaces across every segment of a set."""
+    namespaces = []
+    for path in segment_files(set_dir):
+        namespaces.extend(archive_namespaces(path))
+    return namespaces
+
+
+def terminate_on_cancel(cancel_event, finished, processes, lock):
+    """
+    Watcher thread for set jobs: once `cancel_event` is set, terminate every
+    child process registered in `processes` (a set guarded by `lock`).
+    """
+    while not finished.is_set():
+        if cancel_event.wait(CANCEL_POLL_SECONDS):
+            with lock:
+                for process in processes:
+                    if process.poll() is None:
+                        process.terminate()
+            return
+
+
+# -----------------------------
+# Scheduling
+# -----------------------------
+
+def plan_largest_first(sizes: Dict[str, int], workers: int) -> Dict[str, Any]:
+    """
+    Longest-processing-time-first assignment of collections to `workers`:
+    each collection, biggest first, goes to the least-loaded worker.
+
+    The makespan is at most 4/3 of optimal, and approaches sum/workers when
+    no single collection dominates. Returns the per-worker collection lists,
+    their loads in bytes and the predicted makespan (largest load).
+    """
+    workers = max(1, min(workers, len(sizes) or 1))
+    order = sorted(sizes, key=lambda name: (-sizes[name], name))
+
+    heap = [(0, i) for i in range(workers)]
+    assignment = [[] for _ in range(workers)]
+    loads = [0] * workers
+
+    for name in order:
+        load, i = heapq.heappop(heap)
+        assignment[i].append(name)
+        loads[i] = load + sizes[name]
+        heapq.heappush(heap, (loads[i], i))
+
+    total = sum(sizes.values())
+    return {
+        "order": order,
+        "workers": assignment,
+        "loads": loads,
+        "makespan_bytes": max(loads) if loads else 0,
+        "ideal_bytes": total // workers if workers else total,
+    }
+
+
+def plan_segments(sizes: Dict[str, int], group_below: int = SMALL_COLLECTION_BYTES) -> Dict[str, List[str]]:
+    """
+    Segment name -> collections. Collections of `group_below` bytes or more
+    get a segment of their own; smaller ones are packed into "group-NNN"
+    segments of up to GROUP_TARGET_BYTES.
+    """
+    segments = {}
+    small = []
+    for name in sorted(sizes):
+        if sizes[name] >= group_below:
+            segments[name] = [name]
+        else:
+            small.append(name)
+
+    groups, current, current_bytes = [], [], 0
+    for name in sorted(small, key=lambda n: (-sizes[n], n)):
+        if current and current_bytes + sizes[name] > GROUP_TARGET_BYTES:
+            groups.append(current)
+            current, current_bytes = [], 0
+        current.append(name)
+        current_bytes += sizes[name]
+    if current:
+        groups.append(current)
+
+    index = 0
+    for group in groups:
+        index += 1
+        while f"group-{index:03d}" in sizes:  # never shadow a real collection
+            index += 1
+        segments[f"group-{index:03d}"] = sorted(group)
+
+    return segments
+
+
+def _collection_sizes(uri: str, db_name: str, include, exclude):
+    """Sizes of the collections to back up."""
+    with pooled_client(uri) as client:
+        db = client[db_name]
+        infos = list(db.list_collections())
+        names = sorted(
+            info["name"] for info in infos
+            if info.get("type", "collection") == "collection"
+            and not info["name"].startswith("system.")
+            and (not include or info["name"] in include)
+            and info["name"] not in exclude
+        )
+
+        sizes = {}
+        for name in names:
+            try:
+                sizes[name] = collection_stats(db, name)["data_size"]
+            except Exception:
+                sizes[name] = 0  # unsized collections are scheduled last
+        return sizes
+
+
+# -----------------------------
+# Dump
+# -----------------------------
+
+def _dump_segment(uri, db_name, set_dir, name, collections, cancel_event, on_start):
+    """
+    Worker: dump one segment (a collection, or a group of small ones), then
+    summarise it. The summary read overlaps with the other workers' dumps.
+
+    A single collection is a mongodump --collection run. mongodump can't
+    include several collections, so a group is written by the pymongo dump
+    engine with exactly its members: the segment never depends on which
+    other collections exist.
+    """
+    if cancel_event.is_set():
+        return {"success": False, "collection": name, "error": "Cancelled"}
+
+    segment = os.path.join(set_dir, segment_filename(name))
+    started = time.monotonic()
+
+    if collections == [name]:
+        command = [
+            "mongodump",
+            "--uri", uri,
+            "--db", db_name,
+            f"--collection={name}",
+            f"--archive={segment}",
+            "--gzip",
+        ]
+        result = run_command(command, on_start=on_start)
+        if not result.get("success") and not result.get("error"):
+            result["error"] = f"mongodump exited with {result.get('return_code')}"
+    else:
+        result = dump_database(
+            uri, db_name, segment,
+            include_collections=collections,
+            partitions=1,
+            workers=1,
+            cancel_event=cancel_event,
+        )
+
+    duration = time.monotonic() - started
+
+    if cancel_event.is_set():
+        return {"success": False, "collection": name, "error": "Cancelled"}
+
+    if not result.get("success"):
+        return {
+            "success": False,
+            "collection": name,
+            "error": result.get("error"),
+            "output": result.get("output"),
+        }
+
+    inspection = inspect_archive(segment)
+    if not inspection.get("success"):
+        return {"success": False, "collection": name, "error": inspection.get("error")}
+
+    return {
+        "success": True,
+        "collection": name,
+        "file": os.path.basename(segment),
+        "namespaces": inspection["namespaces"],
+        "header": inspection["header"],
+        "documents": inspection["total_documents"],
+        "uncompressed_bytes": inspection["total_bytes"],
+        "compressed_bytes": os.path.getsize(segment),
+        "duration_seconds": round(duration, 2),
+    }
+
+
+def build_set_manifest(
+    set_dir: str,
+    source_db: str,
+    segments: List[Dict[str, Any]],
+    plan: Optional[Dict[str, Any]] = None,
+    duration_seconds: Optional[float] = None,
+) -> Dict[str, Any]:
+    """
+    Merge segment summaries into one manifest, shaped like an archive
+    manifest plus a "segments" list, so readers of either need no special case.
+    """
+    collections = []
+    for segment in segments:
+        for ns in segment["namespaces"]:
+            if not ns["collection"]:
+                continue
+            collections.append({
+                "name": ns["collection"],
+                "type": ns["type"],
+                "documents": ns["documents"],
+                "uncompressed_bytes": ns["bytes"],
+                "indexes": ns["indexes"],
+                "segment": segment["file"],
+            })
+    collections.sort(key=lambda c: c["name"])
+
+    header = segments[0]["header"] if segments else {}
+
+    manifest = {
+        "manifest_version": MANIFEST_VERSION,
+        "archive": os.path.basename(set_dir),
+        "layout": "set",
+        "source_db": source_db,
+        "created_at": datetime.datetime.now().isoformat(timespec="seconds"),
+        "duration_seconds": round(duration_seconds, 2) if duration_seconds is not None else None,
+        "server_version": header.get("server_version"),
+        "tool_version": header.get("tool_version"),
+        "collections": collections,
+        "segments": [
+            {
+                "file": s["file"],
+                "collections": sorted(ns["collection"] for ns in s["namespaces"] if ns["collection"]),
+                "documents": s["documents"],
+                "uncompressed_bytes": s["uncompressed_bytes"],
+                "compressed_bytes": s["compressed_bytes"],
+                "duration_seconds": s.get("duration_seconds"),
+            }
+            for s in sorted(segments, key=lambda s: s["file"])
+        ],
+        "total_documents": sum(s["documents"] for s in segments),
+        "uncompressed_bytes": sum(s["uncompressed_bytes"] for s in segments),
+        "compressed_bytes": sum(s["compressed_bytes"] for s in segments),
+    }
+    if plan is not None:
+        manifest["schedule"] = {
+            "workers": len(plan["workers"]),
+            "predicted_makespan_bytes": plan["makespan_bytes"],
+            "ideal_bytes": plan["ideal_bytes"],
+        }
+    return manifest
+
+
+def dump_backup_set(
+    uri: str,
+    db_name: str,
+    set_dir: str,
+    include_collections=None,
+    exclude_collections=None,
+    workers: int = 4,
+    group_below: int = SMALL_COLLECTION_BYTES,
+    progress_callback=None,
+    cancel_event=None,
+) -> Dict[str, Any]:
+    """
+    Back up a database as a set of mongodump segments: one per collection,
+    with collections under `group_below` bytes grouped (see plan_segments).
+
+    Segments are sized first and handed to `workers` concurrent dumps
+    largest first, so one huge collection starts immediately
+    instead of whenever the listing order reaches it.
+    `progress_callback(done, total)` runs as segments finish.
+    Writes the set manifest; returns structured result.
+    """
+    include = set(include_collections or [])
+    exclude = set(exclude_collections or [])
+    cancel_event = cancel_event or threading.Event()
+
+    try:
+        sizes = _collection_sizes(uri, db_name, include, exclude)
+    except Exception as e:
+        return {"success": False, "error": str(e)}
+
+    if not sizes:
+        return {"success": False, "error": "No collections to back up."}
+
+    layout = plan_segments(sizes, group_below)
+    plan = plan_largest_first(
+        {name: sum(sizes[c] for c in members) for name, members in layout.items()},
+        workers,
+    )
+    os.makedirs(set_dir, exist_ok=True)
+
+    started = time.monotonic()
+    segments, errors = [], []
+
+    lock = threading.Lock()
+    running = set()
+    finished = threading.Event()
+
+    def on_start(process):
+        with lock:
+            running.add(process)
+
+    threading.Thread(
+        target=terminate_on_cancel, args=(cancel_event, finished, running, lock), daemon=True
+    ).start()
+
+    # The pool's FIFO queue is fed biggest first, so each idle worker takes
+    # the largest segment left: LPT, adapted to actual dump times
+    try:
+        with ThreadPoolExecutor(max_workers=len(plan["workers"])) as pool:
+            futures = [
+                pool.submit(
+                    _dump_segment, uri, db_name, set_dir, name, layout[name],
+                    cancel_event, on_start,
+                )
+                for name in plan["order"]
+            ]
+            for future in as_completed(futures):
+                result = future.result()
+                if result.get("success"):
+                    segments.append(result)
+                else:
+                    errors.append(result)
+                    cancel_event.set()  # stop the rest; the set is unusable
+
+                if progress_callback:
+                    progress_callback(len(segments) + len(errors), len(futures))
+    finally:
+        finished.set()
+
+    duration = time.monotonic() - started
+
+    if errors:
+        remove_backup_set(set_dir)
+        first = next((e for e in errors if e.get("error") != "Cancelled"), errors[0])
+        return {
+            "success": False,
+            "error": f"{first['collection']}: {first.get('error')}",
+            "output": first.get("output", ""),
+        }
+
+    manifest = build_set_manifest(set_dir, db_name, segments, plan, duration)
+    try:
+        manifest_file = write_manifest(set_dir, manifest)
+    except OSError as e:
+        remove_backup_set(set_dir)
+        return {"success": False, "error": f"Could not write manifest: {e}"}
+
+    return {
+        "success": True,
+        "archive_file": set_dir,
+        "manifest_file": manifest_file,
+        "manifest": manifest,
+        "segments": len(segments),
+        "workers": len(plan["workers"]),
+        "duration_seconds": round(duration, 2),
+    }
+
+
+def verify_backup_set(set_dir: str) -> Dict[str, Any]:
+    """
+    verify_archive for a set: read every segment end to end and check the
+    per-collection counts and segment sizes against the set manifest.
+    """
+    if not is_backup_set(set_dir):
+        return {"success": False, "error": f"Not a backup set: {set_dir}"}
+
+    manifest = read_manifest(set_dir)
+    expected_segments = {s["file"]: s for s in (manifest or {}).get("segments", [])}
+    expected = {c["name"]: c["documents"] for c in (manifest or {}).get("collections", [])}
+
+    mismatches, actual = [], {}
+    total_docs = total_bytes = 0
+
+    files = segment_files(set_dir)
+    for path in files:
+        name = os.path.basename(path)
+        inspection = inspect_archive(path)
+        if not inspection.get("success"):
+            mismatches.append(f"{name}: {inspection.get('error')}")
+            continue
+
+        total_docs += inspection["total_documents"]
+        total_bytes += inspection["total_bytes"]
+        for ns in inspection["namespaces"]:
+            if ns["collection"]:
+                actual[ns["collection"]] = ns["documents"]
+
+        segment = expected_segments.get(name)
+        if manifest and segment is None:
+            mismatches.append(f"{name}: segment not in manifest")
+        elif segment and segment["compressed_bytes"] != os.path.getsize(path):
+            mismatches.append(
+                f"{name}: {os.path.getsize(path)} bytes, manifest says {segment['compressed_bytes']}"
+            )
+
+    present = {os.path.basename(p) for p in files}
+    for name in sorted(set(expected_segments) - present):
+        mismatches.append(f"{name}: segment missing")
+
+    if manifest:
+        for name in sorted(set(expected) | set(actual)):
+            if name not in expected:
+                mismatches.append(f"{name}: in set but not in manifest")
+            elif name not in actual:
+                mismatches.append(f"{name}: in manifest but not in set")
+            elif expected[name] != actual[name]:
+                mismatches.append(f"{name}: {actual[name]} documents, manifest says {expected[name]}")
+
+    result = {
+        "success": not mismatches,
+        "archive_file": set_dir,
+        "manifest_checked": manifest is not None,
+        "segments": len(files),
+        "total_documents": total_docs,
+        "total_bytes": total_bytes,
+        "mismatches": mismatches,
+    }
+    if mismatches:
+        result["error"] = f"{len(mismatches)} mismatch(es) against manifest"
+    return result
@@ -0,0 +1,524 @@
+import io
+import os
+import sys
+import json
+import time
+import uuid
+import random
+import datetime
+import tempfile
+import tracemalloc
+from typing import Dict, Any, List, Optional
+
+import bson
+
+from .archive_writer import ArchiveWriter
+from .compression_service import (
+    GZIP, ZSTD, READ_CHUNK, default_threads, open_compressed_writer,
+    open_decompressed, zstd_available,
+)
+
+try:
+    import lz4.frame as lz4_frame
+except ImportError:  # lz4 is only benchmarked, never written by backups
+    lz4_frame = None
+
+LZ4 = "lz4"
+BENCHMARK_CODECS = (GZIP, ZSTD, LZ4)
+
+# Levels tried per codec; threads are tried per level (lz4 is single-threaded)
+CODEC_LEVELS = {
+    GZIP: list(range(1, 10)),
+    ZSTD: [1, 3, 6, 9, 19],
+    LZ4: [0, 9, 16],
+}
+
+BENCHMARK_DB = "ecommerce_mega_db"
+ARCHIVE_INPUT = "archive"
+
+# Documents per collection at scale 1.0: 1/100 of sample_data/ecommerce_mega_db.py,
+# keeping its proportions (order items and activity logs outnumber users)
+BASE_COUNTS = {
+    "users": 1000,
+    "products": 1000,
+    "orders": 1000,
+    "order_items": 2000,
+    "product_reviews": 1000,
+    "user_activity_logs": 2000,
+}
+
+# Fixed clock so the same seed produces the same bytes on every run
+_NOW = datetime.datetime(2026, 1, 1)
+
+_FIRST_NAMES = ["James", "Mary", "John", "Patricia", "Robert", "Jennifer", "Michael", "Linda",
+                "William", "Elizabeth", "David", "Barbara", "Richard", "Susan", "Joseph", "Jessica"]
+_LAST_NAMES = ["Smith", "Johnson", "Williams", "Brown", "Jones", "Garcia", "Miller", "Davis",
+               "Rodriguez", "Martinez", "Hernandez", "Lopez", "Gonzalez", "Wilson", "Anderson"]
+_DOMAINS = ["gmail.com", "yahoo.com", "hotmail.com", "outlook.com", "example.com"]
+_BRANDS = ["Apple", "Samsung", "Sony", "Nike", "Adidas", "Dell", "HP", "Lenovo", "Canon", "Bosch"]
+_PRODUCT_NAMES = ["Smartphone", "Laptop", "Headphones", "Running Shoes", "Camera", "Blender",
+                  "Backpack", "Monitor", "Watch", "Jacket", "Drill", "Speaker"]
+_REVIEW_TITLES = ["Excellent product!", "Great value", "Good quality", "Average", "Disappointing",
+                  "Not as expected", "Highly recommend", "Perfect!", "Could be better", "Amazing!"]
+_REVIEW_TEXTS = [
+    "This product exceeded my expectations. Highly recommended!",
+    "Good quality for the price. Would buy again.",
+    "Average product, nothing special.",
+    "Disappointed with the quality. Expected better.",
+    "Exactly as described. Happy with purchase.",
+    "Fast shipping and great product!",
+    "Not worth the money. Regret buying.",
+    "Love it! Will buy more from this brand.",
+]
+_ACTIVITY_TYPES = ["login", "logout", "view_product", "search", "add_to_cart", "remove_from_cart",
+                   "view_cart", "checkout_start", "checkout_complete", "view_order",
+                   "update_profile", "write_review", "like_product", "add_to_wishlist"]
+
+
+# -----------------------------
+# Sample data
+# -----------------------------
+
+class SampleDataGenerator:
+    """
+    Offline stand-in for sample_data/ecommerce_mega_db.py: the same
+    collections and document shapes, generated from a seeded RNG without
+    a MongoDB connection (or numpy/tqdm).
+    """
+
+    def __init__(self, seed: int = 42):
+        self.rng = random.Random(seed)
+
+    def _id(self) -> str:
+        return str(uuid.UUID(int=self.rng.getrandbits(128), version=4))
+
+    def _hex(self, n: int) -> str:
+        return self._id().replace("-", "")[:n]
+
+    def _ip(self) -> str:
+        return ".".join(str(self.rng.randint(1, 255)) for _ in range(4))
+
+    def _ago(self, **max_delta) -> datetime.datetime:
+        (unit, limit), = max_delta.items()
+        return _NOW - datetime.timedelta(**{unit: self.rng.randint(0, limit)})
+
+    def users(self, n: int) -> List[Dict[str, Any]]:
+        rng, users = self.rng, []
+        for _ in range(n):
+            first, last = rng.choice(_FIRST_NAMES), rng.choice(_LAST_NAMES)
+            users.append({
+                "_id": self._id(),
+                "username": f"{first.lower()}.{last.lower()}.{self._hex(6)}",
+                "email": f"{first.lower()}.{last.lower()}.{self._hex(6)}@{rng.choice(_DOMAINS)}",
+                "password_hash": f"hash_{self._hex(16)}",
+                "first_name": first,
+                "last_name": last,
+                "phone": f"+1{rng.randint(200, 999)}{rng.randint(100, 999)}{rng.randint(1000, 9999)}",
+                "is_active": rng.random() > 0.1,
+                "is_verified": rng.random() > 0.2,
+                "account_type": rng.choices(["standard", "premium", "vip"], weights=[0.7, 0.2, 0.1])[0],
+                "created_at": self._ago(days=1095),
+                "last_login": self._ago(days=90),
+                "login_count": rng.randint(1, 1000),
+                "loyalty_points": rng.randint(0, 50000),
+                "referred_by": rng.choice(users)["_id"] if users and rng.random() > 0.7 else None,
+                "metadata": {
+                    "signup_ip": self._ip(),
+                    "signup_device": rng.choice(["mobile", "desktop", "tablet"]),
+                    "signup_browser": rng.choice(["Chrome", "Firefox", "Safari", "Edge"]),
+                    "marketing_consent": rng.random() > 0.3,
+                    "data_consent": rng.random() > 0.2,
+                },
+            })
+        return users
+
+    def products(self, n: int) -> List[Dict[str, Any]]:
+        rng, products = self.rng, []
+        for _ in range(n):
+            name = f"{rng.choice(_BRANDS)} {rng.choice(_PRODUCT_NAMES)} {rng.randint(1, 1000)}"
+            product_id = self._id()
+            cost = round(rng.uniform(5, 500), 2)
+            retail = round(cost * rng.uniform(1.2, 2.5), 2)
+            products.append({
+                "_id": product_id,
+                "sku": f"SKU-{self._hex(10).upper()}",
+                "upc": str(rng.randint(100000000000, 999999999999)),
+                "ean": str(rng.randint(1000000000000, 9999999999999)),
+                "name": name,
+                "slug": name.lower().replace(" ", "-"),
+                "description": f"Experience premium quality with this {name}. Perfect for everyday use.",
+                "short_description": f"High-quality {name}",
+                "features": [f"Feature {j}" for j in range(rng.randint(3, 8))],
+                "specifications": {
+                    "color": rng.choice(["Black", "White", "Silver", "Gold", "Red", "Blue"]),
+                    "weight": f"{rng.uniform(0.1, 10):.2f} kg",
+                    "dimensions": f"{rng.uniform(5, 100):.1f} x {rng.uniform(5, 100):.1f} x {rng.uniform(1, 50):.1f} cm",
+                    "material": rng.choice(["Plastic", "Metal", "Wood", "Glass", "Fabric", "Leather"]),
+                    "warranty": f"{rng.choice([1, 2, 3, 5])} years",
+                },
+                "cost_price": cost,
+                "retail_price": retail,
+                "sale_price": round(retail * rng.uniform(0.5, 0.95), 2) if rng.random() > 0.7 else None,
+                "currency": "USD",
+                "tax_rate": rng.choice([0, 5, 8, 10, 15, 20]),
+                "in_stock": rng.random() > 0.2,
+                "stock_quantity": rng.randint(0, 1000),
+                "weight_kg": round(rng.uniform(0.1, 20), 2),
+                "length_cm": rng.uniform(5, 100),
+                "width_cm": rng.uniform(5, 100),
+                "height_cm": rng.uniform(1, 50),
+                "download_url": f"https://example.com/downloads/{product_id}.zip" if rng.random() > 0.95 else None,
+                "rating": round(rng.uniform(3.0, 5.0), 1),
+                "review_count": rng.randint(0, 1000),
+                "view_count": rng.randint(0, 100000),
+                "tags": rng.sample(["new", "popular", "sale", "limited", "featured", "best-seller", "trending"],
+                                   k=rng.randint(2, 5)),
+                "is_featured": rng.random() > 0.8,
+                "published_at": self._ago(days=730),
+                "created_at": self._ago(days=730),
+                "updated_at": _NOW,
+            })
+        return products
+
+    def orders(self, n: int, users) -> List[Dict[str, Any]]:
+        rng, orders = self.rng, []
+        for _ in range(n):
+            created = self._ago(days=365)
+            subtotal = round(rng.uniform(20, 1000), 2)
+            shipping = round(rng.uniform(0, 50), 2)
+            tax_rate = rng.choice([0, 5, 8, 10, 15])
+            tax = round(subtotal * tax_rate / 100, 2)
+            discount = round(rng.uniform(0, subtotal * 0.3), 2) if rng.random() > 0.5 else 0
+            orders.append({
+                "_id": self._id(),
+                "order_number": f"ORD-{created:%Y%m}-{self._hex(8).upper()}",
+                "user_id": rng.choice(users)["_id"],
+                "status": rng.choices(
+                    ["pending", "processing", "confirmed", "shipped", "delivered", "cancelled", "refunded"],
+                    weights=[0.1, 0.15, 0.2, 0.2, 0.2, 0.1, 0.05],
+                )[0],
+                "payment_status": rng.choice(["pending", "authorized", "paid", "failed", "refunded"]),
+                "shipping_method": rng.choice(["standard", "express", "overnight", "pickup", "digital"]),
+                "subtotal": subtotal,
+                "shipping_cost": shipping,
+                "tax_amount": tax,
+                "tax_rate": tax_rate,
+                "discount_amount": discount,
+                "discount_code": f"SAVE{rng.randint(10, 50)}" if discount > 0 else None,
+                "total_amount": round(subtotal + shipping + tax - discount, 2),
+                "currency": "USD",
+                "exchange_rate": 1.0,
+                "notes": rng.choice(["", "Gift wrap please", "Leave at door", "Call on arrival"]) if rng.random() > 0.7 else "",
+                "ip_address": self._ip(),
+                "user_agent": "Mozilla/5.0...",
+                "created_at": created,
+                "updated_at": _NOW,
+                "processed_at": created + datetime.timedelta(hours=rng.randint(1, 24)),
+                "shipped_at": created + datetime.timedelta(days=rng.randint(1, 3)) if rng.random() > 0.3 else None,
+                "delivered_at": created + datetime.timedelta(days=rng.randint(3, 10)) if rng.random() > 0.4 else None,
+            })
+        return orders
+
+    def order_items(self, n: int, orders, products) -> List[Dict[str, Any]]:
+        rng, items = self.rng, []
+        for _ in range(n):
+            order, product = rng.choice(orders), rng.choice(products)
+            quantity = rng.randint(1, 5)
+            price = product["sale_price"] or product["retail_price"]
+            discount = round(price * rng.uniform(0, 0.2), 2) if rng.random() > 0.5 else 0
+            items.append({
+                "_id": self._id(),
+                "order_id": order["_id"],
+                "product_id": product["_id"],
+                "product_name": product["name"],
+                "sku": product["sku"],
+                "quantity": quantity,
+                "unit_price": price,
+                "discount_amount": discount,
+                "total_price": round((price - discount) * quantity, 2),
+                "tax_rate": product["tax_rate"],
+                "tax_amount": round((price - discount) * quantity * product["tax_rate"] / 100, 2),
+                "is_gift": rng.random() > 0.9,
+                "has_warranty": rng.random() > 0.7,
+                "created_at": order["created_at"],
+            })
+        return items
+
+    def product_reviews(self, n: int, users, products) -> List[Dict[str, Any]]:
+        rng, reviews = self.rng, []
+        for _ in range(n):
+            user, product = rng.choice(users), rng.choice(products)
+            rating = rng.choices([1, 2, 3, 4, 5], weights=[5, 10, 20, 35, 30])[0]
+            reviews.append({
+                "_id": self._id(),
+                "product_id": product["_id"],
+                "user_id": user["_id"],
+                "user_name": f"{user['first_name']} {user['last_name'][0]}.",
+                "rating": rating,
+                "title": rng.choice(_REVIEW_TITLES),
+                "content": rng.choice(_REVIEW_TEXTS),
+                "pros": rng.sample(["Quality", "Price", "Design", "Durability"], k=rng.randint(0, 3)) if rating >= 4 else [],
+                "cons": rng.sample(["Expensive", "Heavy", "Complex", "Battery"], k=rng.randint(0, 3)) if rating <= 2 else [],
+                "verified_purchase": rng.random() > 0.2,
+                "helpful_votes": rng.randint(0, 100),
+                "unhelpful_votes": rng.randint(0, 20),
+                "is_approved": rng.random() > 0.05,
+                "created_at": self._ago(days=365),
+                "updated_at": _NOW,
+            })
+        return reviews
+
+    def user_activity_logs(self, n: int, users, products) -> List[Dict[str, Any]]:
+        rng, logs = self.rng, []
+        for _ in range(n):
+            activity = rng.choice(_ACTIVITY_TYPES)
+            logs.append({
+                "_id": self._id(),
+                "user_id": rng.choice(users)["_id"] if rng.random() > 0.3 else None,
+                "session_id": self._id(),
+                "activity_type": activity,
+                "product_id": rng.choice(products)["_id"] if activity in ("view_product", "like_product") else None,
+                "search_query": f"search term {rng.randint(1, 1000)}" if activity == "search" else None,
+                "page_url": f"https://example.com/{rng.choice(['products', 'categories', 'cart'])}/{rng.randint(1, 10000)}",
+                "ip_address": self._ip(),
+                "user_agent": "Mozilla/5.0...",
+                "device_type": rng.choice(["mobile", "desktop", "tablet"]),
+                "browser": rng.choice(["Chrome", "Firefox", "Safari", "Edge"]),
+                "time_on_page": rng.randint(5, 600),
+                "metadata": {
+                    "campaign": rng.choice(["summer_sale", "winter_sale", "new_user", None]),
+                    "source": rng.choice(["email", "social", "ads", "organic", None]),
+                },
+                "created_at": _NOW - datetime.timedelta(minutes=rng.randint(1, 43200)),
+            })
+        return logs
+
+    def generate(self, scale: float = 1.0) -> Dict[str, List[Dict[str, Any]]]:
+        """Every collection, BASE_COUNTS * scale documents each (at least 1)."""
+        count = {name: max(1, int(base * scale)) for name, base in BASE_COUNTS.items()}
+        users = self.users(count["users"])
+        products = self.products(count["products"])
+        orders = self.orders(count["orders"], users)
+        return {
+            "users": users,
+            "products": products,
+            "orders": orders,
+            "order_items": self.order_items(count["order_items"], orders, products),
+            "product_reviews": self.product_reviews(count["product_reviews"], users, products),
+            "user_activity_logs": self.user_activity_logs(count["user_activity_logs"], users, products),
+        }
+
+
+def build_inputs(scale: float, seed: int, work_dir: str) -> Dict[str, Dict[str, Any]]:
+    """
+    Raw BSON per collection, plus the whole database as one uncompressed
+    mongodump archive (what a backup actually compresses).
+    """
+    collections = SampleDataGenerator(seed).generate(scale)
+    encoded = {name: [bson.encode(doc) for doc in docs] for name, docs in collections.items()}
+
+    archive_path = os.path.join(work_dir, "input.archive")
+    with ArchiveWriter(archive_path, compress=False) as writer:
+        writer.write_prelude({"db": BENCHMARK_DB, "collection": name} for name in encoded)
+        for name, raw in encoded.items():
+            writer.write_block(BENCHMARK_DB, name, raw)
+            writer.end_namespace(BENCHMARK_DB, name)
+
+    with open(archive_path, "rb") as f:
+        archive = f.read()
+    os.remove(archive_path)
+
+    inputs = {
+        name: {"data": b"".join(raw), "documents": len(raw)}
+        for name, raw in encoded.items()
+    }
+    inputs[ARCHIVE_INPUT] = {"data": archive, "documents": sum(len(raw) for raw in encoded.values())}
+    return inputs
+
+
+# -----------------------------
+# Codecs
+# -----------------------------
+
+def available_codecs() -> List[str]:
+    return [
+        codec for codec in BENCHMARK_CODECS
+        if codec == GZIP or (codec == ZSTD and zstd_available()) or (codec == LZ4 and lz4_frame)
+    ]
+
+
+def _open_writer(path: str, codec: str, level: int, threads: int):
+    if codec == LZ4:
+        return lz4_frame.open(path, "wb", compression_level=level)
+    return open_compressed_writer(path, codec, level, threads)
+
+
+def _open_reader(path: str, codec: str, threads: int):
+    if codec == LZ4:
+        return lz4_frame.open(path, "rb")
+    return open_decompressed(path, threads)
+
+
+def _compress(data: bytes, path: str, codec: str, level: int, threads: int):
+    source = io.BytesIO(data)
+    with _open_writer(path, codec, level, threads) as out:
+        for chunk in iter(lambda: source.read(READ_CHUNK), b""):
+            out.write(chunk)
+
+
+def _decompress(path: str, codec: str, threads: int) -> int:
+    total = 0
+    with _open_reader(path, codec, threads) as source:
+        for chunk in iter(lambda: source.read(READ_CHUNK), b""):
+            total += len(chunk)
+    return total
+
+
+def _timed(func, *args):
+    started = time.perf_counter()
+    result = func(*args)
+    return result, time.perf_counter() - started
+
+
+def _peak_memory(func, *args) -> int:
+    """
+    Peak bytes allocated during func, as seen by tracemalloc (Python and
+    zlib buffers; memory a C extension allocates itself is not counted).
+    """
+    tracemalloc.start()
+    try:
+        func(*args)
+        return tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+
+
+def _mb_per_second(size: int, seconds: float) -> float:
+    return round(size / seconds / 1e6, 2) if seconds > 0 else 0.0
+
+
+def run_case(data: bytes, work_dir: str, codec: str, level: int, threads: int) -> Dict[str, Any]:
+    """
+    Compress `data` to a file and read it back. Times are measured without
+    tracing; peak memory comes from a second, traced run.
+    """
+    path = os.path.join(work_dir, f"case.{codec}")
+    try:
+        _, compress_seconds = _timed(_compress, data, path, codec, level, threads)
+        compressed = os.path.getsize(path)
+        restored, decompress_seconds = _timed(_decompress, path, codec, threads)
+        if restored != len(data):
+            raise RuntimeError(f"round trip returned {restored} of {len(data)} bytes")
+
+        compress_peak = _peak_memory(_compress, data, path, codec, level, threads)
+        decompress_peak = _peak_memory(_decompress, path, codec, threads)
+    finally:
+        if os.path.exists(path):
+            os.remove(path)
+
+    return {
+        "codec": codec,
+        "level": level,
+        "threads": threads,
+        "uncompressed_bytes": len(data),
+        "compressed_bytes": compressed,
+        "ratio": round(len(data) / compressed, 3) if compressed else 0.0,
+        "compress_seconds": round(compress_seconds, 4),
+        "decompress_seconds": round(decompress_seconds, 4),
+        "compress_mb_s": _mb_per_second(len(data), compress_seconds),
+        "decompress_mb_s": _mb_per_second(len(data), decompress_seconds),
+        "compress_peak_bytes": compress_peak,
+        "decompress_peak_bytes": decompress_peak,
+    }
+
+
+def benchmark_cases(codecs, threads) -> List[Dict[str, Any]]:
+    """(codec, level, threads) combinations; lz4 always runs on one thread."""
+    cases = []
+    for codec in codecs:
+        for level in CODEC_LEVELS[codec]:
+            for n in ([1] if codec == LZ4 else threads):
+                cases.append({"codec": codec, "level": level, "threads": n})
+    return cases
+
+
+# -----------------------------
+# Benchmark
+# -----------------------------
+
+def run_benchmark(
+    scale: float = 1.0,
+    seed: int = 42,
+    codecs=None,
+    threads=None,
+    output_path: Optional[str] = None,
+    progress_callback=None,
+) -> Dict[str, Any]:
+    """
+    Compress sample e-commerce data with every codec / level / thread count
+    and read it back: per collection and as one whole mongodump archive.
+
+    `codecs` defaults to all installed (gzip always; zstd and lz4 when their
+    packages are present), `threads` to [1, all cores]. The same seed and
+    scale give the same input bytes, so result files from different
+    machines or versions compare row by row. Writes JSON to `output_path`
+    when given. Returns structured result.
+    """
+    installed = available_codecs()
+    requested = list(codecs or BENCHMARK_CODECS)
+    unknown = [c for c in requested if c not in BENCHMARK_CODECS]
+    if unknown:
+        return {"success": False, "error": f"Unknown codec(s): {', '.join(unknown)}"}
+
+    skipped = [c for c in requested if c not in installed]
+    codecs = [c for c in requested if c in installed]
+    threads = sorted({max(1, n) for n in (threads or [1, default_threads()])})
+    if scale <= 0:
+        return {"success": False, "error": "Scale must be positive."}
+
+    cases = benchmark_cases(codecs, threads)
+    results = []
+    started = time.monotonic()
+
+    with tempfile.TemporaryDirectory(prefix="mongovault-bench-") as work_dir:
+        inputs = build_inputs(scale, seed, work_dir)
+        total = len(inputs) * len(cases)
+
+        for name, item in inputs.items():
+            for case in cases:
+                try:
+                    row = run_case(item["data"], work_dir, case["codec"], case["level"], case["threads"])
+                except Exception as e:
+                    row = {**case, "error": str(e)}
+                results.append({"input": name, **row})
+                if progress_callback:
+                    progress_callback(len(results), total)
+
+    report = {
+        "success": not any("error" in row for row in results),
+        "created_at": datetime.datetime.now().isoformat(timespec="seconds"),
+        "scale": scale,
+        "seed": seed,
+        "cpu_count": default_threads(),
+        "python": sys.version.split()[0],
+        "codecs": codecs,
+        "skipped_codecs": skipped,
+        "threads": threads,
+        "duration_seconds": round(time.monotonic() - started, 2),
+        "inputs": [
+            {"name": name, "documents": item["documents"], "bytes": len(item["data"])}
+            for name, item in inputs.items()
+        ],
+        "results": results,
+    }
+    if not report["success"]:
+        report["error"] = f"{sum(1 for row in results if 'error' in row)} case(s) failed"
+
+    if output_path:
+        try:
+            with open(output_path, "w", encoding="utf-8") as f:
+                json.dump(report, f, indent=2)
+            report["output_path"] = output_path
+        except OSError as e:
+            report.update({"success": False, "error": f"Could not write {output_path}: {e}"})
+    return report
@@ -0,0 +1,381 @@
+import os
+import json
+import sqlite3
+import hashlib
+import datetime
+import statistics
+from typing import Dict, Any, List, Optional
+
+from .backup_set_service import is_backup_set, segment_files, set_size, verify_backup_set
+from .manifest_service import ARCHIVE_SUFFIXES, SET_SUFFIX, read_manifest, verify_archive
+
+CATALOG_FILE = "catalog.sqlite3"
+SCHEMA_VERSION = 1
+
+CHECKSUM_CHUNK = 1024 * 1024
+
+# Recent backups used to predict a run's duration
+ETA_SAMPLE_SIZE = 10
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS backups (
+    id                  INTEGER PRIMARY KEY,
+    archive_path        TEXT NOT NULL UNIQUE,
+    db_name             TEXT NOT NULL,
+    cluster             TEXT,
+    created_at          TEXT NOT NULL,
+    engine              TEXT,
+    collections         TEXT,
+    collection_count    INTEGER,
+    total_documents     INTEGER,
+    uncompressed_bytes  INTEGER,
+    compressed_bytes    INTEGER,
+    duration_seconds    REAL,
+    throughput_mb_s     REAL,
+    checksum            TEXT,
+    verify_status       TEXT NOT NULL DEFAULT 'unverified',
+    verified_at         TEXT,
+    verify_error        TEXT,
+    deleted_at          TEXT
+);
+CREATE INDEX IF NOT EXISTS backups_db_created ON backups (db_name, created_at);
+CREATE INDEX IF NOT EXISTS backups_created ON backups (created_at);
+"""
+
+
+def catalog_path(backup_root: str) -> str:
+    """The catalog lives next to the archives it describes."""
+    return os.path.join(backup_root, CATALOG_FILE)
+
+
+def open_catalog(backup_root: str) -> sqlite3.Connection:
+    """
+    Open (creating if needed) the catalog for a backup directory.
+    WAL mode lets the GUI read while a scheduled backup writes.
+    """
+    os.makedirs(backup_root, exist_ok=True)
+
+    conn = sqlite3.connect(catalog_path(backup_root), timeout=30)
+    conn.row_factory = sqlite3.Row
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.execute("PRAGMA synchronous=NORMAL")
+
+    if conn.execute("PRAGMA user_version").fetchone()[0] < SCHEMA_VERSION:
+        conn.executescript(_SCHEMA)
+        conn.execute(f"PRAGMA user_version={SCHEMA_VERSION}")
+        conn.commit()
+
+    return conn
+
+
+def file_checksum(path: str) -> str:
+    """sha256 of an archive, or of a backup set's segments in name order."""
+    digest = hashlib.sha256()
+    for part in segment_files(path) if is_backup_set(path) else [path]:
+        with open(part, "rb") as f:
+            for chunk in iter(lambda: f.read(CHECKSUM_CHUNK), b""):
+                digest.update(chunk)
+    return f"sha256:{digest.hexdigest()}"
+
+
+def archive_size(path: str) -> int:
+    return set_size(path) if is_backup_set(path) else os.path.getsize(path)
+
+
+def _row(row: sqlite3.Row) -> Dict[str, Any]:
+    entry = dict(row)
+    entry["collections"] = json.loads(entry["collections"] or "[]")
+    return entry
+
+
+# -----------------------------
+# Recording
+# -----------------------------
+
+def record_backup(
+    backup_root: str,
+    archive_file: str,
+    db_name: str,
+    cluster: Optional[str] = None,
+    engine: Optional[str] = None,
+    duration_seconds: Optional[float] = None,
+    manifest: Optional[Dict[str, Any]] = None,
+    checksum: bool = True,
+    known_checksum: Optional[str] = None,
+) -> Dict[str, Any]:
+    """
+    Add (or refresh) a finished archive in the catalog.
+    Sizes and collections come from the manifest; pass it in if you have it.
+    `known_checksum` ("sha256:<hex>", e.g. hashed while the archive was
+    streamed) saves reading the archive again.
+    The first backup recorded in a directory creates its catalog.
+    """
+    try:
+        ensure_catalog(backup_root)
+        manifest = manifest or read_manifest(archive_file) or {}
+        compressed = archive_size(archive_file)
+        uncompressed = manifest.get("uncompressed_bytes")
+
+        duration = duration_seconds
+        if duration is None:
+            duration = manifest.get("duration_seconds")
+
+        throughput = None
+        if duration and uncompressed:
+            throughput = round(uncompressed / duration / (1024 * 1024), 2)
+
+        collections = [
+            {
+                "name": c["name"],
+                "documents": c.get("documents", 0),
+                "uncompressed_bytes": c.get("uncompressed_bytes", 0),
+            }
+            for c in manifest.get("collections", [])
+        ]
+
+        created_at = manifest.get("created_at") or datetime.datetime.fromtimestamp(
+            os.path.getmtime(archive_file)
+        ).isoformat(timespec="seconds")
+
+        values = {
+            "archive_path": os.path.abspath(archive_file),
+            "db_name": db_name,
+            "cluster": cluster,
+            "created_at": created_at,
+            "engine": engine,
+            "collections": json.dumps(collections),
+            "collection_count": len(collections),
+            "total_documents": manifest.get("total_documents"),
+            "uncompressed_bytes": uncompressed,
+            "compressed_bytes": compressed,
+            "duration_seconds": duration,
+            "throughput_mb_s": throughput,
+            "checksum": known_checksum or (file_checksum(archive_file) if checksum else None),
+        }
+
+        columns = ", ".join(values)
+        placeholders = ", ".join(f":{k}" for k in values)
+        updates = ", ".join(f"{k} = excluded.{k}" for k in values if k != "archive_path")
+
+        conn = open_catalog(backup_root)
+        try:
+            with conn:
+                conn.execute(
+                    f"INSERT INTO backups ({columns}) VALUES ({placeholders}) "
+                    f"ON CONFLICT (archive_path) DO UPDATE SET {updates}, deleted_at = NULL",
+                    values,
+                )
+                backup_id = conn.execute(
+                    "SELECT id FROM backups WHERE archive_path = ?", (values["archive_path"],)
+                ).fetchone()[0]
+        finally:
+            conn.close()
+
+    except (OSError, sqlite3.Error) as e:
+        return {"success": False, "error": f"Could not catalog backup: {e}"}
+
+    return {"success": True, "catalog_id": backup_id}
+
+
+def record_verification(backup_root: str, archive_file: str, ok: bool, error: Optional[str] = None):
+    conn = open_catalog(backup_root)
+    try:
+        with conn:
+            conn.execute(
+                "UPDATE backups SET verify_status = ?, verified_at = ?, verify_error = ? "
+                "WHERE archive_path = ?",
+                (
+                    "ok" if ok else "failed",
+                    datetime.datetime.now().isoformat(timespec="seconds"),
+                    error,
+                    os.path.abspath(archive_file),
+                ),
+            )
+    finally:
+        conn.close()
+
+
+def mark_deleted(backup_root: str, archive_paths: List[str]):
+    if not archive_paths:
+        return
+
+    now = datetime.datetime.now().isoformat(timespec="seconds")
+    conn = open_catalog(backup_root)
+    try:
+        with conn:
+            conn.executemany(
+                "UPDATE backups SET deleted_at = ? WHERE archive_path = ?",
+                [(now, os.path.abspath(p)) for p in archive_paths],
+            )
+    finally:
+        conn.close()
+
+
+def import_existing(backup_root: str) -> Dict[str, Any]:
+    """
+    One-off backfill: catalog archives already on disk (from their manifests
+    when present). Checksums are skipped here to keep it quick.
+    """
+    if not os.path.isdir(backup_root):
+        return {"success": True, "imported": 0}
+
+    imported = 0
+    for name in os.listdir(backup_root):
+        path = os.path.join(backup_root, name)
+        if not (name.endswith(ARCHIVE_SUFFIXES) or (name.endswith(SET_SUFFIX) and is_backup_set(path))):
+            continue
+
+        manifest = read_manifest(path) or {}
+        db_name = manifest.get("source_db") or name.split("_backup_")[0]
+
+        result = record_backup(backup_root, path, db_name, manifest=manifest, checksum=False)
+        if result.get("success"):
+            imported += 1
+
+    return {"success": True, "imported": imported}
+
+
+def ensure_catalog(backup_root: str):
+    """Create the catalog, backfilling from disk the first time."""
+    fresh = not os.path.exists(catalog_path(backup_root))
+    open_catalog(backup_root).close()
+    if fresh:
+        import_existing(backup_root)
+
+
+# -----------------------------
+# Queries
+# -----------------------------
+
+def list_backups(
+    backup_root: str,
+    db_name: Optional[str] = None,
+    limit: Optional[int] = None,
+    offset: int = 0,
+    include_deleted: bool = False,
+) -> List[Dict[str, Any]]:
+    """
+    Catalog entries, newest first. Served from the index, not the filesystem;
+    a directory without a catalog has none (reading never creates one).
+    """
+    if not os.path.exists(catalog_path(backup_root)):
+        return []
+
+    query = "SELECT * FROM backups WHERE 1 = 1"
+    params: list = []
+
+    if db_name:
+        query += " AND db_name = ?"
+        params.append(db_name)
+    if not include_deleted:
+        query += " AND deleted_at IS NULL"
+
+    query += " ORDER BY created_at DESC, id DESC"
+    if limit or offset:
+        query += " LIMIT ? OFFSET ?"
+        params += [limit or -1, offset]
+
+    conn = open_catalog(backup_root)
+    try:
+        return [_row(r) for r in conn.execute(query, params)]
+    finally:
+        conn.close()
+
+
+def catalog_databases(backup_root: str) -> List[str]:
+    """Databases with at least one live (not pruned) backup."""
+    if not os.path.exists(catalog_path(backup_root)):
+        return []
+    conn = open_catalog(backup_root)
+    try:
+        rows = conn.execute(
+            "SELECT DISTINCT db_name FROM backups WHERE deleted_at IS NULL ORDER BY db_name"
+        )
+        return [r[0] for r in rows]
+    finally:
+        conn.close()
+
+
+def get_backup(backup_root: str, archive_file: str) -> Optional[Dict[str, Any]]:
+    if not os.path.exists(catalog_path(backup_root)):
+        return None
+    conn = open_catalog(backup_root)
+    try:
+        row = conn.execute(
+            "SELECT * FROM backups WHERE archive_path = ?", (os.path.abspath(archive_file),)
+        ).fetchone()
+        return _row(row) if row else None
+    finally:
+        conn.close()
+
+
+def size_trend(backup_root: str, db_name: str, limit: int = 30) -> List[Dict[str, Any]]:
+    """Oldest-first sizes of the last `limit` backups of a database."""
+    if not os.path.exists(catalog_path(backup_root)):
+        return []
+    conn = open_catalog(backup_root)
+    try:
+        rows = conn.execute(
+            "SELECT created_at, total_documents, uncompressed_bytes, compressed_bytes, "
+            "duration_seconds FROM backups WHERE db_name = ? "
+            "ORDER BY created_at DESC LIMIT ?",
+            (db_name, limit),
+        ).fetchall()
+    finally:
+        conn.close()
+
+    return [dict(r) for r in reversed(rows)]
+
+
+def predict_duration(backup_root: str, db_name: str, uncompressed_bytes: Optional[int] = None):
+    """
+    Expected seconds for the next backup of `db_name`, from the median
+    throughput of recent runs. Returns None without usable history.
+    """
+    recent = [
+        r for r in size_trend(backup_root, db_name, ETA_SAMPLE_SIZE)
+        if r["duration_seconds"] and r["uncompressed_bytes"]
+    ]
+    if not recent:
+        return None
+
+    rate = statistics.median(r["uncompressed_bytes"] / r["duration_seconds"] for r in recent)
+    if uncompressed_bytes is None:
+        uncompressed_bytes = recent[-1]["uncompressed_bytes"]
+
+    return uncompressed_bytes / rate if rate > 0 else None
+
+
+# -----------------------------
+# Verification
+# -----------------------------
+
+def verify_backup(backup_root: str, archive_file: str) -> Dict[str, Any]:
+    """
+    verify_archive plus the catalog checksum, with the outcome recorded
+    in the catalog when the archive is cataloged.
+    """
+    if is_backup_set(archive_file):
+        result = verify_backup_set(archive_file)
+    else:
+        result = verify_archive(archive_file)
+
+    try:
+        entry = get_backup(backup_root, archive_file)
+    except sqlite3.Error:
+        return result  # unreadable catalog (e.g. read-only directory)
+    if entry is None:  # includes directories without a catalog
+        return result
+
+    if result.get("success") and entry["checksum"]:
+        actual = file_checksum(archive_file)
+        result["checksum_checked"] = True
+        if actual != entry["checksum"]:
+            result["success"] = False
+            result["error"] = f"Checksum mismatch: catalog {entry['checksum']}, file {actual}"
+
+    try:
+        record_verification(backup_root, archive_file, result.get("success", False), result.get("error"))
+    except sqlite3.Error:
+        pass  # the verify result stands even if it can't be recorded
+    return result
@@ -0,0 +1,236 @@
+import atexit
+import threading
+import time
+from contextlib import contextmanager
+from urllib.parse import parse_qsl, urlencode, urlsplit, urlunsplit
+
+from pymongo import MongoClient
+
+SERVER_SELECTION_TIMEOUT_MS = 5000
+
+# Pooled sockets idle this long are closed by the driver itself
+MAX_IDLE_TIME_MS = 60_000
+
+# A client not leased for this long is closed and dropped from the registry
+IDLE_EVICT_SECONDS = 600
+
+# Ping a client before reuse if it has sat idle this long
+HEALTH_CHECK_SECONDS = 30
+
+
+def normalize_uri(uri: str) -> str:
+    """
+    Canonical form of a connection string, so trivially different spellings
+    of the same cluster share one client: scheme and hosts lower-cased, hosts
+    sorted, options sorted with lower-cased names. Credentials, the default
+    database and option values are left untouched.
+    """
+    parts = urlsplit(uri.strip())
+
+    userinfo, at, hostlist = parts.netloc.rpartition("@")
+    hosts = ",".join(sorted(h.lower() for h in hostlist.split(",") if h))
+    netloc = f"{userinfo}{at}{hosts}"
+
+    query = urlencode(sorted(
+        (key.lower(), value) for key, value in parse_qsl(parts.query, keep_blank_values=True)
+    ))
+
+    return urlunsplit((parts.scheme.lower(), netloc, parts.path.rstrip("/"), query, ""))
+
+
+DEFAULT_PORT = 27017
+
+
+def cluster_key(uri: str) -> str:
+    """
+    The cluster a URI points at: its sorted, lower-cased host list with the
+    default port filled in, without credentials, database or options.
+    mongodb+srv hosts are kept as the SRV name (no DNS lookup).
+    """
+    parts = urlsplit(uri.strip())
+    hostlist = parts.netloc.rpartition("@")[2]
+    srv = parts.scheme.lower() == "mongodb+srv"
+
+    hosts = []
+    for host in hostlist.split(","):
+        host = host.lower()
+        if not host:
+            continue
+        # "host:port" or "[v6]:port"; a bare v6 literal is bracketed too
+        if not srv and not host.rpartition("]")[2].partition(":")[1]:
+            host = f"{host}:{DEFAULT_PORT}"
+        hosts.append(host)
+    return ",".join(sorted(hosts))
+
+
+class _Entry:
+    def __init__(self, client):
+        self.client = client
+        self.leases = 0
+        self.last_used = time.monotonic()
+        self.retired = False  # replaced after a failed health check
+
+
+class ClientRegistry:
+    """
+    Process-wide MongoClient cache keyed by normalized URI.
+
+    MongoClient is thread-safe and pools its own connections, so one
+    instance per cluster is shared by every service and worker thread.
+    Leased clients are never evicted; idle ones are health-checked before
+    reuse and closed after IDLE_EVICT_SECONDS.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._entries = {}
+        self._leased = {}  # id(client) -> entry, for release()
+        self._closed = False
+
+    def acquire(self, uri: str):
+        """Lease the shared client for `uri`. Pair with release()."""
+        entry = self._acquire(normalize_uri(uri), uri)
+        return entry.client
+
+    def release(self, client):
+        with self._lock:
+            entry = self._leased.get(id(client))
+        if entry is not None:
+            self._release(entry)
+
+    @contextmanager
+    def client(self, uri: str):
+        client = self.acquire(uri)
+        try:
+            yield client
+        finally:
+            self.release(client)
+
+    def _acquire(self, key, uri):
+        with self._lock:
+            if self._closed:
+                raise RuntimeError("MongoDB client registry is shut down")
+
+            self._evict_idle_locked()
+
+            entry = self._entries.get(key)
+            stale = (
+                entry is not None
+                and entry.leases == 0
+                and time.monotonic() - entry.last_used > HEALTH_CHECK_SECONDS
+            )
+
+            if entry is None:
+                entry = _Entry(self._create(uri))
+                self._entries[key] = entry
+                self._leased[id(entry.client)] = entry
+
+            entry.leases += 1
+            entry.last_used = time.monotonic()
+
+        # Ping outside the lock so a slow cluster doesn't block other URIs
+        if stale and not self._healthy(entry.client):
+            entry = self._replace(key, uri, entry)
+
+        return entry
+
+    def _replace(self, key, uri, entry):
+        # Other threads may have leased the broken client meanwhile; it is
+        # retired and closed once the last of them lets go
+        fresh = _Entry(self._create(uri))
+
+        with self._lock:
+            current = self._entries.get(key)
+            if current is entry or current is None:
+                self._entries[key] = fresh
+                self._leased[id(fresh.client)] = fresh
+                current = fresh
+            else:
+                fresh.client.close()  # someone else already replaced it
+            current.leases += 1
+            entry.retired = True
+
+        self._release(entry)
+        return current
+
+    def _release(self, entry):
+        with self._lock:
+            entry.leases -= 1
+            entry.last_used = time.monotonic()
+            close = entry.retired and entry.leases == 0
+            if close:
+                self._leased.pop(id(entry.client), None)
+
+        if close:
+            entry.client.close()
+
+    @staticmethod
+    def _create(uri):
+        return MongoClient(
+            uri,
+            serverSelectionTimeoutMS=SERVER_SELECTION_TIMEOUT_MS,
+            maxIdleTimeMS=MAX_IDLE_TIME_MS,
+        )
+
+    @staticmethod
+    def _healthy(client):
+        try:
+            client.admin.command("ping")
+            return True
+        except Exception:
+            return False
+
+    def _evict_idle_locked(self):
+        now = time.monotonic()
+        for key, entry in list(self._entries.items()):
+            if entry.leases == 0 and now - entry.last_used > IDLE_EVICT_SECONDS:
+                del self._entries[key]
+                self._leased.pop(id(entry.client), None)
+                entry.client.close()
+
+    def evict_idle(self):
+        with self._lock:
+            self._evict_idle_locked()
+
+    def close_all(self):
+        """Close every client. Further leases raise RuntimeError."""
+        with self._lock:
+            self._closed = True
+            entries = list(self._entries.values())
+            self._entries.clear()
+            self._leased.clear()
+
+        for entry in entries:
+            try:
+                entry.client.close()
+            except Exception:
+                pass
+
+
+_registry = ClientRegistry()
+atexit.register(_registry.close_all)
+
+
+def pooled_client(uri: str):
+    """
+    Lease the shared client for `uri`:
+
+        with pooled_client(uri) as client:
+            client[db_name].command("ping")
+
+    Don't close the client yourself; the registry owns it.
+    """
+    return _registry.client(uri)
+
+
+def acquire_client(uri: str):
+    """Lease the shared client for `uri`; hand it back with release_client()."""
+    return _registry.acquire(uri)
+
+
+def release_client(client):
+    _registry.release(client)
+
+
+def close_all_clients():
+    _registry.close_all()
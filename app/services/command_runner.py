@@ -1,54 +1,173 @@
 import subprocess
+import threading
+from collections import deque
 from typing import Dict, Any
 
+# Longest single line we keep in memory; the rest of a longer line is discarded
+MAX_LINE_BYTES = 64 * 1024
 
-def run_command(command, log_file=None) -> Dict[str, Any]:
+# How many trailing lines are kept for the `output` field
+DEFAULT_TAIL_LINES = 200
+
+
+def read_line(stream) -> bytes:
     """
-    Executes mongodump/mongorestore command
-    Parses duplicate key errors & index conflicts
-    Returns structured result
+    Next line of `stream`, cut to MAX_LINE_BYTES. The rest of an over-long
+    line is skipped, so it never reaches the parsers as extra lines.
+    Returns b"" at EOF.
+    """
+    raw = stream.readline(MAX_LINE_BYTES)
+    if len(raw) == MAX_LINE_BYTES and not raw.endswith(b"\n"):
+        while True:
+            rest = stream.readline(MAX_LINE_BYTES)
+            if not rest or rest.endswith(b"\n"):
+                break
+    return raw
+
+
+def new_output_stats() -> Dict[str, Any]:
+    return {
+        "duplicate_count": 0,
+        "index_conflicts": 0,
+        "duplicate_per_collection": {},
+    }
+
+
+def parse_output_line(line: str, stats: Dict[str, Any]):
+    """
+    Update duplicate key / index conflict counters from a single output line.
+    """
+    if "E11000 duplicate key error" in line:
+        stats["duplicate_count"] += 1
+
+        if "collection:" in line:
+            try:
+                col_part = line.split("collection:")[1].strip()
+                col_name = col_part.split(" ")[0]
+                per_col = stats["duplicate_per_collection"]
+                per_col[col_name] = per_col.get(col_name, 0) + 1
+            except Exception:
+                pass
+
+    if "IndexOptionsConflict" in line:
+        stats["index_conflicts"] += 1
+
+
+class PipeThread(threading.Thread):
+    """
+    Moves archive data through a child's stdin or stdout while the caller
+    reads its log output: runs `func(stream)`, then closes the stream.
     """
 
-    result = subprocess.run(
+    def __init__(self, func, stream):
+        super().__init__(daemon=True)
+        self.func = func
+        self.stream = stream
+        self.result = None
+        self.error = None
+
+    def run(self):
+        try:
+            self.result = self.func(self.stream)
+        except Exception as e:
+            self.error = e
+        finally:
+            try:
+                self.stream.close()
+            except OSError:
+                pass
+
+
+def popen_piped(command, stdin_feed=None, stdout_sink=None):
+    """
+    Start `command`. With `stdout_sink` its stdout is data for the sink and
+    its log goes to stderr; with `stdin_feed` the feed writes its stdin.
+    Returns (process, log_stream, pipe_thread or None).
+    """
+    process = subprocess.Popen(
         command,
+        stdin=subprocess.PIPE if stdin_feed else None,
         stdout=subprocess.PIPE,
-        stderr=subprocess.PIPE,
-        text=True
+        stderr=subprocess.PIPE if stdout_sink else subprocess.STDOUT,
     )
 
-    output = result.stdout + result.stderr
+    pipe = None
+    if stdout_sink:
+        pipe = PipeThread(stdout_sink, process.stdout)
+    elif stdin_feed:
+        pipe = PipeThread(stdin_feed, process.stdin)
+    if pipe:
+        pipe.start()
 
-    if log_file:
-        with open(log_file, "w") as f:
-            f.write(output)
+    log_stream = process.stderr if stdout_sink else process.stdout
+    return process, log_stream, pipe
 
-    duplicate_count = 0
-    index_conflicts = 0
-    duplicate_per_collection = {}
 
-    for line in output.splitlines():
+def run_command(command, log_file=None, tail_lines=DEFAULT_TAIL_LINES, on_start=None,
+                stdin_feed=None, stdout_sink=None, on_line=None) -> Dict[str, Any]:
+    """
+    Executes mongodump/mongorestore command
+    Streams output line by line, parsing duplicate key errors & index conflicts
+    Full output goes to `log_file` when given; only the last `tail_lines`
+    lines are kept in memory. `on_start(process)` gets the Popen, e.g. so
+    another thread can terminate it.
+    `stdout_sink(stdout)` / `stdin_feed(stdin)` stream archive data out of
+    or into the child on a helper thread (see popen_piped); the sink's
+    return value is reported as "pipe_result". `on_line(line)` sees every
+    output line, e.g. for a progress tracker.
+    Returns structured result
+    """
 
-        if "E11000 duplicate key error" in line:
-            duplicate_count += 1
+    stats = new_output_stats()
+    tail = deque(maxlen=tail_lines)
+    sink = open(log_file, "w", encoding="utf-8") if log_file else None
 
-            if "collection:" in line:
-                try:
-                    col_part = line.split("collection:")[1].strip()
-                    col_name = col_part.split(" ")[0]
-                    duplicate_per_collection[col_name] = (
-                        duplicate_per_collection.get(col_name, 0) + 1
-                    )
-                except Exception:
-                    pass
+    try:
+        process, log_stream, pipe = popen_piped(command, stdin_feed, stdout_sink)
+        if on_start:
+            on_start(process)
 
-        if "IndexOptionsConflict" in line:
-            index_conflicts += 1
+        while True:
+            raw = read_line(log_stream)
+            if not raw:
+                break
 
-    return {
-        "success": result.returncode == 0,
-        "return_code": result.returncode,
-        "output": output,
-        "duplicate_count": duplicate_count,
-        "index_conflicts": index_conflicts,
-        "duplicate_per_collection": duplicate_per_collection
+            line = raw.decode("utf-8", errors="replace").rstrip("\r\n")
+
+            if sink:
+                sink.write(line + "\n")
+
+            parse_output_line(line, stats)
+            tail.append(line)
+            if on_line:
+                on_line(line)
+
+        log_stream.close()
+        return_code = process.wait()
+        if pipe:
+            pipe.join()
+
+    finally:
+        if sink:
+            sink.close()
+
+    result = {
+        "success": return_code == 0,
+        "return_code": return_code,
+        "output": "\n".join(tail),
+        "log_file": log_file,
+        **stats,
     }
+
+    if pipe:
+        result["pipe_result"] = pipe.result
+        # A broken pipe, or a stdout stream cut short, after the child
+        # failed is a symptom, not the cause
+        broken_by_child = return_code != 0 and (
+            stdout_sink is not None or isinstance(pipe.error, BrokenPipeError)
+        )
+        if pipe.error is not None and not broken_by_child:
+            result["success"] = False
+            result["error"] = f"Archive stream failed: {pipe.error}"
+
+    return result
@@ -0,0 +1,325 @@
+import io
+import os
+import gzip
+import zlib
+import struct
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Any, Optional
+
+from . import storage_service
+
+try:
+    import zstandard
+except ImportError:  # zstd is optional; gzip always works
+    zstandard = None
+
+GZIP = "gzip"
+ZSTD = "zstd"
+CODECS = (GZIP, ZSTD)
+
+ARCHIVE_EXTENSIONS = {GZIP: ".archive.gz", ZSTD: ".archive.zst"}
+DEFAULT_LEVELS = {GZIP: 6, ZSTD: 3}
+
+GZIP_MAGIC = b"\x1f\x8b"
+ZSTD_MAGIC = b"\x28\xb5\x2f\xfd"
+
+# Uncompressed bytes per gzip member; each member is compressed on its own thread
+BLOCK_BYTES = 1024 * 1024
+
+READ_CHUNK = 1024 * 1024
+
+# Every member we write carries its own size in a gzip extra subfield
+# ("MV"), so a reader can split the stream without inflating it. Plain
+# gunzip and mongorestore --gzip read it as ordinary multi-member gzip.
+_FEXTRA = 0x04
+_MEMBER_HEADER = struct.Struct("<BBBBIBBH2sHI")
+_MEMBER_TRAILER = struct.Struct("<II")
+_SUBFIELD_ID = b"MV"
+
+
+def default_threads() -> int:
+    return os.cpu_count() or 1
+
+
+def zstd_available() -> bool:
+    return zstandard is not None
+
+
+def _require_zstd():
+    if zstandard is None:
+        raise RuntimeError("zstd needs the 'zstandard' package (pip install zstandard)")
+
+
+def detect_format(path: str) -> str:
+    """
+    "zstd", "gzip-indexed" (our parallel gzip), "gzip" or "raw",
+    from the leading bytes rather than the extension. `path` may be an
+    s3:// URL (one small ranged GET).
+    """
+    if storage_service.is_remote(path):
+        return format_of(storage_service.read_head(path, _MEMBER_HEADER.size))
+    with open(path, "rb") as f:
+        return format_of(f.read(_MEMBER_HEADER.size))
+
+
+def format_of(head: bytes) -> str:
+    """detect_format for the first bytes of an archive."""
+    if head.startswith(ZSTD_MAGIC):
+        return ZSTD
+    if head.startswith(GZIP_MAGIC):
+        if (
+            len(head) == _MEMBER_HEADER.size
+            and head[3] & _FEXTRA
+            and head[12:14] == _SUBFIELD_ID
+        ):
+            return "gzip-indexed"
+        return GZIP
+    return "raw"
+
+
+# -----------------------------
+# Parallel gzip
+# -----------------------------
+
+def _gzip_member(block: bytes, level: int) -> bytes:
+    # zlib releases the GIL while deflating, so pool threads run in parallel
+    compressor = zlib.compressobj(level, zlib.DEFLATED, -zlib.MAX_WBITS)
+    body = compressor.compress(block) + compressor.flush()
+
+    size = _MEMBER_HEADER.size + len(body) + _MEMBER_TRAILER.size
+    header = _MEMBER_HEADER.pack(
+        0x1F, 0x8B, 8, _FEXTRA, 0, 0, 255, 8, _SUBFIELD_ID, 4, size
+    )
+    trailer = _MEMBER_TRAILER.pack(zlib.crc32(block), len(block) & 0xFFFFFFFF)
+    return header + body + trailer
+
+
+def _inflate_member(member: bytes) -> bytes:
+    body = member[_MEMBER_HEADER.size: -_MEMBER_TRAILER.size]
+    data = zlib.decompressobj(-zlib.MAX_WBITS).decompress(body)
+
+    crc, size = _MEMBER_TRAILER.unpack(member[-_MEMBER_TRAILER.size:])
+    if zlib.crc32(data) != crc or len(data) & 0xFFFFFFFF != size:
+        raise gzip.BadGzipFile("gzip member failed its CRC check")
+    return data
+
+
+class ParallelGzipWriter(io.RawIOBase):
+    """
+    Block-parallel gzip: input is cut into BLOCK_BYTES blocks, each deflated
+    as an independent gzip member on a thread pool, and written in order.
+    At most 2 * threads blocks are in flight, so memory stays bounded.
+    """
+
+    def __init__(self, fileobj, level: int = DEFAULT_LEVELS[GZIP], threads: Optional[int] = None,
+                 block_bytes: int = BLOCK_BYTES):
+        super().__init__()
+        self._out = fileobj
+        self._level = level
+        self._threads = max(1, threads or default_threads())
+        self._block_bytes = block_bytes
+        self._pool = ThreadPoolExecutor(max_workers=self._threads)
+        self._pending = deque()
+        self._buffer = bytearray()
+        self.bytes_in = 0
+        self.bytes_out = 0
+
+    def writable(self):
+        return True
+
+    def write(self, data) -> int:
+        self._buffer += data
+        self.bytes_in += len(data)
+        while len(self._buffer) >= self._block_bytes:
+            self._submit(bytes(self._buffer[: self._block_bytes]))
+            del self._buffer[: self._block_bytes]
+        return len(data)
+
+    def _submit(self, block: bytes):
+        if len(self._pending) >= self._threads * 2:
+            self._write_oldest()
+        self._pending.append(self._pool.submit(_gzip_member, block, self._level))
+
+    def _write_oldest(self):
+        member = self._pending.popleft().result()
+        self._out.write(member)
+        self.bytes_out += len(member)
+
+    def close(self):
+        if self.closed:
+            return
+        try:
+            if self._buffer:
+                self._submit(bytes(self._buffer))
+                self._buffer.clear()
+            while self._pending:
+                self._write_oldest()
+        finally:
+            self._pool.shutdown(cancel_futures=True)
+            self._out.close()
+            super().close()
+
+
+class ParallelGzipReader(io.RawIOBase):
+    """
+    Reads our indexed gzip: member boundaries come from the size subfield,
+    so up to 2 * threads members inflate concurrently, returned in order.
+    """
+
+    def __init__(self, source, threads: Optional[int] = None):
+        super().__init__()
+        self._in = open(source, "rb") if isinstance(source, str) else source
+        self._threads = max(1, threads or default_threads())
+        self._pool = ThreadPoolExecutor(max_workers=self._threads)
+        self._pending = deque()
+        self._current = b""
+        self._offset = 0
+        self._eof = False
+
+    def readable(self):
+        return True
+
+    def _next_member(self) -> Optional[bytes]:
+        header = self._in.read(_MEMBER_HEADER.size)
+        if not header:
+            return None
+        if len(header) < _MEMBER_HEADER.size:
+            raise EOFError("truncated gzip member header")
+
+        fields = _MEMBER_HEADER.unpack(header)
+        if fields[:2] != (0x1F, 0x8B) or fields[8] != _SUBFIELD_ID:
+            raise gzip.BadGzipFile("not an indexed gzip member")
+
+        body = self._in.read(fields[10] - _MEMBER_HEADER.size)
+        if len(body) < fields[10] - _MEMBER_HEADER.size:
+            raise EOFError("truncated gzip member")
+        return header + body
+
+    def _fill(self):
+        while not self._eof and len(self._pending) < self._threads * 2:
+            member = self._next_member()
+            if member is None:
+                self._eof = True
+            else:
+                self._pending.append(self._pool.submit(_inflate_member, member))
+
+    def readinto(self, buffer) -> int:
+        while self._offset >= len(self._current):
+            self._fill()
+            if not self._pending:
+                return 0
+            self._current = self._pending.popleft().result()
+            self._offset = 0
+            self._fill()  # keep the pool busy while the caller consumes
+
+        n = min(len(buffer), len(self._current) - self._offset)
+        buffer[:n] = self._current[self._offset: self._offset + n]
+        self._offset += n
+        return n
+
+    def close(self):
+        if self.closed:
+            return
+        self._pool.shutdown(cancel_futures=True)
+        self._in.close()
+        super().close()
+
+
+class _OwningGzipFile(gzip.GzipFile):
+    """GzipFile over a stream it also closes (GzipFile(fileobj=...) leaves it open)."""
+
+    def close(self):
+        source = self.fileobj
+        try:
+            super().close()
+        finally:
+            if source is not None:
+                source.close()
+
+
+# -----------------------------
+# Open / stream
+# -----------------------------
+
+def compressed_writer(fileobj, codec: str = GZIP, level: Optional[int] = None,
+                      threads: Optional[int] = None):
+    """
+    Binary writer compressing into `fileobj` (any object with write/close)
+    with `threads` threads. Closing the writer closes `fileobj`.
+    """
+    level = DEFAULT_LEVELS[codec] if level is None else level
+    threads = threads or default_threads()
+
+    if codec == ZSTD:
+        _require_zstd()
+        compressor = zstandard.ZstdCompressor(level=level, threads=threads)
+        return compressor.stream_writer(fileobj)
+    if codec == GZIP:
+        return ParallelGzipWriter(fileobj, level=level, threads=threads)
+    raise ValueError(f"Unknown codec: {codec}")
+
+
+def open_compressed_writer(path: str, codec: str = GZIP, level: Optional[int] = None,
+                           threads: Optional[int] = None):
+    """Binary writer compressing to `path` with `threads` threads."""
+    if codec not in CODECS:
+        raise ValueError(f"Unknown codec: {codec}")
+    if codec == ZSTD:
+        _require_zstd()
+    return compressed_writer(open(path, "wb"), codec, level, threads)
+
+
+def open_decompressed(path: str, threads: Optional[int] = None, **storage_options):
+    """
+    Binary reader over the uncompressed bytes of any archive we can read.
+    Our indexed gzip is inflated in parallel; other gzip is single-stream.
+    `path` may be an s3:// URL, streamed with ranged GETs (`storage_options`:
+    part_size, concurrency, read_ahead).
+    """
+    fmt = detect_format(path)
+    source = storage_service.open_read(path, **storage_options)
+
+    if fmt == ZSTD:
+        _require_zstd()
+        return zstandard.ZstdDecompressor().stream_reader(
+            source, read_size=READ_CHUNK, read_across_frames=True
+        )
+    if fmt == "gzip-indexed":
+        return io.BufferedReader(ParallelGzipReader(source, threads), buffer_size=READ_CHUNK)
+    if fmt == GZIP:
+        return _OwningGzipFile(fileobj=source, mode="rb")
+    return source
+
+
+def compress_stream(source, path: str, codec: str = GZIP, level: Optional[int] = None,
+                    threads: Optional[int] = None) -> Dict[str, Any]:
+    """
+    Compress everything readable from `source` (e.g. mongodump's stdout)
+    into `path`. Returns uncompressed/compressed byte counts.
+    """
+    total = 0
+    with open_compressed_writer(path, codec, level, threads) as out:
+        for chunk in iter(lambda: source.read(READ_CHUNK), b""):
+            out.write(chunk)
+            total += len(chunk)
+
+    return {
+        "codec": codec,
+        "uncompressed_bytes": total,
+        "compressed_bytes": os.path.getsize(path),
+    }
+
+
+def decompress_stream(path: str, sink, threads: Optional[int] = None, **storage_options) -> int:
+    """Write the uncompressed archive into `sink` (e.g. mongorestore's stdin)."""
+    total = 0
+    with open_decompressed(path, threads, **storage_options) as source:
+        for chunk in iter(lambda: source.read(READ_CHUNK), b""):
+            sink.write(chunk)
+            total += len(chunk)
+    return total
+
+
+def archive_extension(codec: Optional[str]) -> str:
+    return ARCHIVE_EXTENSIONS.get(codec or GZIP, ARCHIVE_EXTENSIONS[GZIP])
@@ -0,0 +1,206 @@
+import time
+import threading
+import subprocess
+from collections import deque
+from typing import Dict, Any
+
+from .backup_set_service import terminate_on_cancel
+from .client_registry import cluster_key
+from .command_runner import DEFAULT_TAIL_LINES, read_line, run_command
+from .compression_service import READ_CHUNK
+from .mongo_service import collection_uuids, get_collection_sizes, get_collections
+from .progress_tracker import ProgressTracker
+from .restore_service import namespace_args
+
+# At most one progress report per this many seconds
+PROGRESS_INTERVAL_SECONDS = 1.0
+
+
+def build_copy_commands(
+    source_uri: str,
+    source_db: str,
+    target_uri: str,
+    target_db: str,
+    exclude_collections=None,
+    drop: bool = True,
+    parallel: int = 4,
+):
+    """
+    (mongodump, mongorestore) commands for a copy: the dump writes the
+    archive to stdout, the restore reads it from stdin and maps
+    {source_db}.* to {target_db}.* exactly as a restore of that archive would.
+    """
+    dump = [
+        "mongodump",
+        "--uri", source_uri,
+        "--db", source_db,
+        "--archive",
+        f"--numParallelCollections={parallel}",
+    ]
+    for col in exclude_collections or []:
+        dump.append(f"--excludeCollection={col}")
+
+    restore = [
+        "mongorestore",
+        "--uri", target_uri,
+        "--archive",
+        *namespace_args(source_db, target_db, exclude_collections=exclude_collections),
+        f"--numParallelCollections={parallel}",
+    ]
+    if drop:
+        restore.append("--drop")
+
+    return dump, restore
+
+
+def _collect_log(stream, tail):
+    for raw in iter(lambda: read_line(stream), b""):
+        tail.append(raw.decode("utf-8", errors="replace").rstrip("\r\n"))
+    stream.close()
+
+
+def copy_database(
+    source_uri: str,
+    source_db: str,
+    target_uri: str,
+    target_db: str,
+    include_collections=None,
+    exclude_collections=None,
+    drop: bool = True,
+    parallel: int = 4,
+    progress_callback=None,
+    cancel_event=None,
+) -> Dict[str, Any]:
+    """
+    Copy a database between clusters in one streaming pass:
+    `mongodump --archive` stdout is piped into `mongorestore --archive`
+    stdin, so nothing touches local disk and the restore runs while the
+    dump is still reading.
+
+    `include_collections` is turned into --excludeCollection for the other
+    collections, so unpicked data isn't read at all. `progress_callback(info)`
+    gets at most one dict per PROGRESS_INTERVAL_SECONDS with "percent"
+    (byte-weighted by source collection sizes), "documents", "archive_bytes"
+    piped so far, "mb_s" and "eta_seconds". Returns structured result.
+    """
+    if not all((source_uri, source_db, target_uri, target_db)):
+        return {"success": False, "error": "Source and target URI and database are required."}
+
+    # mongorestore --drop into the collections mongodump is reading loses
+    # data. Host spellings (aliases, IPs, SRV) can hide that both URIs reach
+    # one deployment, so a same-named copy also compares collection UUIDs.
+    if source_db == target_db and (
+        cluster_key(source_uri) == cluster_key(target_uri)
+        or collection_uuids(source_uri, source_db) & collection_uuids(target_uri, target_db)
+    ):
+        return {"success": False, "error": "Source and target are the same database."}
+
+    exclude = set(exclude_collections or [])
+    if include_collections:
+        names = get_collections(source_uri, source_db)
+        if not names:
+            return {"success": False, "error": f"No collections found in {source_db}."}
+        exclude |= set(names) - set(include_collections)
+
+    dump_command, restore_command = build_copy_commands(
+        source_uri, source_db, target_uri, target_db,
+        exclude_collections=sorted(exclude), drop=drop, parallel=parallel,
+    )
+
+    sizes = get_collection_sizes(source_uri, source_db, include_collections or None)
+    tracker = ProgressTracker({name: size for name, size in sizes.items() if name not in exclude})
+    cancel_event = cancel_event or threading.Event()
+    piped = {"bytes": 0, "eof": False}
+    last_report = {"at": 0.0}
+    started = time.monotonic()
+
+    def report(force=False):
+        now = time.monotonic()
+        if not progress_callback or (not force and now - last_report["at"] < PROGRESS_INTERVAL_SECONDS):
+            return
+        last_report["at"] = now
+        elapsed = max(now - started, 1e-6)
+        progress_callback({
+            "percent": tracker.percent(),
+            "documents": tracker.documents(),
+            "archive_bytes": piped["bytes"],
+            "mb_s": round(piped["bytes"] / elapsed / (1024 * 1024), 2),
+            "eta_seconds": tracker.eta_seconds(),
+        })
+
+    def on_line(line):
+        if tracker.feed(line):
+            report()
+
+    lock = threading.Lock()
+    processes = set()
+    finished = threading.Event()
+
+    try:
+        dump = subprocess.Popen(dump_command, stdout=subprocess.PIPE, stderr=subprocess.PIPE)
+    except OSError as e:
+        return {"success": False, "error": f"Could not start mongodump: {e}"}
+    processes.add(dump)
+
+    dump_log = deque(maxlen=DEFAULT_TAIL_LINES)
+    log_thread = threading.Thread(target=_collect_log, args=(dump.stderr, dump_log), daemon=True)
+    log_thread.start()
+
+    def feed(stdin):
+        # The archive passes through here only to be counted; no copy is kept
+        try:
+            for chunk in iter(lambda: dump.stdout.read(READ_CHUNK), b""):
+                stdin.write(chunk)
+                piped["bytes"] += len(chunk)
+                report()
+            piped["eof"] = True  # mongodump closed the stream itself
+        finally:
+            dump.stdout.close()  # if mongorestore quit early, mongodump stops too
+        return piped["bytes"]
+
+    def on_start(process):
+        with lock:
+            processes.add(process)
+
+    threading.Thread(
+        target=terminate_on_cancel, args=(cancel_event, finished, processes, lock), daemon=True
+    ).start()
+
+    try:
+        tracker.start_time = time.time()
+        result = run_command(restore_command, on_start=on_start, stdin_feed=feed, on_line=on_line)
+    except OSError as e:
+        dump.kill()
+        result = {"success": False, "error": f"Could not start mongorestore: {e}"}
+    finally:
+        dump_code = dump.wait()
+        log_thread.join()
+        finished.set()
+
+    duration = time.monotonic() - started
+    report(force=True)
+
+    summary = {
+        "success": dump_code == 0 and bool(result.get("success")),
+        "source_db": source_db,
+        "target_db": target_db,
+        "duration_seconds": round(duration, 2),
+        "archive_bytes": piped["bytes"],
+        "documents": tracker.documents(),
+        "mb_s": round(piped["bytes"] / duration / (1024 * 1024), 2) if duration else 0.0,
+        "duplicate_count": result.get("duplicate_count", 0),
+        "index_conflicts": result.get("index_conflicts", 0),
+        "output": result.get("output", ""),
+        "dump_output": "\n".join(dump_log),
+    }
+
+    if cancel_event.is_set():
+        summary.update(success=False, error="Cancelled")
+    elif dump_code != 0 and (piped["eof"] or result.get("success")):
+        # The dump failed and cut the archive short; the restore only saw the end of it
+        summary["error"] = f"mongodump exited with {dump_code}"
+    elif not result.get("success"):
+        # The restore quit first; closing its pipe is what stopped mongodump
+        summary["error"] = result.get("error") or f"mongorestore exited with {result.get('return_code')}"
+
+    return summary
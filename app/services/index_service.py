@@ -0,0 +1,146 @@
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from typing import Dict, Any, List
+
+from .client_registry import acquire_client, release_client
+
+from .archive_reader import archive_namespaces
+from .backup_set_service import is_backup_set, set_namespaces
+
+
+def index_specs(namespace: Dict[str, Any]) -> List[Dict[str, Any]]:
+    """
+    Secondary index specs for one archive namespace, ready for createIndexes.
+    """
+    return [
+        {k: v for k, v in spec.items() if k != "ns"}
+        for spec in namespace.get("indexes", [])
+        if spec.get("name") != "_id_"
+    ]
+
+
+def index_plan(backup_file: str, include_collections=None, exclude_collections=None):
+    """
+    Archive (or backup set) namespaces that carry secondary indexes,
+    filtered like a restore.
+    """
+    include = set(include_collections or [])
+    exclude = set(exclude_collections or [])
+
+    if is_backup_set(backup_file):
+        namespaces = set_namespaces(backup_file)
+    else:
+        namespaces = archive_namespaces(backup_file)
+
+    return [
+        ns for ns in namespaces
+        if ns["collection"]
+        and index_specs(ns)
+        and (not include or ns["collection"] in include)
+        and ns["collection"] not in exclude
+    ]
+
+
+def create_indexes(db, namespace: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Build whichever of the namespace's indexes are missing on the target.
+    Already-present index names are skipped, which makes a rerun resume.
+    """
+    name = namespace["collection"]
+    specs = index_specs(namespace)
+
+    existing = {index["name"] for index in db[name].list_indexes()}
+    missing = [spec for spec in specs if spec.get("name") not in existing]
+
+    started = time.monotonic()
+    if missing:
+        # One createIndexes per collection: all its indexes share a single scan
+        db.command("createIndexes", name, indexes=missing)
+
+    return {
+        "built": len(missing),
+        "skipped": len(specs) - len(missing),
+        "seconds": round(time.monotonic() - started, 2),
+    }
+
+
+def rebuild_indexes(
+    uri: str,
+    db_name: str,
+    namespaces,
+    workers: int = 4,
+    progress_callback=None,
+    cancel_event=None,
+) -> Dict[str, Any]:
+    """
+    Rebuild archive indexes as a separate phase, `workers` collections at a time.
+
+    `progress_callback(done, total, collection)` fires after each collection,
+    where done/total count indexes. Safe to rerun after a failure or cancel:
+    indexes that already exist are not rebuilt.
+    Returns structured result.
+    """
+    cancel_event = cancel_event or threading.Event()
+    namespaces = [ns for ns in namespaces if index_specs(ns)]
+    total = sum(len(index_specs(ns)) for ns in namespaces)
+
+    if not namespaces:
+        return {"success": True, "built": 0, "skipped": 0, "collections": {}}
+
+    try:
+        client = acquire_client(uri)
+    except Exception as e:
+        return {"success": False, "error": str(e)}
+
+    db = client[db_name]
+    results = {}
+    errors = []
+    done = 0
+
+    def build(ns):
+        if cancel_event.is_set():
+            return None
+        return create_indexes(db, ns)
+
+    try:
+        with ThreadPoolExecutor(max_workers=max(1, workers)) as pool:
+            futures = {pool.submit(build, ns): ns for ns in namespaces}
+
+            for future in as_completed(futures):
+                ns = futures[future]
+                name = ns["collection"]
+
+                try:
+                    outcome = future.result()
+                except Exception as e:
+                    errors.append(f"{name}: {e}")
+                    results[name] = {"error": str(e)}
+                    continue
+
+                if outcome is None:
+                    continue
+
+                results[name] = outcome
+                done += len(index_specs(ns))
+                if progress_callback:
+                    progress_callback(done, total, name)
+    finally:
+        release_client(client)
+
+    if cancel_event.is_set():
+        return {"success": False, "error": "Cancelled", "collections": results}
+
+    if errors:
+        return {
+            "success": False,
+            "error": f"{len(errors)} collection(s) failed: " + "; ".join(errors),
+            "collections": results,
+        }
+
+    return {
+        "success": True,
+        "built": sum(r["built"] for r in results.values()),
+        "skipped": sum(r["skipped"] for r in results.values()),
+        "collections": results,
+    }
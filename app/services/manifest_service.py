@@ -0,0 +1,196 @@
+import os
+import json
+import datetime
+from typing import Dict, Any, Optional
+
+from . import storage_service
+from .archive_reader import inspect_archive
+
+MANIFEST_VERSION = 1
+ARCHIVE_SUFFIX = ".archive.gz"
+ARCHIVE_SUFFIXES = (ARCHIVE_SUFFIX, ".archive.zst")
+MANIFEST_SUFFIX = ".manifest.json"
+SET_SUFFIX = ".backupset"  # directory of per-collection segment archives
+
+
+def manifest_path(archive_file: str) -> str:
+    """
+    Sidecar path for an archive: {db}_backup_{ts}.archive.gz -> {db}_backup_{ts}.manifest.json
+    (likewise for a {db}_backup_{ts}.backupset directory)
+    """
+    archive_file = archive_file.rstrip("/")
+    for suffix in (*ARCHIVE_SUFFIXES, SET_SUFFIX):
+        if archive_file.endswith(suffix):
+            return archive_file[: -len(suffix)] + MANIFEST_SUFFIX
+    return archive_file + MANIFEST_SUFFIX
+
+
+def build_manifest(
+    archive_file: str,
+    source_db: Optional[str] = None,
+    duration_seconds: Optional[float] = None,
+) -> Dict[str, Any]:
+    """
+    Scan a finished archive once and summarise it.
+    Returns structured result with the manifest under "manifest".
+    """
+    inspection = inspect_archive(archive_file)
+    if not inspection.get("success"):
+        return inspection
+
+    manifest = manifest_from_scan(
+        archive_file, inspection, source_db, duration_seconds, storage_service.size(archive_file)
+    )
+    return {"success": True, "manifest": manifest}
+
+
+def manifest_from_scan(
+    archive_file: str,
+    inspection: Dict[str, Any],
+    source_db: Optional[str] = None,
+    duration_seconds: Optional[float] = None,
+    compressed_bytes: Optional[int] = None,
+) -> Dict[str, Any]:
+    """
+    Manifest dict from an archive scan (inspect_archive / scan_archive),
+    e.g. one taken from the dump stream while the archive was written.
+    """
+    namespaces = inspection["namespaces"]
+
+    if not source_db:
+        dbs = {ns["db"] for ns in namespaces if ns["db"]}
+        source_db = dbs.pop() if len(dbs) == 1 else None
+
+    collections = [
+        {
+            "name": ns["collection"],
+            "type": ns["type"],
+            "documents": ns["documents"],
+            "uncompressed_bytes": ns["bytes"],
+            "indexes": ns["indexes"],
+        }
+        for ns in namespaces
+    ]
+
+    manifest = {
+        "manifest_version": MANIFEST_VERSION,
+        "archive": os.path.basename(archive_file),
+        "source_db": source_db,
+        "created_at": datetime.datetime.now().isoformat(timespec="seconds"),
+        "duration_seconds": round(duration_seconds, 2) if duration_seconds is not None else None,
+        "server_version": inspection["header"].get("server_version"),
+        "tool_version": inspection["header"].get("tool_version"),
+        "collections": collections,
+        "total_documents": inspection["total_documents"],
+        "uncompressed_bytes": inspection["total_bytes"],
+        "compressed_bytes": compressed_bytes,
+    }
+    return manifest
+
+
+def write_manifest(archive_file: str, manifest: Dict[str, Any]) -> str:
+    """
+    Atomically write the sidecar manifest next to the archive. Returns its path.
+    (Next to an s3:// archive it is a single PUT, atomic by nature.)
+    """
+    path = manifest_path(archive_file)
+    if storage_service.is_remote(path):
+        backend, key = storage_service.get_storage(path)
+        backend.write_bytes(key, json.dumps(manifest, indent=2, default=str).encode("utf-8"))
+        return path
+
+    tmp_path = path + ".tmp"
+
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(manifest, f, indent=2, default=str)
+
+    os.replace(tmp_path, path)
+    return path
+
+
+def read_manifest(archive_file: str) -> Optional[Dict[str, Any]]:
+    """
+    Load the sidecar manifest for an archive, or None if missing/unreadable.
+    """
+    path = manifest_path(archive_file)
+    if storage_service.is_remote(path):
+        try:
+            backend, key = storage_service.get_storage(path)
+            return json.loads(backend.read_bytes(key))
+        except Exception:  # missing, unreachable or no boto3: same as no manifest
+            return None
+
+    if not os.path.isfile(path):
+        return None
+
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+def create_manifest(
+    archive_file: str,
+    source_db: Optional[str] = None,
+    duration_seconds: Optional[float] = None,
+) -> Dict[str, Any]:
+    """
+    Build and write the sidecar manifest for a finished archive.
+    """
+    result = build_manifest(archive_file, source_db, duration_seconds)
+    if not result.get("success"):
+        return result
+
+    try:
+        path = write_manifest(archive_file, result["manifest"])
+    except OSError as e:
+        return {"success": False, "error": f"Could not write manifest: {e}"}
+
+    return {"success": True, "manifest_file": path, "manifest": result["manifest"]}
+
+
+def verify_archive(archive_file: str) -> Dict[str, Any]:
+    """
+    Read an archive end to end (gzip CRC included) and, if it has a manifest,
+    check the per-collection document counts and compressed size against it.
+    Returns structured result; "mismatches" lists every disagreement.
+    """
+    inspection = inspect_archive(archive_file)
+    if not inspection.get("success"):
+        return inspection
+
+    manifest = read_manifest(archive_file)
+    mismatches = []
+
+    if manifest:
+        expected = {c["name"]: c["documents"] for c in manifest.get("collections", [])}
+        actual = {ns["collection"]: ns["documents"] for ns in inspection["namespaces"]}
+
+        for name in sorted(set(expected) | set(actual)):
+            if name not in expected:
+                mismatches.append(f"{name}: in archive but not in manifest")
+            elif name not in actual:
+                mismatches.append(f"{name}: in manifest but not in archive")
+            elif expected[name] != actual[name]:
+                mismatches.append(
+                    f"{name}: {actual[name]} documents, manifest says {expected[name]}"
+                )
+
+        size = storage_service.size(archive_file)
+        if manifest.get("compressed_bytes") not in (None, size):
+            mismatches.append(
+                f"archive is {size} bytes, manifest says {manifest['compressed_bytes']}"
+            )
+
+    result = {
+        "success": not mismatches,
+        "archive_file": archive_file,
+        "manifest_checked": manifest is not None,
+        "total_documents": inspection["total_documents"],
+        "total_bytes": inspection["total_bytes"],
+        "mismatches": mismatches,
+    }
+    if mismatches:
+        result["error"] = f"{len(mismatches)} mismatch(es) against manifest"
+    return result
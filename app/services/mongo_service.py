@@ -1,4 +1,16 @@
-from pymongo import MongoClient
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+from pymongo.errors import OperationFailure
+
+from .client_registry import pooled_client
+
+# Collections whose $collStats are fetched in one aggregate during discovery
+DISCOVERY_BATCH_SIZE = 100
+
+# Parallel $collStats calls when the server can't batch them
+DISCOVERY_WORKERS = 8
+
+_COLL_STATS = {"$collStats": {"storageStats": {}}}
 
 
 def get_collections(uri: str, db_name: str):
@@ -7,15 +19,169 @@ def get_collections(uri: str, db_name: str):
     """
 
     try:
-        client = MongoClient(uri)
-        db = client[db_name]
-
-        collections = db.list_collection_names()
-
-        client.close()
+        with pooled_client(uri) as client:
+            collections = client[db_name].list_collection_names()
 
         return sorted(collections)
 
     except Exception as e:
         print("Error fetching collections:", e)
         return []
+
+
+def _storage_stats(storage) -> dict:
+    return {
+        "documents": storage.get("count", 0),
+        "data_size": storage.get("size", 0),
+        "storage_size": storage.get("storageSize", 0),
+        "index_size": storage.get("totalIndexSize", 0),
+    }
+
+
+def collection_stats(db, name: str):
+    """
+    Document count plus data, storage and index sizes (bytes) for one
+    collection, all from a single $collStats call.
+    """
+    stats = next(db[name].aggregate([_COLL_STATS]), {})
+    return _storage_stats(stats.get("storageStats", {}))
+
+
+def batch_collection_stats(db, names):
+    """
+    collection_stats for several collections in one aggregate: $collStats
+    on the first, $unionWith a $collStats of each other one. Per-shard
+    rows of a sharded collection are summed. Raises OperationFailure if
+    the server can't run it (before 4.4, a view among `names`, ...).
+    """
+    pipeline = [_COLL_STATS] + [
+        {"$unionWith": {"coll": name, "pipeline": [_COLL_STATS]}} for name in names[1:]
+    ]
+
+    stats = {}
+    for row in db[names[0]].aggregate(pipeline):
+        name = row["ns"].split(".", 1)[1]
+        totals = stats.setdefault(name, dict.fromkeys(_storage_stats({}), 0))
+        for key, value in _storage_stats(row.get("storageStats", {})).items():
+            totals[key] += value
+    return stats
+
+
+def discover_collections(uri: str, db_name: str, on_names=None, on_stats=None,
+                         cancel_event=None, workers: int = DISCOVERY_WORKERS):
+    """
+    List a database's collections, then fetch their stats in batches of
+    DISCOVERY_BATCH_SIZE collections per aggregate (batch_collection_stats),
+    so a database costs a round trip per hundred collections, not per
+    collection. If the server can't batch, stats are fetched one collection
+    at a time on `workers` threads.
+
+    on_names(names) is called once with the sorted names as soon as they are
+    known; on_stats(name, stats) is called per collection as each result
+    arrives. Collections whose stats can't be read (views, permissions) are
+    reported with stats=None.
+    """
+    try:
+        with pooled_client(uri) as client:
+            db = client[db_name]
+
+            infos = list(db.list_collections())
+            names = sorted(info["name"] for info in infos)
+            if on_names:
+                on_names(names)
+
+            stats = {}
+
+            def report(name, result):
+                stats[name] = result
+                if on_stats:
+                    on_stats(name, result)
+
+            def cancelled():
+                return cancel_event is not None and cancel_event.is_set()
+
+            # Views and time-series buckets have no $collStats of their own
+            sized = sorted(
+                info["name"] for info in infos if info.get("type", "collection") == "collection"
+            )
+            for name in sorted(set(names) - set(sized)):
+                report(name, None)
+
+            remaining = sized
+            while remaining and not cancelled():
+                batch, rest = remaining[:DISCOVERY_BATCH_SIZE], remaining[DISCOVERY_BATCH_SIZE:]
+                try:
+                    batch_stats = batch_collection_stats(db, batch)
+                except OperationFailure:
+                    break  # fall back to one call per collection below
+                for name in batch:
+                    report(name, batch_stats.get(name))
+                remaining = rest
+
+            def fetch(name):
+                if cancelled():
+                    return name, None
+                try:
+                    return name, collection_stats(db, name)
+                except Exception:
+                    return name, None
+
+            if remaining and not cancelled():
+                with ThreadPoolExecutor(max_workers=max(1, workers)) as pool:
+                    futures = [pool.submit(fetch, name) for name in remaining]
+                    for future in as_completed(futures):
+                        report(*future.result())
+
+        if cancel_event is not None and cancel_event.is_set():
+            return {"success": False, "error": "Cancelled", "collections": names}
+
+        return {"success": True, "collections": names, "stats": stats}
+
+    except Exception as e:
+        return {"success": False, "error": str(e), "collections": []}
+
+
+def get_collection_sizes(uri: str, db_name: str, collections=None):
+    """
+    Uncompressed data size in bytes per collection, from $collStats.
+    Used to weight progress; collections that can't be sized are left out.
+    """
+    sizes = {}
+
+    try:
+        with pooled_client(uri) as client:
+            db = client[db_name]
+
+            names = collections if collections is not None else db.list_collection_names()
+
+            for name in names:
+                try:
+                    sizes[name] = collection_stats(db, name)["data_size"]
+                except Exception:
+                    continue
+
+    except Exception as e:
+        print("Error fetching collection sizes:", e)
+
+    return sizes
+
+
+def collection_uuids(uri: str, db_name: str):
+    """
+    The UUIDs of a database's collections. They are generated per
+    collection, so two URIs that list a shared UUID reach the same
+    database, however differently their hosts are spelled.
+    """
+    uuids = set()
+
+    try:
+        with pooled_client(uri) as client:
+            for info in client[db_name].list_collections():
+                uuid = info.get("info", {}).get("uuid")
+                if uuid is not None:
+                    uuids.add(uuid)
+
+    except Exception as e:
+        print("Error fetching collection UUIDs:", e)
+
+    return uuids
@@ -0,0 +1,296 @@
+import os
+import queue
+import threading
+import datetime
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Any, List
+
+from bson.codec_options import CodecOptions
+from bson.decimal128 import Decimal128
+from bson.int64 import Int64
+from bson.objectid import ObjectId
+from bson.raw_bson import RawBSONDocument
+from pymongo import ASCENDING, DESCENDING
+
+from .archive_writer import ArchiveWriter
+from .client_registry import acquire_client, release_client
+
+RAW_CODEC = CodecOptions(document_class=RawBSONDocument)
+
+# Raw bytes handed from a reader to the writer per queue item
+BLOCK_BYTES = 1024 * 1024
+
+# $sample ids drawn per partition when picking range boundaries
+SAMPLES_PER_PARTITION = 32
+
+# Collections smaller than this are never split
+MIN_DOCS_TO_SPLIT = 10000
+
+# _id types whose BSON ordering is a single comparable bracket
+_ID_BRACKETS = {
+    int: "number",
+    float: "number",
+    Int64: "number",
+    Decimal128: "number",
+    str: "string",
+    ObjectId: "objectId",
+    datetime.datetime: "date",
+}
+
+
+def _id_bracket(value):
+    return _ID_BRACKETS.get(type(value))
+
+
+def split_id_ranges(collection, partitions: int) -> List[Dict[str, Any]]:
+    """
+    Split a collection into `_id` range filters of roughly equal size.
+
+    Boundaries come from a server-side `$sample`, so no full scan is needed.
+    Falls back to a single unfiltered range when the collection is small or
+    its `_id` values span several BSON types (range operators only match
+    within one type bracket).
+    """
+    if partitions <= 1:
+        return [{}]
+
+    if collection.estimated_document_count() < max(MIN_DOCS_TO_SPLIT, partitions):
+        return [{}]
+
+    first = collection.find_one({}, {"_id": 1}, sort=[("_id", ASCENDING)])
+    last = collection.find_one({}, {"_id": 1}, sort=[("_id", DESCENDING)])
+    if not first or not last:
+        return [{}]
+
+    bracket = _id_bracket(first["_id"])
+    if bracket is None or bracket != _id_bracket(last["_id"]):
+        return [{}]
+
+    sampled = collection.aggregate(
+        [
+            {"$sample": {"size": partitions * SAMPLES_PER_PARTITION}},
+            {"$project": {"_id": 1}},
+            {"$sort": {"_id": 1}},
+        ],
+        allowDiskUse=True,
+    )
+    ids = [doc["_id"] for doc in sampled]
+
+    bounds = []
+    for i in range(1, partitions):
+        candidate = ids[len(ids) * i // partitions]
+        if not bounds or candidate != bounds[-1]:
+            bounds.append(candidate)
+
+    if not bounds:
+        return [{}]
+
+    ranges = [{"_id": {"$lt": bounds[0]}}]
+    for lower, upper in zip(bounds, bounds[1:]):
+        ranges.append({"_id": {"$gte": lower, "$lt": upper}})
+    ranges.append({"_id": {"$gte": bounds[-1]}})
+
+    return ranges
+
+
+def _collection_metadata(db, name: str, info: Dict[str, Any]) -> Dict[str, Any]:
+    indexes = []
+    for index in db[name].list_indexes():
+        spec = dict(index)
+        spec.pop("ns", None)
+        indexes.append(spec)
+
+    return {
+        "db": db.name,
+        "collection": name,
+        "type": "collection",
+        "indexes": indexes,
+        "options": info.get("options", {}),
+    }
+
+
+def _read_range(collection, id_filter, batch_size, out_queue, cancel_event):
+    """
+    Reader thread: stream one `_id` range as raw BSON chunks into the queue.
+    """
+    chunk, chunk_bytes = [], 0
+
+    try:
+        cursor = collection.find(id_filter, batch_size=batch_size)
+        if id_filter:
+            cursor = cursor.hint([("_id", ASCENDING)])
+
+        for doc in cursor:
+            if cancel_event.is_set():
+                cursor.close()
+                break
+
+            raw = doc.raw
+            chunk.append(raw)
+            chunk_bytes += len(raw)
+
+            if chunk_bytes >= BLOCK_BYTES:
+                out_queue.put((collection.name, chunk, None))
+                chunk, chunk_bytes = [], 0
+
+        if chunk:
+            out_queue.put((collection.name, chunk, None))
+
+    except Exception as e:
+        out_queue.put((collection.name, None, e))
+        return
+
+    out_queue.put((collection.name, None, None))  # range finished
+
+
+def _remove_partial(archive_file: str):
+    try:
+        os.remove(archive_file)
+    except OSError:
+        pass
+
+
+def dump_database(
+    uri: str,
+    db_name: str,
+    archive_file: str,
+    include_collections=None,
+    exclude_collections=None,
+    partitions: int = 4,
+    workers: int = 4,
+    batch_size: int = 1000,
+    progress_callback=None,
+    cancel_event=None,
+    codec=None,
+    level=None,
+    threads=None,
+) -> Dict[str, Any]:
+    """
+    Dump a database into a mongodump-compatible gzip archive with pymongo.
+
+    Every collection is split into `partitions` `_id` ranges and all ranges are
+    read by `workers` concurrent cursors, so one huge collection no longer
+    dumps on a single thread. A single writer interleaves the ranges into the
+    archive. `progress_callback(documents, bytes)` runs on the calling thread.
+    `codec`/`level`/`threads` select a multi-threaded compressor (ArchiveWriter).
+    Returns structured result.
+    """
+    include = set(include_collections or [])
+    exclude = set(exclude_collections or [])
+    cancel_event = cancel_event or threading.Event()
+
+    try:
+        client = acquire_client(uri)
+    except Exception as e:
+        return {"success": False, "error": str(e)}
+
+    try:
+        db = client[db_name]
+        server_version = client.server_info().get("version", "")
+
+        infos = {
+            info["name"]: info
+            for info in db.list_collections()
+            if info.get("type", "collection") == "collection"
+            and not info["name"].startswith("system.")
+        }
+        names = sorted(
+            name for name in infos
+            if (not include or name in include) and name not in exclude
+        )
+
+        namespaces = [_collection_metadata(db, name, infos[name]) for name in names]
+
+        raw_db = client.get_database(db_name, codec_options=RAW_CODEC)
+        tasks = []
+        for name in names:
+            for id_filter in split_id_ranges(db[name], partitions):
+                tasks.append((raw_db[name], id_filter))
+
+        pending = {name: 0 for name in names}
+        for collection, _ in tasks:
+            pending[collection.name] += 1
+
+        stats = {name: {"documents": 0, "bytes": 0} for name in names}
+        total_docs = total_bytes = 0
+
+        # Bounded so memory stays flat: at most ~2 chunks in flight per worker
+        chunks = queue.Queue(maxsize=max(2, workers * 2))
+
+        with ArchiveWriter(archive_file, level=level, codec=codec, threads=threads) as writer:
+            writer.write_prelude(
+                namespaces,
+                concurrent_collections=workers,
+                server_version=server_version,
+                tool_version="mongovault",
+            )
+
+            with ThreadPoolExecutor(max_workers=max(1, workers)) as pool:
+                for collection, id_filter in tasks:
+                    pool.submit(
+                        _read_range, collection, id_filter,
+                        batch_size, chunks, cancel_event,
+                    )
+
+                remaining = len(tasks)
+                error = None
+
+                try:
+                    while remaining:
+                        name, chunk, exc = chunks.get()
+
+                        if exc is not None:
+                            error = error or exc
+                            cancel_event.set()
+
+                        if chunk is None:
+                            remaining -= 1
+                            pending[name] -= 1
+                            if pending[name] == 0 and error is None:
+                                writer.end_namespace(db_name, name)
+                            continue
+
+                        if cancel_event.is_set():
+                            continue  # drain so readers can exit
+
+                        writer.write_block(db_name, name, chunk)
+
+                        chunk_bytes = sum(len(raw) for raw in chunk)
+                        stats[name]["documents"] += len(chunk)
+                        stats[name]["bytes"] += chunk_bytes
+                        total_docs += len(chunk)
+                        total_bytes += chunk_bytes
+
+                        if progress_callback:
+                            progress_callback(total_docs, total_bytes)
+                except BaseException:
+                    # The writer or the callback failed: stop the readers and
+                    # take their chunks until every range has ended, or they
+                    # block on the full queue and the pool never shuts down
+                    cancel_event.set()
+                    while remaining:
+                        if chunks.get()[1] is None:
+                            remaining -= 1
+                    raise
+
+        if error is not None or cancel_event.is_set():
+            _remove_partial(archive_file)
+            if error is not None:
+                return {"success": False, "error": f"Dump failed: {error}"}
+            return {"success": False, "error": "Cancelled"}
+
+        return {
+            "success": True,
+            "archive_file": archive_file,
+            "collections": stats,
+            "ranges": len(tasks),
+            "total_documents": total_docs,
+            "total_bytes": total_bytes,
+        }
+
+    except Exception as e:
+        _remove_partial(archive_file)
+        return {"success": False, "error": str(e)}
+
+    finally:
+        release_client(client)
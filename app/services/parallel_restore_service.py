@@ -0,0 +1,238 @@
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Any
+
+from bson.raw_bson import RawBSONDocument
+from pymongo.errors import BulkWriteError
+from pymongo.write_concern import WriteConcern
+
+from .archive_reader import iter_stream_documents, open_archive, read_prelude
+from .client_registry import acquire_client, release_client
+from .index_service import rebuild_indexes
+
+DEFAULT_BATCH_SIZE = 1000
+
+# Duplicate key errors are expected when appending into a populated collection
+DUPLICATE_KEY_CODE = 11000
+
+
+def _write_concern(w):
+    if isinstance(w, str) and w.isdigit():
+        w = int(w)
+    return WriteConcern(w=w)
+
+
+def _select_namespaces(namespaces, include, exclude):
+    return [
+        ns for ns in namespaces
+        if ns["collection"]
+        and ns["type"] == "collection"
+        and (not include or ns["collection"] in include)
+        and ns["collection"] not in exclude
+    ]
+
+
+def _insert_batch(collection, batch, stats, lock):
+    """
+    Insert worker: unordered insert_many of one batch of raw documents.
+    """
+    started = time.monotonic()
+    inserted = len(batch)
+    duplicates = 0
+
+    # pymongo refuses bypass_document_validation on unacknowledged writes
+    bypass = collection.write_concern.acknowledged
+
+    try:
+        collection.insert_many(batch, ordered=False, bypass_document_validation=bypass)
+    except BulkWriteError as e:
+        # Only duplicate keys are tolerated; a missed write concern is a failure
+        # even though every document may have been written
+        if e.details.get("writeConcernErrors"):
+            raise
+        errors = e.details.get("writeErrors", [])
+        duplicates = sum(1 for err in errors if err.get("code") == DUPLICATE_KEY_CODE)
+        if duplicates != len(errors):
+            raise
+        inserted = e.details.get("nInserted", len(batch) - duplicates)
+
+    finished = time.monotonic()
+    with lock:
+        col_stats = stats[collection.name]
+        col_stats["documents"] += inserted
+        col_stats["duplicates"] += duplicates
+        # Wall-clock window this collection was being loaded, across all workers
+        if col_stats["first_insert"] is None or started < col_stats["first_insert"]:
+            col_stats["first_insert"] = started
+        col_stats["last_insert"] = max(col_stats["last_insert"] or finished, finished)
+
+
+def restore_archive(
+    backup_file: str,
+    uri: str,
+    db_name: str,
+    include_collections=None,
+    exclude_collections=None,
+    drop: bool = True,
+    workers: int = 4,
+    batch_size: int = DEFAULT_BATCH_SIZE,
+    write_concern=1,
+    build_indexes: bool = True,
+    progress_callback=None,
+    cancel_event=None,
+    **storage_options,
+) -> Dict[str, Any]:
+    """
+    Restore an archive with pymongo instead of mongorestore.
+
+    Documents are streamed out of the archive and handed, `batch_size` at a
+    time, to `workers` threads doing unordered insert_many with the given
+    write concern. Secondary indexes are built only after all data is loaded,
+    or not at all with build_indexes=False (see index_service.rebuild_indexes).
+    `progress_callback(documents, bytes)` runs on the calling thread.
+    The archive is read in one pass, so an s3:// URL streams in with ranged
+    GETs (`storage_options`: part_size, concurrency).
+    Returns structured result with per-collection throughput.
+    """
+    include = set(include_collections or [])
+    exclude = set(exclude_collections or [])
+    cancel_event = cancel_event or threading.Event()
+
+    try:
+        stream = open_archive(backup_file, **storage_options)
+    except Exception as e:
+        return {"success": False, "error": f"Could not open {backup_file}: {e}"}
+
+    try:
+        _, namespaces = read_prelude(stream)
+    except Exception as e:
+        stream.close()
+        return {"success": False, "error": f"Invalid archive: {e}"}
+
+    selected = _select_namespaces(namespaces, include, exclude)
+    if not selected:
+        stream.close()
+        return {"success": False, "error": "No collections to restore."}
+
+    try:
+        client = acquire_client(uri)
+    except Exception as e:
+        stream.close()
+        return {"success": False, "error": str(e)}
+
+    started = time.monotonic()
+    wc = _write_concern(write_concern)
+
+    try:
+        db = client[db_name]
+        existing = set() if drop else set(db.list_collection_names())
+        collections = {}
+        stats = {}
+
+        for ns in selected:
+            name = ns["collection"]
+            if drop:
+                db.drop_collection(name)
+            if ns.get("options") and name not in existing:
+                db.create_collection(name, **ns["options"])
+            collections[name] = db.get_collection(name, write_concern=wc)
+            stats[name] = {
+                "documents": 0,
+                "bytes": 0,
+                "duplicates": 0,
+                "first_insert": None,
+                "last_insert": None,
+            }
+
+        source_db = selected[0]["db"]
+        wanted = [f"{ns['db']}.{ns['collection']}" for ns in selected]
+
+        lock = threading.Lock()
+        batches = {name: [] for name in collections}
+        total_docs = total_bytes = 0
+        errors = []
+
+        # Cap batches in flight so memory stays bounded by workers * batch_size
+        in_flight = threading.BoundedSemaphore(max(1, workers) * 2)
+
+        def on_done(future):
+            exc = future.exception()
+            if exc is not None:
+                errors.append(exc)
+                cancel_event.set()
+            in_flight.release()
+
+        def submit(pool, name):
+            in_flight.acquire()
+            future = pool.submit(_insert_batch, collections[name], batches[name], stats, lock)
+            future.add_done_callback(on_done)
+            batches[name] = []
+
+        with ThreadPoolExecutor(max_workers=max(1, workers)) as pool:
+            for db_src, name, raw in iter_stream_documents(stream, wanted):
+                if cancel_event.is_set():
+                    break
+                if db_src != source_db or name not in collections:
+                    continue
+
+                batches[name].append(RawBSONDocument(raw))
+                stats[name]["bytes"] += len(raw)
+                total_docs += 1
+                total_bytes += len(raw)
+
+                if len(batches[name]) >= batch_size:
+                    submit(pool, name)
+                    if progress_callback:
+                        progress_callback(total_docs, total_bytes)
+
+            if not cancel_event.is_set():
+                for name in collections:
+                    if batches[name]:
+                        submit(pool, name)
+
+        if errors:
+            return {"success": False, "error": f"Restore failed: {errors[0]}"}
+
+        if cancel_event.is_set():
+            return {"success": False, "error": "Cancelled"}
+
+        if progress_callback:
+            progress_callback(total_docs, total_bytes)
+
+        load_seconds = time.monotonic() - started
+
+        index_count = 0
+        if build_indexes:
+            indexes = rebuild_indexes(uri, db_name, selected, workers=workers)
+            if not indexes.get("success"):
+                return {"success": False, "error": f"Index build failed: {indexes.get('error')}"}
+            index_count = indexes["built"]
+
+        for col_stats in stats.values():
+            first = col_stats.pop("first_insert")
+            last = col_stats.pop("last_insert")
+            seconds = (last - first) if first is not None else 0.0
+            col_stats["seconds"] = round(seconds, 2)
+            col_stats["docs_per_sec"] = round(col_stats["documents"] / seconds, 1) if seconds else 0.0
+            col_stats["mb_per_sec"] = (
+                round(col_stats["bytes"] / seconds / (1024 * 1024), 2) if seconds else 0.0
+            )
+
+        return {
+            "success": True,
+            "collections": stats,
+            "total_documents": total_docs,
+            "total_bytes": total_bytes,
+            "duplicate_count": sum(s["duplicates"] for s in stats.values()),
+            "indexes_built": index_count,
+            "load_seconds": round(load_seconds, 2),
+            "duration_seconds": round(time.monotonic() - started, 2),
+        }
+
+    except Exception as e:
+        return {"success": False, "error": str(e)}
+
+    finally:
+        stream.close()
+        release_client(client)
@@ -0,0 +1,98 @@
+import re
+import time
+from typing import Dict, Optional
+
+# mongodump:    2024-05-01T10:00:00.000+0000  [####....]  shop.orders  1012/20000  (5.1%)
+# mongorestore: 2024-05-01T10:00:00.000+0000  [####....]  shop.orders  12.0MB/240MB  (5.0%)
+PROGRESS_RE = re.compile(r"\[[#.]+\]\s+(\S+)\s+(\S+)/\S+\s+\(\s*([\d.]+)%\)")
+
+# done dumping shop.orders (20000 documents)
+# finished restoring shop.orders (20000 documents, 0 failures)
+DONE_RE = re.compile(r"(?:done dumping|finished restoring)\s+(\S+)\s+\((\d+) documents?")
+
+
+def _collection_of(namespace: str) -> str:
+    return namespace.split(".", 1)[1] if "." in namespace else namespace
+
+
+def parse_progress_line(line: str):
+    """
+    Parse one mongodump/mongorestore line.
+    Returns (collection, fraction, documents) or None. fraction is 1.0 for
+    "done" lines; documents is None when the line counts bytes, not documents.
+    """
+    # Cheap substring checks first: most lines are neither kind
+    if "%)" not in line and "documents" not in line:
+        return None
+
+    match = DONE_RE.search(line)
+    if match:
+        return _collection_of(match.group(1)), 1.0, int(match.group(2))
+
+    match = PROGRESS_RE.search(line)
+    if match:
+        done = match.group(2)
+        documents = int(done) if done.isdigit() else None
+        fraction = min(float(match.group(3)) / 100, 1.0)
+        return _collection_of(match.group(1)), fraction, documents
+
+    return None
+
+
+class ProgressTracker:
+    """
+    Byte-weighted progress across collections.
+
+    Each collection contributes in proportion to its size, so finishing a
+    1 KB collection no longer moves the bar as much as a 100 GB one.
+    """
+
+    def __init__(self, sizes: Optional[Dict[str, int]] = None):
+        self.sizes = {name: max(int(size), 1) for name, size in (sizes or {}).items()}
+        self.total = sum(self.sizes.values())
+        self.fractions = {}
+        self.doc_counts = {}
+        self.start_time = time.time()
+
+    def feed(self, line: str) -> bool:
+        """Update from an output line. Returns True if progress changed."""
+        parsed = parse_progress_line(line)
+        if parsed is None:
+            return False
+
+        name, fraction, documents = parsed
+        if documents is not None:
+            self.doc_counts[name] = max(documents, self.doc_counts.get(name, 0))
+
+        if name not in self.sizes:
+            return False
+
+        if fraction <= self.fractions.get(name, 0.0):
+            return False
+
+        self.fractions[name] = fraction
+        return True
+
+    def fraction(self) -> float:
+        if self.total == 0:
+            return 0.0
+        done = sum(self.sizes[name] * f for name, f in self.fractions.items())
+        return min(done / self.total, 1.0)
+
+    def percent(self) -> int:
+        return int(self.fraction() * 100)
+
+    def bytes_done(self) -> int:
+        return int(self.fraction() * self.total)
+
+    def documents(self) -> int:
+        return sum(self.doc_counts.values())
+
+    def eta_seconds(self) -> Optional[float]:
+        fraction = self.fraction()
+        if fraction <= 0:
+            return None
+        if fraction >= 1:
+            return 0.0
+        elapsed = time.time() - self.start_time
+        return elapsed / fraction * (1 - fraction)
@@ -1,14 +1,18 @@
 import os
-from pymongo import MongoClient
 from pymongo.errors import ConnectionFailure, OperationFailure
+from .archive_reader import archive_namespaces, archive_source_db
+from .backup_set_service import is_backup_set, set_namespaces
+from .client_registry import pooled_client
+from . import storage_service
+from .compression_service import READ_CHUNK, decompress_stream, detect_format
+from .manifest_service import ARCHIVE_SUFFIXES, read_manifest
 
 
 def validate_restore_connection(uri: str, db_name: str):
     """Validate MongoDB connection using pymongo."""
     try:
-        client = MongoClient(uri, serverSelectionTimeoutMS=5000)
-        client[db_name].command("ping")
-        client.close()
+        with pooled_client(uri) as client:
+            client[db_name].command("ping")
         return {"success": True}
     except ConnectionFailure as e:
         return {"success": False, "error": f"Connection failed: {e}"}
@@ -18,47 +22,178 @@ def validate_restore_connection(uri: str, db_name: str):
         return {"success": False, "error": str(e)}
 
 
+def validate_backup_file(backup_file: str):
+    """Return an error string for an unusable backup file, or None."""
+    if not backup_file:
+        return "No backup file selected."
+
+    if is_backup_set(backup_file):
+        return None
+
+    if storage_service.is_remote(backup_file):
+        if not backup_file.endswith(ARCHIVE_SUFFIXES):
+            return "Invalid backup format — an s3:// backup must be a .archive.gz / .archive.zst object."
+        try:
+            found = storage_service.exists(backup_file)
+        except Exception as e:
+            return f"Could not reach {backup_file}: {e}"
+        return None if found else f"Backup object not found: {backup_file}"
+
+    if not os.path.isfile(backup_file):
+        return f"Backup file not found: {backup_file}"
+
+    if not backup_file.endswith(ARCHIVE_SUFFIXES):
+        return "Invalid backup format — select a .archive.gz / .archive.zst file or .backupset folder."
+
+    return None
+
+
+def _namespaces(backup_file: str):
+    if is_backup_set(backup_file):
+        return set_namespaces(backup_file)
+    return archive_namespaces(backup_file)
+
+
+def get_archive_collections(backup_file: str):
+    """
+    List the collection names stored in an archive or backup set.
+    Uses the sidecar manifest when present, otherwise reads the archive prelude.
+    """
+    manifest = read_manifest(backup_file)
+    if manifest and manifest.get("collections"):
+        return sorted(c["name"] for c in manifest["collections"])
+
+    return sorted(
+        ns["collection"] for ns in _namespaces(backup_file)
+        if ns["collection"]
+    )
+
+
+def get_archive_sizes(backup_file: str, include_collections=None, exclude_collections=None):
+    """
+    Uncompressed bytes per collection in an archive, for progress weighting.
+    Uses the sidecar manifest when present, otherwise the sizes in the prelude.
+    """
+    include = set(include_collections or [])
+    exclude = set(exclude_collections or [])
+
+    manifest = read_manifest(backup_file)
+    if manifest and manifest.get("collections"):
+        sizes = {c["name"]: c.get("uncompressed_bytes", 0) for c in manifest["collections"]}
+    else:
+        sizes = {
+            ns["collection"]: ns.get("size", 0)
+            for ns in _namespaces(backup_file)
+            if ns["collection"]
+        }
+
+    return {
+        name: size for name, size in sizes.items()
+        if (not include or name in include) and name not in exclude
+    }
+
+
+def _copy_stream(backup_file: str, sink, **storage_options) -> int:
+    total = 0
+    with storage_service.open_read(backup_file, **storage_options) as source:
+        for chunk in iter(lambda: source.read(READ_CHUNK), b""):
+            sink.write(chunk)
+            total += len(chunk)
+    return total
+
+
+def archive_feed(backup_file: str, threads=None, **storage_options):
+    """
+    For archives mongorestore can't read well itself (zstd, or our parallel
+    gzip, which we inflate on several threads), a stdin feed for
+    run_command / CommandWorker; None when mongorestore reads the file.
+    s3:// archives are always fed, streamed with parallel ranged GETs
+    (`storage_options`: part_size, concurrency, read_ahead); plain gzip is
+    passed through for mongorestore --gzip to inflate.
+    """
+    fmt = detect_format(backup_file)
+    if fmt in ("zstd", "gzip-indexed"):
+        return lambda stdin: decompress_stream(backup_file, stdin, threads, **storage_options)
+    if storage_service.is_remote(backup_file):
+        return lambda stdin: _copy_stream(backup_file, stdin, **storage_options)
+    return None
+
+
+def namespace_args(source_db: str, db_name: str, include_collections=None, exclude_collections=None):
+    """
+    mongorestore flags that rename {source_db}.* to {db_name}.* and keep only
+    the picked collections. Filters match the source namespace, before the
+    --nsFrom/--nsTo renaming.
+    """
+    args = [f"--nsFrom={source_db}.*", f"--nsTo={db_name}.*"]
+
+    for col in include_collections or []:
+        args.append(f"--nsInclude={source_db}.{col}")
+
+    for col in exclude_collections or []:
+        args.append(f"--nsExclude={source_db}.{col}")
+
+    return args
+
+
 def build_restore_command(
     backup_file: str,
     uri: str,
     db_name: str,
     drop: bool = True,
     parallel: int = 1,
+    include_collections=None,
+    exclude_collections=None,
+    defer_indexes: bool = False,
 ):
     """
-    Build the mongorestore command list for a native archive (.archive.gz).
+    Build the mongorestore command list for a native archive (.archive.gz / .archive.zst),
+    local or s3://. Archives that need archive_feed() are read from stdin.
+    `include_collections` / `exclude_collections` map to --nsInclude / --nsExclude
+    on the source namespace, so only the picked collections are read and written.
+    `defer_indexes` adds --noIndexRestore; rebuild them afterwards with
+    index_service.rebuild_indexes.
     Returns (command, error_string) — error_string is None on success.
     """
-    if not backup_file:
-        return None, "No backup file selected."
-
-    if not os.path.isfile(backup_file):
-        return None, f"Backup file not found: {backup_file}"
-
-    if not backup_file.endswith(".archive.gz"):
-        return None, "Invalid backup format — select a .archive.gz file."
+    error = validate_backup_file(backup_file)
+    if error:
+        return None, error
 
     if not uri or not db_name:
         return None, "URI and database name are required."
 
-    # Derive source DB name from the archive filename
-    # Convention: {db_name}_backup_{timestamp}.archive.gz
-    basename = os.path.basename(backup_file)
-    if "_backup_" in basename:
-        source_db = basename.split("_backup_")[0]
+    # Read the source DB name from the manifest or archive prelude, falling back to the
+    # filename convention: {db_name}_backup_{timestamp}.archive.gz
+    manifest = read_manifest(backup_file) or {}
+    source_db = manifest.get("source_db") or archive_source_db(backup_file)
+    if not source_db:
+        basename = os.path.basename(backup_file)
+        if "_backup_" in basename:
+            source_db = basename.split("_backup_")[0]
+        else:
+            source_db = db_name  # fallback: assume same DB name
+
+    fmt = detect_format(backup_file)
+    if fmt in ("zstd", "gzip-indexed"):
+        archive = ["--archive"]  # decompressed by us, see archive_feed
+    elif storage_service.is_remote(backup_file):
+        archive = ["--archive", "--gzip"] if fmt == "gzip" else ["--archive"]  # streamed by archive_feed
+    elif fmt == "gzip":
+        archive = [f"--archive={backup_file}", "--gzip"]
     else:
-        source_db = db_name  # fallback: assume same DB name
+        archive = [f"--archive={backup_file}"]
 
     command = [
         "mongorestore",
         "--uri", uri,
-        f"--archive={backup_file}",
-        "--gzip",
-        f"--nsFrom={source_db}.*",
-        f"--nsTo={db_name}.*",
+        *archive,
+        *namespace_args(source_db, db_name, include_collections, exclude_collections),
         f"--numParallelCollections={parallel}",
     ]
 
+    if defer_indexes:
+        command.append("--noIndexRestore")
+
     if drop:
         command.append("--drop")
 
@@ -1,10 +1,202 @@
 import os
+import json
+import sqlite3
+import datetime
+from typing import Dict, Any, List, Optional, Tuple
 
-def apply_retention_policy(directory: str, keep_last: int = 5):
-    backups = sorted(
-        [f for f in os.listdir(directory) if f.endswith(".tar.gz")],
-        reverse=True
+from .backup_set_service import is_backup_set, remove_backup_set
+from .catalog_service import catalog_databases, ensure_catalog, list_backups, mark_deleted
+from .manifest_service import manifest_path
+
+RETENTION_FILE = "retention.json"
+
+# Used for databases without their own rules (and without a retention.json)
+DEFAULT_POLICY = {"keep_last": 5}
+
+# Grandfather-father-son buckets: rule name -> bucket key of a backup time
+_BUCKETS = {
+    "daily": lambda t: t.date(),
+    "weekly": lambda t: t.isocalendar()[:2],
+    "monthly": lambda t: (t.year, t.month),
+    "yearly": lambda t: t.year,
+}
+
+_POLICY_KEYS = {"keep_last", "max_count", "max_bytes", *_BUCKETS}
+
+
+def validate_policy(policy: Dict[str, Any]) -> Dict[str, Any]:
+    """Reject unknown rules and negative counts. Returns the policy."""
+    unknown = set(policy) - _POLICY_KEYS
+    if unknown:
+        raise ValueError(f"unknown retention rule(s): {', '.join(sorted(unknown))}")
+    for key, value in policy.items():
+        if value is not None and (not isinstance(value, int) or value < 0):
+            raise ValueError(f"retention rule {key} must be a non-negative integer")
+    return policy
+
+
+def load_policies(backup_root: str) -> Dict[str, Any]:
+    """
+    Per-database rules from {backup_root}/retention.json:
+
+        {
+          "default":   {"keep_last": 3, "daily": 7, "weekly": 4, "monthly": 12},
+          "databases": {"shop": {"daily": 14, "yearly": 5, "max_bytes": 500000000000}}
+        }
+
+    Missing file means DEFAULT_POLICY for every database.
+    """
+    path = os.path.join(backup_root, RETENTION_FILE)
+    if not os.path.isfile(path):
+        return {"default": dict(DEFAULT_POLICY), "databases": {}}
+
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            config = json.load(f)
+    except (OSError, ValueError) as e:
+        raise ValueError(f"Could not read {path}: {e}")
+
+    policies = {
+        "default": validate_policy(config.get("default") or dict(DEFAULT_POLICY)),
+        "databases": {},
+    }
+    for db_name, policy in (config.get("databases") or {}).items():
+        policies["databases"][db_name] = validate_policy(policy)
+    return policies
+
+
+def policy_for(db_name: str, policies: Dict[str, Any]) -> Dict[str, Any]:
+    return policies["databases"].get(db_name, policies["default"])
+
+
+def plan_retention(entries: List[Dict[str, Any]], policy: Dict[str, Any]) -> Tuple[list, list]:
+    """
+    Split one database's catalog entries into (keep, expire).
+
+    An entry is kept if it is among the `keep_last` newest, or is the newest
+    entry of one of the newest N days / ISO weeks / months / years that have
+    backups (N from daily/weekly/monthly/yearly). `max_count` and `max_bytes`
+    (compressed) then trim the kept set from the oldest end. The newest
+    backup is always kept.
+    """
+    entries = sorted(entries, key=lambda e: e["created_at"], reverse=True)
+    if not entries:
+        return [], []
+
+    keep = set()
+
+    for i in range(min(policy.get("keep_last") or 0, len(entries))):
+        keep.add(i)
+
+    for rule, bucket_of in _BUCKETS.items():
+        limit = policy.get(rule) or 0
+        seen = set()
+        for i, entry in enumerate(entries):
+            if len(seen) >= limit:
+                break
+            bucket = bucket_of(datetime.datetime.fromisoformat(entry["created_at"]))
+            if bucket not in seen:
+                seen.add(bucket)
+                keep.add(i)  # newest first, so this is the bucket's newest backup
+
+    keep.add(0)
+
+    kept = sorted(keep)
+
+    if policy.get("max_count"):
+        kept = kept[: max(policy["max_count"], 1)]
+
+    if policy.get("max_bytes"):
+        total = 0
+        capped = []
+        for i in kept:
+            total += entries[i].get("compressed_bytes") or 0
+            if capped and total > policy["max_bytes"]:
+                break
+            capped.append(i)
+        kept = capped
+
+    kept_set = set(kept)
+    return (
+        [entries[i] for i in kept],
+        [e for i, e in enumerate(entries) if i not in kept_set],
     )
 
-    for old_file in backups[keep_last:]:
-        os.remove(os.path.join(directory, old_file))
+
+def _delete_archive(archive_file: str):
+    if is_backup_set(archive_file):
+        remove_backup_set(archive_file)
+    for path in (archive_file, manifest_path(archive_file)):
+        try:
+            os.remove(path)
+        except FileNotFoundError:
+            pass
+
+
+def apply_retention(
+    backup_root: str,
+    db_name: Optional[str] = None,
+    policy: Optional[Dict[str, Any]] = None,
+    dry_run: bool = False,
+) -> Dict[str, Any]:
+    """
+    Prune backups per database. `policy` overrides retention.json for every
+    database touched; `db_name` limits the run to one database.
+
+    Candidates come from the catalog, where pruned archives are marked
+    deleted, so each run reads only live backups and its cost tracks what
+    it keeps and deletes, not how many files are in the directory.
+    Returns structured result; with dry_run nothing is removed.
+    """
+    if not os.path.isdir(backup_root):
+        return {"success": True, "deleted": [], "kept": 0, "freed_bytes": 0}
+
+    try:
+        policies = None if policy is not None else load_policies(backup_root)
+        if policy is not None:
+            validate_policy(policy)
+    except ValueError as e:
+        return {"success": False, "error": str(e)}
+
+    # Retention manages the directory, so archives from before the catalog
+    # existed are backfilled and pruned too
+    try:
+        ensure_catalog(backup_root)
+    except (OSError, sqlite3.Error) as e:
+        return {"success": False, "error": f"Could not open catalog: {e}"}
+
+    databases = [db_name] if db_name else catalog_databases(backup_root)
+
+    deleted, errors = [], []
+    kept = freed = 0
+
+    for db in databases:
+        rules = policy if policy is not None else policy_for(db, policies)
+        keep, expire = plan_retention(list_backups(backup_root, db_name=db), rules)
+        kept += len(keep)
+
+        removed = []
+        for entry in expire:
+            if not dry_run:
+                try:
+                    _delete_archive(entry["archive_path"])
+                except OSError as e:
+                    errors.append(f"{entry['archive_path']}: {e}")
+                    continue
+            removed.append(entry["archive_path"])
+            freed += entry.get("compressed_bytes") or 0
+
+        if not dry_run:
+            mark_deleted(backup_root, removed)
+        deleted.extend(removed)
+
+    result = {
+        "success": not errors,
+        "deleted": deleted,
+        "kept": kept,
+        "freed_bytes": freed,
+        "dry_run": dry_run,
+    }
+    if errors:
+        result["error"] = f"Could not delete {len(errors)} archive(s): {errors[0]}"
+    return result
@@ -0,0 +1,426 @@
+import os
+import json
+import random
+import datetime
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Any, List, Optional
+
+from .backup_service import backup_database
+from .retention_service import apply_retention, validate_policy
+from .client_registry import cluster_key
+
+DEFAULT_MAX_CONCURRENT = 2
+DEFAULT_PER_CLUSTER_LIMIT = 1
+DEFAULT_JITTER_SECONDS = 0
+DEFAULT_STATE_FILE = "./backups/scheduler_state.json"
+
+# Longest the loop sleeps; bounds how late a job or a stop request is noticed
+MAX_SLEEP_SECONDS = 30
+
+_CRON_FIELDS = (
+    ("minute", 0, 59),
+    ("hour", 0, 23),
+    ("day", 1, 31),
+    ("month", 1, 12),
+    ("weekday", 0, 7),  # 0 and 7 are both Sunday
+)
+
+
+# -----------------------------
+# Cron
+# -----------------------------
+
+def _parse_cron_field(text: str, low: int, high: int, name: str) -> set:
+    values = set()
+
+    for part in text.split(","):
+        step = 1
+        if "/" in part:
+            part, step_text = part.split("/", 1)
+            step = int(step_text)
+            if step < 1:
+                raise ValueError(f"cron {name}: step must be positive")
+
+        if part == "*":
+            start, end = low, high
+        elif "-" in part:
+            start_text, end_text = part.split("-", 1)
+            start, end = int(start_text), int(end_text)
+        else:
+            start = int(part)
+            end = high if step > 1 else start
+
+        if not (low <= start <= high and low <= end <= high and start <= end):
+            raise ValueError(f"cron {name}: {part!r} outside {low}-{high}")
+
+        values.update(range(start, end + 1, step))
+
+    if name == "weekday":
+        values = {v % 7 for v in values}
+
+    return values
+
+
+class CronSchedule:
+    """
+    Standard 5-field cron expression: minute hour day month weekday.
+    Supports *, lists, ranges and steps. As in cron, when both day and
+    weekday are restricted a time matches if either one does.
+    """
+
+    def __init__(self, expression: str):
+        fields = expression.split()
+        if len(fields) != 5:
+            raise ValueError(f"cron expression needs 5 fields: {expression!r}")
+
+        self.expression = expression
+        parsed = [
+            _parse_cron_field(text, low, high, name)
+            for text, (name, low, high) in zip(fields, _CRON_FIELDS)
+        ]
+        self.minutes, self.hours, self.days, self.months, self.weekdays = parsed
+        self._any_day = fields[2] == "*"
+        self._any_weekday = fields[4] == "*"
+
+    def _day_matches(self, dt: datetime.datetime) -> bool:
+        day_ok = dt.day in self.days
+        weekday_ok = (dt.isoweekday() % 7) in self.weekdays
+        if self._any_day or self._any_weekday:
+            return day_ok and weekday_ok
+        return day_ok or weekday_ok
+
+    def next_after(self, after: datetime.datetime) -> datetime.datetime:
+        """First matching minute strictly after `after`."""
+        dt = after.replace(second=0, microsecond=0) + datetime.timedelta(minutes=1)
+        limit = dt + datetime.timedelta(days=366 * 5)
+
+        # Jump whole months/days/hours at a time, so this is a few hundred steps at most
+        while dt < limit:
+            if dt.month not in self.months:
+                year, month = (dt.year + 1, 1) if dt.month == 12 else (dt.year, dt.month + 1)
+                dt = dt.replace(year=year, month=month, day=1, hour=0, minute=0)
+                continue
+            if not self._day_matches(dt):
+                dt = (dt + datetime.timedelta(days=1)).replace(hour=0, minute=0)
+                continue
+            if dt.hour not in self.hours:
+                dt = (dt + datetime.timedelta(hours=1)).replace(minute=0)
+                continue
+            if dt.minute not in self.minutes:
+                dt += datetime.timedelta(minutes=1)
+                continue
+            return dt
+
+        raise ValueError(f"cron expression never fires: {self.expression!r}")
+
+
+class IntervalSchedule:
+    def __init__(self, minutes: float):
+        if minutes <= 0:
+            raise ValueError("interval_minutes must be positive")
+        self.interval = datetime.timedelta(minutes=minutes)
+
+    def next_after(self, after: datetime.datetime) -> datetime.datetime:
+        return after + self.interval
+
+
+# -----------------------------
+# Config
+# -----------------------------
+
+def load_schedule(path: str) -> Dict[str, Any]:
+    """
+    Read and validate a scheduler config (JSON). Raises ValueError on bad input.
+
+    {
+      "max_concurrent": 2, "per_cluster_limit": 1, "jitter_seconds": 300,
+      "state_file": "./backups/scheduler_state.json",
+      "jobs": [
+        {"name": "shop-nightly", "uri": "mongodb://...", "db": "shop",
+         "cron": "0 2 * * *", "backup_root": "./backups",
+         "retention": {"daily": 7, "weekly": 4, "monthly": 12}},
+        {"name": "billing-hourly", "uri": "...", "db": "billing", "interval_minutes": 60}
+      ]
+    }
+
+    A job's "uri" may be omitted to use $MONGOVAULT_URI.
+    """
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            config = json.load(f)
+    except (OSError, ValueError) as e:
+        raise ValueError(f"Could not read schedule {path}: {e}")
+
+    jobs = config.get("jobs") or []
+    if not jobs:
+        raise ValueError("schedule has no jobs")
+
+    names = set()
+    for job in jobs:
+        name = job.get("name") or job.get("db")
+        if not name:
+            raise ValueError("every job needs a name or db")
+        if name in names:
+            raise ValueError(f"duplicate job name: {name}")
+        names.add(name)
+
+        job["name"] = name
+        job["uri"] = job.get("uri") or os.environ.get("MONGOVAULT_URI")
+        if not job["uri"] or not job.get("db"):
+            raise ValueError(f"job {name}: uri and db are required")
+
+        if ("cron" in job) == ("interval_minutes" in job):
+            raise ValueError(f"job {name}: set exactly one of cron / interval_minutes")
+        job["schedule"] = (
+            CronSchedule(job["cron"]) if "cron" in job
+            else IntervalSchedule(float(job["interval_minutes"]))
+        )
+        job["cluster"] = cluster_key(job["uri"])
+
+        # Per-job GFS rules; a bare keep_last is shorthand for {"keep_last": N}.
+        # Without either, the backup directory's retention.json applies.
+        if "keep_last" in job and "retention" not in job:
+            job["retention"] = {"keep_last": job["keep_last"]}
+        if job.get("retention") is not None:
+            validate_policy(job["retention"])
+
+    config["jobs"] = jobs
+    return config
+
+
+# -----------------------------
+# Scheduler
+# -----------------------------
+
+class BackupScheduler:
+    """
+    Runs backup jobs on their schedules.
+
+    - At most `max_concurrent` jobs run at once, and at most
+      `per_cluster_limit` against the same cluster; due jobs over either
+      limit wait their turn instead of being dropped.
+    - Each run is delayed by a random 0..jitter_seconds, seeded by job and
+      slot so a restart picks the same delay.
+    - A slot that comes due while the job's previous run is still queued or
+      running is skipped.
+    - A due slot is written to the state file as soon as it is queued, so a
+      restart never runs the same slot twice; a run still waiting for
+      capacity is kept as "pending_slot" and queued again after a restart.
+    """
+
+    def __init__(self, config: Dict[str, Any], on_event=None,
+                 backup_func=backup_database, retention_func=apply_retention):
+        self.jobs = {job["name"]: job for job in config["jobs"]}
+        self.max_concurrent = max(1, int(config.get("max_concurrent", DEFAULT_MAX_CONCURRENT)))
+        self.per_cluster_limit = max(1, int(config.get("per_cluster_limit", DEFAULT_PER_CLUSTER_LIMIT)))
+        self.jitter_seconds = max(0, int(config.get("jitter_seconds", DEFAULT_JITTER_SECONDS)))
+        self.state_file = config.get("state_file", DEFAULT_STATE_FILE)
+        self.on_event = on_event  # called with a dict per started/finished/skipped run
+        self.backup_func = backup_func
+        self.retention_func = retention_func
+
+        self._lock = threading.Lock()
+        self._pool = ThreadPoolExecutor(max_workers=self.max_concurrent)
+        self._queue: List[str] = []     # due jobs waiting for capacity, oldest first
+        self._running: Dict[str, str] = {}  # job name -> cluster
+        self._wake = threading.Event()
+        self.state = self._load_state()
+
+    # ── State ────────────────────────────────────────────────────────────
+
+    def _load_state(self) -> Dict[str, Any]:
+        try:
+            with open(self.state_file, "r", encoding="utf-8") as f:
+                state = json.load(f)
+        except (OSError, ValueError):
+            state = {}
+
+        # Drop jobs removed from the config
+        return {name: entry for name, entry in state.items() if name in self.jobs}
+
+    def _save_state(self):
+        directory = os.path.dirname(self.state_file)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+        tmp_path = self.state_file + ".tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(self.state, f, indent=2, default=str)
+        os.replace(tmp_path, self.state_file)
+
+    def _emit(self, event: Dict[str, Any]):
+        if self.on_event:
+            self.on_event(event)
+
+    # ── Timing ───────────────────────────────────────────────────────────
+
+    def _jitter(self, name: str, slot: datetime.datetime) -> datetime.timedelta:
+        if not self.jitter_seconds:
+            return datetime.timedelta(0)
+        rng = random.Random(f"{name}:{slot.isoformat()}")
+        return datetime.timedelta(seconds=rng.uniform(0, self.jitter_seconds))
+
+    def _next_slot(self, name: str, now: datetime.datetime) -> datetime.datetime:
+        job = self.jobs[name]
+        spec = job.get("cron") or f"every {job.get('interval_minutes')} min"
+
+        entry = self.state.setdefault(name, {})
+        if entry.get("schedule") != spec:
+            entry.pop("next_slot", None)  # schedule edited since the last run
+            entry["schedule"] = spec
+
+        if entry.get("next_slot"):
+            return datetime.datetime.fromisoformat(entry["next_slot"])
+
+        # First sight of this job: schedule from its last slot, or from now
+        base = entry.get("last_slot")
+        after = datetime.datetime.fromisoformat(base) if base else now
+        slot = job["schedule"].next_after(after)
+        entry["next_slot"] = slot.isoformat()
+        return slot
+
+    def due_at(self, name: str, now: datetime.datetime) -> datetime.datetime:
+        slot = self._next_slot(name, now)
+        return slot + self._jitter(name, slot)
+
+    # ── Loop ─────────────────────────────────────────────────────────────
+
+    def tick(self, now: Optional[datetime.datetime] = None) -> datetime.datetime:
+        """
+        Queue due jobs and start whatever fits under the limits.
+        Returns when the next job becomes due.
+        """
+        now = now or datetime.datetime.now()
+
+        with self._lock:
+            for name, job in self.jobs.items():
+                slot = self._next_slot(name, now)
+                if slot + self._jitter(name, slot) > now:
+                    continue
+
+                # Slots missed while the daemon was down collapse into this one run
+                entry = self.state[name]
+                entry["last_slot"] = slot.isoformat()
+                entry["next_slot"] = job["schedule"].next_after(now).isoformat()
+
+                if name in self._running or name in self._queue:
+                    entry["last_status"] = "skipped"
+                    self._emit({"event": "skipped", "job": name, "slot": slot.isoformat(),
+                                "reason": "previous run still in progress"})
+                else:
+                    self._queue.append(name)
+                    entry["pending_slot"] = slot.isoformat()
+
+            # Persist the consumed slots (and the queue) before anything starts
+            self._save_state()
+            if self._start_queued():
+                self._save_state()
+
+            return min(self.due_at(name, now) for name in self.jobs)
+
+    def _start_queued(self) -> int:
+        started = 0
+        for name in list(self._queue):
+            if len(self._running) >= self.max_concurrent:
+                break
+
+            cluster = self.jobs[name]["cluster"]
+            on_cluster = sum(1 for c in self._running.values() if c == cluster)
+            if on_cluster >= self.per_cluster_limit:
+                continue  # leave it queued; a later job on another cluster may fit
+
+            self._queue.remove(name)
+            self._running[name] = cluster
+
+            entry = self.state[name]
+            slot = entry.pop("pending_slot", entry.get("last_slot"))
+            entry["running"] = True
+            entry["started_at"] = datetime.datetime.now().isoformat(timespec="seconds")
+            self._emit({"event": "started", "job": name, "slot": slot})
+
+            self._pool.submit(self._run_job, name)
+            started += 1
+
+        return started
+
+    def _run_job(self, name: str):
+        job = self.jobs[name]
+
+        try:
+            result = self.backup_func(
+                job["uri"],
+                job["db"],
+                job.get("backup_root", "./backups"),
+                parallel=job.get("parallel", 1),
+                include_collections=job.get("include"),
+                exclude_collections=job.get("exclude"),
+                engine=job.get("engine", "mongodump"),
+                compression=job.get("compression"),
+                compression_level=job.get("compression_level"),
+                compression_threads=job.get("compression_threads"),
+                mirror_dirs=job.get("mirror_dirs"),
+                part_size=(job.get("part_size_mb") or 0) * 1024 * 1024 or None,
+                transfer_concurrency=job.get("transfer_concurrency"),
+            )
+        except Exception as e:
+            result = {"success": False, "error": str(e)}
+
+        if result.get("success"):
+            try:
+                retention = self.retention_func(
+                    job.get("backup_root", "./backups"),
+                    db_name=job["db"],
+                    policy=job.get("retention"),
+                )
+                result["deleted"] = retention.get("deleted", [])
+                if not retention.get("success"):
+                    result["retention_error"] = retention.get("error")
+            except Exception as e:
+                result["retention_error"] = str(e)
+
+        if result.get("success"):
+            result.pop("output", None)
+
+        with self._lock:
+            self._running.pop(name, None)
+            entry = self.state[name]
+            entry["running"] = False
+            entry["last_status"] = "success" if result.get("success") else "failed"
+            entry["finished_at"] = datetime.datetime.now().isoformat(timespec="seconds")
+            entry["last_error"] = result.get("error")
+            entry["last_backup_file"] = result.get("backup_file")
+
+            # Before the next job's "started", so the event log reads in order
+            self._emit({"event": "finished", "job": name, **result})
+
+            self._start_queued()
+            self._save_state()
+
+        self._wake.set()
+
+    def run_forever(self, stop_event: threading.Event):
+        """Loop until stop_event is set, then wait for running jobs."""
+        # Runs interrupted by a crash or kill are recorded, not repeated;
+        # runs that never got to start are queued again, oldest first
+        with self._lock:
+            for entry in self.state.values():
+                if entry.pop("running", False):
+                    entry["last_status"] = "interrupted"
+            self._queue = sorted(
+                (name for name, entry in self.state.items() if entry.get("pending_slot")),
+                key=lambda name: self.state[name]["pending_slot"],
+            )
+
+        while not stop_event.is_set():
+            next_due = self.tick()
+            wait = (next_due - datetime.datetime.now()).total_seconds()
+            self._wake.wait(min(max(wait, 0.5), MAX_SLEEP_SECONDS))
+            self._wake.clear()
+
+        with self._lock:
+            self._queue.clear()
+        self._pool.shutdown(wait=True)
+
+    def stop(self):
+        self._wake.set()
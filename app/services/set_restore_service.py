@@ -0,0 +1,182 @@
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from typing import Dict, Any
+
+from .backup_set_service import is_backup_set, set_segments, terminate_on_cancel
+from .command_runner import run_command
+from .parallel_restore_service import restore_archive
+from .restore_service import archive_feed, build_restore_command
+
+# Concurrent mongorestore processes (or native segment restores)
+DEFAULT_PROCESSES = 4
+
+
+def _wanted(collections, include, exclude):
+    return [
+        name for name in collections
+        if (not include or name in include) and name not in exclude
+    ]
+
+
+def _restore_segment(segment, wanted, uri, db_name, options, on_start, cancel_event):
+    """
+    Worker: restore one segment. Only the wanted collections are passed as
+    filters, and only when the segment holds others too.
+    """
+    if cancel_event.is_set():
+        return {"success": False, "file": segment["file"], "error": "Cancelled"}
+
+    include = wanted if len(wanted) < len(segment["collections"]) else []
+    started = time.monotonic()
+
+    if options["engine"] == "native":
+        result = restore_archive(
+            segment["path"],
+            uri,
+            db_name,
+            include_collections=include,
+            drop=options["drop"],
+            workers=options["parallel"],
+            batch_size=options["batch_size"],
+            write_concern=options["write_concern"],
+            build_indexes=not options["defer_indexes"],
+            cancel_event=cancel_event,
+        )
+    else:
+        command, error = build_restore_command(
+            segment["path"],
+            uri,
+            db_name,
+            drop=options["drop"],
+            parallel=options["parallel"],
+            include_collections=include,
+            defer_indexes=options["defer_indexes"],
+        )
+        if error:
+            return {"success": False, "file": segment["file"], "error": error}
+        result = run_command(command, on_start=on_start, stdin_feed=archive_feed(segment["path"]))
+        if not result.get("success"):
+            result.setdefault("error", f"mongorestore exited with {result.get('return_code')}")
+
+    if cancel_event.is_set() and not result.get("success"):
+        result["error"] = "Cancelled"
+
+    result["file"] = segment["file"]
+    result["collections"] = wanted
+    result["seconds"] = round(time.monotonic() - started, 2)
+    return result
+
+
+def restore_backup_set(
+    set_dir: str,
+    uri: str,
+    db_name: str,
+    include_collections=None,
+    exclude_collections=None,
+    drop: bool = True,
+    processes: int = DEFAULT_PROCESSES,
+    parallel: int = 1,
+    defer_indexes: bool = False,
+    engine: str = "mongorestore",
+    batch_size: int = 1000,
+    write_concern=1,
+    progress_callback=None,
+    cancel_event=None,
+) -> Dict[str, Any]:
+    """
+    Restore a backup set with `processes` segments in flight at once.
+
+    Each segment is its own gzip stream, so every mongorestore process (or
+    native restore, with engine="native") decompresses on its own core:
+    throughput scales with cores and disks instead of one gunzip stream.
+    Segments go largest first. `parallel` is mongorestore's
+    --numParallelCollections (native: insert workers) per segment.
+    `progress_callback(done_bytes, total_bytes)` counts compressed bytes of
+    finished segments. Returns structured result.
+    """
+    if not is_backup_set(set_dir):
+        return {"success": False, "error": f"Not a backup set: {set_dir}"}
+
+    include = set(include_collections or [])
+    exclude = set(exclude_collections or [])
+    cancel_event = cancel_event or threading.Event()
+
+    try:
+        segments = set_segments(set_dir)
+    except Exception as e:
+        return {"success": False, "error": f"Invalid backup set: {e}"}
+
+    work = [
+        (segment, _wanted(segment["collections"], include, exclude))
+        for segment in sorted(segments, key=lambda s: -s["compressed_bytes"])
+    ]
+    work = [(segment, wanted) for segment, wanted in work if wanted]
+    if not work:
+        return {"success": False, "error": "No collections to restore."}
+
+    options = {
+        "engine": engine,
+        "drop": drop,
+        "parallel": parallel,
+        "defer_indexes": defer_indexes,
+        "batch_size": batch_size,
+        "write_concern": write_concern,
+    }
+
+    total_bytes = sum(segment["compressed_bytes"] for segment, _ in work)
+    done_bytes = 0
+    results = []
+    started = time.monotonic()
+
+    lock = threading.Lock()
+    running = set()
+    finished = threading.Event()
+
+    def on_start(process):
+        with lock:
+            running.add(process)
+
+    threading.Thread(
+        target=terminate_on_cancel, args=(cancel_event, finished, running, lock), daemon=True
+    ).start()
+
+    try:
+        with ThreadPoolExecutor(max_workers=max(1, min(processes, len(work)))) as pool:
+            futures = {
+                pool.submit(
+                    _restore_segment, segment, wanted, uri, db_name,
+                    options, on_start, cancel_event,
+                ): segment
+                for segment, wanted in work
+            }
+            for future in as_completed(futures):
+                result = future.result()
+                results.append(result)
+                if not result.get("success"):
+                    cancel_event.set()  # fail fast; other segments are stopped
+
+                done_bytes += futures[future]["compressed_bytes"]
+                if progress_callback:
+                    progress_callback(done_bytes, total_bytes)
+    finally:
+        finished.set()
+
+    failed = [r for r in results if not r.get("success")]
+    summary = {
+        "success": not failed,
+        "segments": len(work),
+        "processes": max(1, min(processes, len(work))),
+        "duration_seconds": round(time.monotonic() - started, 2),
+        "duplicate_count": sum(r.get("duplicate_count", 0) for r in results),
+        "index_conflicts": sum(r.get("index_conflicts", 0) for r in results),
+        "segment_results": [
+            {k: r.get(k) for k in ("file", "success", "seconds", "collections", "error") if k in r}
+            for r in sorted(results, key=lambda r: r["file"])
+        ],
+    }
+    if failed:
+        first = next((r for r in failed if r.get("error") != "Cancelled"), failed[0])
+        summary["error"] = f"{first['file']}: {first.get('error')}"
+        summary["output"] = first.get("output", "")
+    return summary
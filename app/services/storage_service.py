@@ -0,0 +1,427 @@
+import abc
+import io
+import os
+import threading
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from typing import Optional, Tuple
+
+try:
+    import boto3
+    from botocore.config import Config as BotoConfig
+except ImportError:  # object storage is optional; local paths always work
+    boto3 = None
+
+S3_SCHEME = "s3://"
+
+# Endpoint of an S3-compatible store (MinIO, Ceph, R2, ...); unset means AWS.
+# Credentials come from the usual AWS_* variables / profiles.
+S3_ENDPOINT_ENV = "MONGOVAULT_S3_ENDPOINT"
+
+# Multipart part / ranged GET size, and requests in flight per transfer
+DEFAULT_PART_BYTES = 16 * 1024 * 1024
+DEFAULT_CONCURRENCY = 8
+
+# S3 rejects parts under 5 MB (except the last) and uploads over 10,000 parts.
+# The size of a streamed upload isn't known up front, so parts double in
+# size every 1,000 parts past the 5,000th: 16 MB parts reach ~1 TB.
+MIN_PART_BYTES = 5 * 1024 * 1024
+_PART_DOUBLING_START = 5000
+_PART_DOUBLING_EVERY = 1000
+
+
+def is_remote(path: str) -> bool:
+    return isinstance(path, str) and path.startswith(S3_SCHEME)
+
+
+def _require_boto3():
+    if boto3 is None:
+        raise RuntimeError("s3:// paths need the 'boto3' package (pip install boto3)")
+
+
+class StorageBackend(abc.ABC):
+    """
+    Where archives live. Keys are backend-relative names; every method
+    that moves archive data streams it, so nothing is staged locally.
+    """
+
+    @abc.abstractmethod
+    def open_read(self, key: str):
+        """Binary reader over the object."""
+
+    @abc.abstractmethod
+    def open_write(self, key: str):
+        """Binary writer; the object exists once close() returns. abort() discards it."""
+
+    @abc.abstractmethod
+    def read_range(self, key: str, start: int, length: int) -> bytes:
+        pass
+
+    @abc.abstractmethod
+    def size(self, key: str) -> int:
+        pass
+
+    @abc.abstractmethod
+    def exists(self, key: str) -> bool:
+        pass
+
+    @abc.abstractmethod
+    def delete(self, key: str):
+        pass
+
+    def read_bytes(self, key: str) -> bytes:
+        with self.open_read(key) as f:
+            return f.read()
+
+    def write_bytes(self, key: str, data: bytes):
+        with self.open_write(key) as f:
+            f.write(data)
+
+
+# -----------------------------
+# Local filesystem
+# -----------------------------
+
+class _LocalWriter(io.FileIO):
+    def abort(self):
+        self.close()
+        os.remove(self.name)
+
+
+class LocalStorage(StorageBackend):
+    """Plain files; keys are paths."""
+
+    def open_read(self, key: str):
+        return open(key, "rb")
+
+    def open_write(self, key: str):
+        parent = os.path.dirname(key)
+        if parent:
+            os.makedirs(parent, exist_ok=True)
+        return _LocalWriter(key, "wb")
+
+    def read_range(self, key: str, start: int, length: int) -> bytes:
+        with open(key, "rb") as f:
+            f.seek(start)
+            return f.read(length)
+
+    def size(self, key: str) -> int:
+        return os.path.getsize(key)
+
+    def exists(self, key: str) -> bool:
+        return os.path.isfile(key)
+
+    def delete(self, key: str):
+        if os.path.exists(key):
+            os.remove(key)
+
+
+# -----------------------------
+# S3-compatible object storage
+# -----------------------------
+
+class S3MultipartWriter(io.RawIOBase):
+    """
+    Streams into a multipart upload: every `part_size` bytes become a part
+    uploaded on a thread pool, with at most `concurrency` parts in flight
+    (a slow store slows the writer instead of growing memory). close()
+    completes the upload; any failure aborts it so no parts are left behind.
+    """
+
+    def __init__(self, client, bucket: str, key: str, part_size: int, concurrency: int):
+        super().__init__()
+        self._client = client
+        self._bucket = bucket
+        self._key = key
+        self._part_size = max(MIN_PART_BYTES, part_size)
+        self._concurrency = max(1, concurrency)
+        self._upload_id = client.create_multipart_upload(Bucket=bucket, Key=key)["UploadId"]
+        self._pool = ThreadPoolExecutor(max_workers=self._concurrency)
+        self._pending = deque()
+        self._parts = []
+        self._buffer = bytearray()
+        self._next_part = 1
+        self.bytes_written = 0
+
+    def writable(self):
+        return True
+
+    def _current_part_size(self) -> int:
+        if self._next_part <= _PART_DOUBLING_START:
+            return self._part_size
+        doublings = (self._next_part - _PART_DOUBLING_START - 1) // _PART_DOUBLING_EVERY + 1
+        return self._part_size << doublings
+
+    def write(self, data) -> int:
+        try:
+            self._buffer += data
+            part_size = self._current_part_size()
+            while len(self._buffer) >= part_size:
+                self._submit(bytes(self._buffer[:part_size]))
+                del self._buffer[:part_size]
+                part_size = self._current_part_size()
+        except Exception:
+            self._abort_after_error()
+            raise
+        self.bytes_written += len(data)
+        return len(data)
+
+    def _upload_part(self, number: int, body: bytes):
+        response = self._client.upload_part(
+            Bucket=self._bucket, Key=self._key, UploadId=self._upload_id,
+            PartNumber=number, Body=body,
+        )
+        return {"PartNumber": number, "ETag": response["ETag"]}
+
+    def _submit(self, body: bytes):
+        if len(self._pending) >= self._concurrency:
+            self._parts.append(self._pending.popleft().result())
+        self._pending.append(self._pool.submit(self._upload_part, self._next_part, body))
+        self._next_part += 1
+
+    def _abort_after_error(self):
+        try:
+            self.abort()
+        except Exception:
+            pass  # the original error is the one worth reporting
+
+    def abort(self):
+        if self.closed:
+            return
+        self._pool.shutdown(cancel_futures=True)
+        try:
+            self._client.abort_multipart_upload(
+                Bucket=self._bucket, Key=self._key, UploadId=self._upload_id
+            )
+        finally:
+            super().close()
+
+    def close(self):
+        if self.closed:
+            return
+        try:
+            if self._buffer or self._next_part == 1:
+                self._submit(bytes(self._buffer))  # last part may be short (or empty)
+                self._buffer.clear()
+            while self._pending:
+                self._parts.append(self._pending.popleft().result())
+            self._client.complete_multipart_upload(
+                Bucket=self._bucket, Key=self._key, UploadId=self._upload_id,
+                MultipartUpload={"Parts": self._parts},
+            )
+        except Exception:
+            self._abort_after_error()
+            raise
+        self._pool.shutdown()
+        super().close()
+
+
+class S3RangedReader(io.RawIOBase):
+    """
+    Reads an object as parallel ranged GETs of `part_size` bytes, returned
+    in order. The read-ahead window starts at one range and doubles up to
+    `read_ahead` ranges as the consumer keeps up, so reading just the head
+    of a large archive fetches little.
+    """
+
+    def __init__(self, client, bucket: str, key: str, part_size: int, concurrency: int,
+                 read_ahead: Optional[int] = None):
+        super().__init__()
+        self._client = client
+        self._bucket = bucket
+        self._key = key
+        self._part_size = max(1, part_size)
+        self._size = client.head_object(Bucket=bucket, Key=key)["ContentLength"]
+        self._read_ahead = max(1, read_ahead or concurrency * 2)
+        self._window = 1
+        self._pool = ThreadPoolExecutor(max_workers=max(1, concurrency))
+        self._pending = deque()
+        self._next_offset = 0
+        self._current = b""
+        self._offset = 0
+
+    def readable(self):
+        return True
+
+    def _get(self, start: int, end: int) -> bytes:
+        body = self._client.get_object(
+            Bucket=self._bucket, Key=self._key, Range=f"bytes={start}-{end - 1}"
+        )["Body"].read()
+        if len(body) != end - start:
+            raise IOError(f"s3://{self._bucket}/{self._key}: short read at offset {start}")
+        return body
+
+    def _fill(self):
+        while self._next_offset < self._size and len(self._pending) < self._window:
+            end = min(self._next_offset + self._part_size, self._size)
+            self._pending.append(self._pool.submit(self._get, self._next_offset, end))
+            self._next_offset = end
+
+    def readinto(self, buffer) -> int:
+        while self._offset >= len(self._current):
+            self._fill()
+            if not self._pending:
+                return 0
+            self._current = self._pending.popleft().result()
+            self._offset = 0
+            self._window = min(self._window * 2, self._read_ahead)
+            self._fill()
+
+        n = min(len(buffer), len(self._current) - self._offset)
+        buffer[:n] = self._current[self._offset: self._offset + n]
+        self._offset += n
+        return n
+
+    def close(self):
+        if self.closed:
+            return
+        self._pool.shutdown(cancel_futures=True)
+        super().close()
+
+
+class S3Storage(StorageBackend):
+    """
+    One bucket of an S3-compatible store (endpoint from MONGOVAULT_S3_ENDPOINT).
+    `part_size` and `concurrency` apply to both multipart uploads and
+    ranged reads; `read_ahead` is the most ranges buffered ahead of a reader.
+    """
+
+    def __init__(self, bucket: str, part_size: Optional[int] = None,
+                 concurrency: Optional[int] = None, read_ahead: Optional[int] = None,
+                 client=None):
+        self.bucket = bucket
+        self.part_size = part_size or DEFAULT_PART_BYTES
+        self.concurrency = concurrency or DEFAULT_CONCURRENCY
+        self.read_ahead = read_ahead
+        self.client = client or s3_client(self.concurrency)
+
+    def open_read(self, key: str):
+        return io.BufferedReader(
+            S3RangedReader(self.client, self.bucket, key, self.part_size,
+                           self.concurrency, self.read_ahead),
+            buffer_size=1024 * 1024,
+        )
+
+    def open_write(self, key: str):
+        return S3MultipartWriter(self.client, self.bucket, key, self.part_size, self.concurrency)
+
+    def read_range(self, key: str, start: int, length: int) -> bytes:
+        return self.client.get_object(
+            Bucket=self.bucket, Key=key, Range=f"bytes={start}-{start + length - 1}"
+        )["Body"].read()
+
+    def size(self, key: str) -> int:
+        return self.client.head_object(Bucket=self.bucket, Key=key)["ContentLength"]
+
+    def exists(self, key: str) -> bool:
+        try:
+            self.size(key)
+            return True
+        except Exception as e:
+            if _s3_status(e) == 404:
+                return False
+            raise
+
+    def delete(self, key: str):
+        self.client.delete_object(Bucket=self.bucket, Key=key)
+
+    def read_bytes(self, key: str) -> bytes:
+        return self.client.get_object(Bucket=self.bucket, Key=key)["Body"].read()
+
+    def write_bytes(self, key: str, data: bytes):
+        self.client.put_object(Bucket=self.bucket, Key=key, Body=data)
+
+
+_clients = {}
+_clients_lock = threading.Lock()
+
+
+def s3_client(concurrency: int = DEFAULT_CONCURRENCY):
+    """
+    Shared boto3 client per endpoint, profile and connection pool size.
+    Clients are thread-safe and slow to build, so every transfer reuses one.
+    """
+    _require_boto3()
+    endpoint = os.environ.get(S3_ENDPOINT_ENV) or None
+    profile = os.environ.get("AWS_PROFILE") or None
+    pool_size = max(10, concurrency * 2)
+    key = (endpoint, profile, pool_size)
+
+    with _clients_lock:
+        client = _clients.get(key)
+        if client is None:
+            client = boto3.session.Session(profile_name=profile).client(
+                "s3",
+                endpoint_url=endpoint,
+                config=BotoConfig(
+                    max_pool_connections=pool_size,
+                    retries={"mode": "standard", "max_attempts": 5},
+                    # MinIO and most self-hosted stores want path-style URLs
+                    s3={"addressing_style": "path" if endpoint else "auto"},
+                ),
+            )
+            _clients[key] = client
+        return client
+
+
+def _s3_status(error: Exception) -> Optional[int]:
+    response = getattr(error, "response", None) or {}
+    return response.get("ResponseMetadata", {}).get("HTTPStatusCode")
+
+
+# -----------------------------
+# Paths
+# -----------------------------
+
+def split_url(path: str) -> Tuple[str, str]:
+    """s3://bucket/some/key -> ("bucket", "some/key")"""
+    bucket, _, key = path[len(S3_SCHEME):].partition("/")
+    if not bucket:
+        raise ValueError(f"No bucket in {path}")
+    return bucket, key
+
+
+def get_storage(path: str, part_size: Optional[int] = None, concurrency: Optional[int] = None,
+                read_ahead: Optional[int] = None) -> Tuple[StorageBackend, str]:
+    """(backend, key) for a local path or an s3://bucket/key URL."""
+    if is_remote(path):
+        bucket, key = split_url(path)
+        return S3Storage(bucket, part_size, concurrency, read_ahead), key
+    return LocalStorage(), path
+
+
+def join(base: str, name: str) -> str:
+    """A name inside a directory or under an s3:// prefix."""
+    if is_remote(base):
+        return f"{base.rstrip('/')}/{name}"
+    return os.path.join(base, name)
+
+
+def open_read(path: str, **options):
+    backend, key = get_storage(path, **options)
+    return backend.open_read(key)
+
+
+def open_write(path: str, **options):
+    backend, key = get_storage(path, **options)
+    return backend.open_write(key)
+
+
+def read_head(path: str, length: int) -> bytes:
+    backend, key = get_storage(path)
+    return backend.read_range(key, 0, length)
+
+
+def size(path: str) -> int:
+    backend, key = get_storage(path)
+    return backend.size(key)
+
+
+def exists(path: str) -> bool:
+    backend, key = get_storage(path)
+    return backend.exists(key)
+
+
+def delete(path: str):
+    backend, key = get_storage(path)
+    backend.delete(key)
@@ -0,0 +1,270 @@
+import io
+import queue
+import hashlib
+import threading
+from typing import Dict, Any, Optional
+
+from . import storage_service
+from .archive_reader import scan_archive
+from .compression_service import GZIP, READ_CHUNK, compressed_writer
+
+# Chunks queued per sink before the producer blocks (backpressure): with
+# 1 MB chunks a slow sink holds at most this many MB
+DEFAULT_BUFFER_CHUNKS = 16
+
+# How often a blocked producer checks whether its sink died
+_PUT_POLL_SECONDS = 0.2
+
+_EOF = None
+
+
+class SinkError(Exception):
+    pass
+
+
+class _QueueReader(io.RawIOBase):
+    """Readable stream over the chunks a SinkThread's queue receives."""
+
+    def __init__(self, chunks: queue.Queue):
+        super().__init__()
+        self._chunks = chunks
+        self._current = b""
+        self._offset = 0
+        self._eof = False
+
+    def readable(self):
+        return True
+
+    def readinto(self, buffer) -> int:
+        while self._offset >= len(self._current):
+            if self._eof:
+                return 0
+            chunk = self._chunks.get()
+            if chunk is _EOF:
+                self._eof = True
+                return 0
+            self._current, self._offset = chunk, 0
+
+        n = min(len(buffer), len(self._current) - self._offset)
+        buffer[:n] = self._current[self._offset: self._offset + n]
+        self._offset += n
+        return n
+
+    def drain(self):
+        """Discard whatever is still queued, so the producer never blocks on us."""
+        while not self._eof:
+            self._eof = self._chunks.get() is _EOF
+
+
+class SinkThread(threading.Thread):
+    """
+    One consumer of a tee: runs `func(stream)` on its own thread, where
+    `stream` reads the chunks handed to put(). The queue holds at most
+    `buffer_chunks` chunks, so a slow sink slows the producer instead of
+    growing memory.
+    """
+
+    def __init__(self, name: str, func, buffer_chunks: int = DEFAULT_BUFFER_CHUNKS,
+                 required: bool = True):
+        super().__init__(name=f"sink-{name}", daemon=True)
+        self.sink_name = name
+        self.func = func
+        self.required = required
+        self.result = None
+        self.error = None
+        self._chunks = queue.Queue(maxsize=max(1, buffer_chunks))
+        self._reader = _QueueReader(self._chunks)
+
+    def run(self):
+        try:
+            self.result = self.func(io.BufferedReader(self._reader, buffer_size=READ_CHUNK))
+        except Exception as e:
+            self.error = e
+        finally:
+            self._reader.drain()
+
+    def put(self, chunk):
+        """Queue a chunk, blocking while the sink is behind. Raises SinkError if it died."""
+        while True:
+            if self.error is not None:
+                raise SinkError(f"{self.sink_name}: {self.error}")
+            try:
+                self._chunks.put(chunk, timeout=_PUT_POLL_SECONDS)
+                return
+            except queue.Full:
+                if not self.is_alive():
+                    raise SinkError(f"{self.sink_name}: stopped reading")
+
+    def finish(self):
+        """Signal end of stream (a failed sink still drains until it sees it) and wait."""
+        while self.is_alive():
+            try:
+                self._chunks.put(_EOF, timeout=_PUT_POLL_SECONDS)
+                break
+            except queue.Full:
+                continue
+        self.join()
+
+
+class TeeWriter(io.RawIOBase):
+    """
+    Writable stream that hands every chunk to several sinks at once. Chunks
+    are shared, not copied. A required sink that fails aborts the write; an
+    optional one (e.g. an off-site mirror) is dropped and reported.
+    """
+
+    def __init__(self, sinks, buffer_chunks: int = DEFAULT_BUFFER_CHUNKS):
+        super().__init__()
+        self.sinks = []
+        for name, func, required in sinks:
+            sink = SinkThread(name, func, buffer_chunks, required)
+            sink.start()
+            self.sinks.append(sink)
+        self.bytes_written = 0
+
+    def writable(self):
+        return True
+
+    def write(self, data) -> int:
+        chunk = bytes(data)
+        for sink in self.sinks:
+            if sink.error is not None and not sink.required:
+                continue
+            try:
+                sink.put(chunk)
+            except SinkError:
+                if sink.required:
+                    raise
+        self.bytes_written += len(chunk)
+        return len(chunk)
+
+    def close(self):
+        if self.closed:
+            return
+        for sink in self.sinks:
+            sink.finish()
+        super().close()
+
+    def results(self) -> Dict[str, Any]:
+        return {sink.sink_name: sink.result for sink in self.sinks}
+
+    def errors(self, required: Optional[bool] = None) -> Dict[str, str]:
+        return {
+            sink.sink_name: str(sink.error) for sink in self.sinks
+            if sink.error is not None and (required is None or sink.required == required)
+        }
+
+
+# -----------------------------
+# Sinks
+# -----------------------------
+
+def storage_sink(path: str, **storage_options):
+    """
+    Sink writing the stream to a local path or an s3:// URL (parallel
+    multipart upload, see storage_service). Returns the byte count.
+    """
+    def run(stream):
+        total = 0
+        writer = storage_service.open_write(path, **storage_options)
+        try:
+            for chunk in iter(lambda: stream.read(READ_CHUNK), b""):
+                writer.write(chunk)
+                total += len(chunk)
+        except Exception:
+            writer.abort()
+            raise
+        writer.close()
+        return total
+    return run
+
+
+def sha256_sink(stream) -> str:
+    digest = hashlib.sha256()
+    for chunk in iter(lambda: stream.read(READ_CHUNK), b""):
+        digest.update(chunk)
+    return f"sha256:{digest.hexdigest()}"
+
+
+def scan_sink(stream) -> Dict[str, Any]:
+    """Archive scan (collections, counts, sizes) of the uncompressed stream."""
+    return scan_archive(stream)
+
+
+# -----------------------------
+# Backup pipeline
+# -----------------------------
+
+def _remove(paths):
+    for path in paths:
+        try:
+            storage_service.delete(path)
+        except Exception:
+            pass
+
+
+def tee_backup_stream(
+    source,
+    archive_file: str,
+    mirrors=(),
+    codec: str = GZIP,
+    level: Optional[int] = None,
+    threads: Optional[int] = None,
+    buffer_chunks: int = DEFAULT_BUFFER_CHUNKS,
+    **storage_options,
+) -> Dict[str, Any]:
+    """
+    Read an uncompressed archive from `source` (mongodump's stdout) once:
+
+        source ─┬─ archive scan (for the manifest)
+                └─ compressor ─┬─ archive_file
+                               ├─ mirrors (off-site copies; optional)
+                               └─ sha256
+
+    Mirrors are paths or s3:// URLs, uploaded as the dump runs
+    (`storage_options`: part_size, concurrency). Nothing is read back
+    from disk afterwards. Every sink gets its own bounded queue. A failing
+    mirror is dropped and reported under "mirror_errors"; any other
+    failure raises SinkError after removing the files written so far.
+    """
+    targets = [archive_file, *mirrors]
+    compressed = TeeWriter(
+        [
+            ("archive", storage_sink(archive_file), True),
+            ("sha256", sha256_sink, True),
+            *((f"mirror:{path}", storage_sink(path, **storage_options), False) for path in mirrors),
+        ],
+        buffer_chunks,
+    )
+    raw = TeeWriter([("scan", scan_sink, True)], buffer_chunks)
+
+    try:
+        try:
+            with compressed_writer(compressed, codec, level, threads) as writer:
+                for chunk in iter(lambda: source.read(READ_CHUNK), b""):
+                    writer.write(chunk)
+                    raw.write(chunk)
+        finally:
+            raw.close()
+            compressed.close()
+
+        failed = {**raw.errors(), **compressed.errors(required=True)}
+        if failed:
+            raise SinkError("; ".join(f"{name}: {error}" for name, error in failed.items()))
+    except Exception:
+        _remove(targets)
+        raise
+
+    mirror_errors = compressed.errors(required=False)
+    _remove(path for path in mirrors if f"mirror:{path}" in mirror_errors)
+
+    results = compressed.results()
+    return {
+        "codec": codec,
+        "uncompressed_bytes": raw.bytes_written,
+        "compressed_bytes": compressed.bytes_written,
+        "checksum": results["sha256"],
+        "scan": raw.results()["scan"],
+        "mirrors": [path for path in mirrors if f"mirror:{path}" not in mirror_errors],
+        "mirror_errors": mirror_errors,
+    }
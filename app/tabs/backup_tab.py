@@ -1,29 +1,32 @@
 from PyQt6.QtWidgets import (
     QWidget, QVBoxLayout, QLabel, QLineEdit,
-    QPushButton, QSlider, QScrollArea,
-    QHBoxLayout, QMessageBox, QGridLayout,
-    QProgressBar
+    QPushButton, QSlider,
+    QHBoxLayout, QMessageBox,
+    QProgressBar, QComboBox, QSpinBox
 )
 from PyQt6.QtCore import Qt
 import os
 import datetime
 
-from app.services.mongo_service import get_collections
-from app.services.backup_service import validate_connection, apply_retention_policy
-from app.utils.logger import format_log
-from app.widgets.collection_card import CollectionCard
-from app.worker import CommandWorker
+from app.services.mongo_service import get_collection_sizes
+from app.services.backup_service import validate_connection
+from app.services.catalog_service import predict_duration, record_backup
+from app.services.client_registry import cluster_key
+from app.services.compression_service import DEFAULT_LEVELS, archive_extension, zstd_available
+from app.services.manifest_service import create_manifest, manifest_from_scan, write_manifest
+from app.services.retention_service import apply_retention
+from app.services.stream_service import tee_backup_stream
+from app.utils.logger import format_log, format_bytes
+from app.widgets.collection_picker import CollectionPicker
+from app.worker import CommandWorker, CollectionDiscoveryWorker
 
 
 class BackupTab(QWidget):
     def __init__(self, log_callback):
         super().__init__()
         self.log_callback = log_callback
-        self.selected_collections = set()
-        self.collection_cards = []
-        self.all_collections = []
-        self.columns = 3
         self.worker = None
+        self.discovery_worker = None
         self.init_ui()
 
     def init_ui(self):
@@ -43,14 +46,14 @@ class BackupTab(QWidget):
         self.db = QLineEdit()
         self.db.setPlaceholderText("Select or type database")
 
-        fetch_btn = QPushButton("↻  Fetch")
-        fetch_btn.setObjectName("fetchBtn")
-        fetch_btn.clicked.connect(self.load_collections)
+        self.fetch_btn = QPushButton("↻  Fetch")
+        self.fetch_btn.setObjectName("fetchBtn")
+        self.fetch_btn.clicked.connect(self.load_collections)
 
         db_row = QHBoxLayout()
         db_row.setSpacing(8)
         db_row.addWidget(self.db, 1)
-        db_row.addWidget(fetch_btn)
+        db_row.addWidget(self.fetch_btn)
 
         # ── Collections header ──────────────────────────────────────────
         coll_title = QLabel("Collections")
@@ -78,17 +81,11 @@ class BackupTab(QWidget):
         # ── Filter input ─────────────────────────────────────────────────
         self.search_input = QLineEdit()
         self.search_input.setPlaceholderText("🔍  Filter collections...")
-        self.search_input.textChanged.connect(self.filter_collections)
-
-        # ── Collection scroll ──────────────────────────────────────────────
-        self.scroll_area = QScrollArea()
-        self.scroll_area.setWidgetResizable(True)
-        self.collection_container = QWidget()
-        self.collection_grid = QGridLayout()
-        self.collection_grid.setSpacing(0)  # list-item style, no gaps
-        self.collection_grid.setContentsMargins(0, 0, 0, 0)
-        self.collection_container.setLayout(self.collection_grid)
-        self.scroll_area.setWidget(self.collection_container)
+
+        # ── Collection list (virtualized) ──────────────────────────────────
+        self.picker = CollectionPicker()
+        self.picker.selection_changed.connect(self.on_selection_changed)
+        self.search_input.textChanged.connect(self.picker.set_filter)
 
         # ── Parallel Collections ───────────────────────────────────────────
         par_title = QLabel("Parallel Collections")
@@ -107,6 +104,28 @@ class BackupTab(QWidget):
         self.slider.setValue(1)
         self.slider.valueChanged.connect(self._update_parallel_label)
 
+        # ── Compression ─────────────────────────────────────────────────────
+        comp_title = QLabel("Compression")
+        comp_title.setObjectName("sectionTitle")
+
+        # None: mongodump's own single-threaded --gzip
+        self.compression = QComboBox()
+        self.compression.addItem("mongodump --gzip", None)
+        self.compression.addItem("Parallel gzip (all cores)", "gzip")
+        if zstd_available():
+            self.compression.addItem("zstd (all cores)", "zstd")
+        self.compression.currentIndexChanged.connect(self._update_compression_level)
+
+        self.compression_level = QSpinBox()
+        self.compression_level.setPrefix("Level ")
+        self.compression_level.setVisible(False)
+
+        comp_header = QHBoxLayout()
+        comp_header.addWidget(comp_title)
+        comp_header.addStretch()
+        comp_header.addWidget(self.compression_level)
+        comp_header.addWidget(self.compression)
+
         # ── Progress ────────────────────────────────────────────────────────
         self.progress_bar = QProgressBar()
         self.progress_bar.setValue(0)
@@ -130,9 +149,10 @@ class BackupTab(QWidget):
         layout.addLayout(db_row)
         layout.addLayout(coll_header)
         layout.addWidget(self.search_input)
-        layout.addWidget(self.scroll_area, 1)
+        layout.addWidget(self.picker, 1)
         layout.addLayout(par_header)
         layout.addWidget(self.slider)
+        layout.addLayout(comp_header)
         layout.addWidget(self.progress_bar)
         layout.addWidget(self.stats_label)
         layout.addWidget(self.run_btn)
@@ -143,6 +163,13 @@ class BackupTab(QWidget):
     def _update_parallel_label(self, value):
         self.parallel_value_label.setText(str(value))
 
+    def _update_compression_level(self):
+        codec = self.compression.currentData()
+        self.compression_level.setVisible(codec is not None)
+        if codec:
+            self.compression_level.setRange(1, 9 if codec == "gzip" else 19)
+            self.compression_level.setValue(DEFAULT_LEVELS[codec])
+
     # -----------------------------
     # Load Collections
     # -----------------------------
@@ -155,63 +182,55 @@ class BackupTab(QWidget):
             QMessageBox.warning(self, "Error", "Provide URI and Database first")
             return
 
-        collections = get_collections(uri, db_name)
-        self.all_collections = collections
-        self.populate_grid(collections)
+        # Discovery runs off the GUI thread; names and stats stream in
+        self.fetch_btn.setEnabled(False)
+        self.search_input.clear()
+        self.picker.set_collections([])
+
+        self.discovery_worker = CollectionDiscoveryWorker(uri, db_name)
+        self.discovery_worker.names_signal.connect(self.on_collections_listed)
+        self.discovery_worker.stats_signal.connect(self.picker.update_stats)
+        self.discovery_worker.finished_signal.connect(self.on_discovery_finished)
+        self.discovery_worker.start()
+
+        self.log_callback(format_log(f"Fetching collections from '{db_name}'..."))
+
+    def on_collections_listed(self, collections):
+        self.picker.set_collections(collections)
         self.select_all()
 
         self.log_callback(format_log(f"Loaded {len(collections)} collections"))
 
-    def populate_grid(self, collections):
-        for i in reversed(range(self.collection_grid.count())):
-            widget = self.collection_grid.itemAt(i).widget()
-            if widget:
-                widget.deleteLater()
+    def on_discovery_finished(self, result):
+        self.fetch_btn.setEnabled(True)
 
-        self.collection_cards = []
-
-        # Single-column list style to match mockup
-        for index, name in enumerate(collections):
-            card = CollectionCard(name)
-            card.toggled.connect(self.on_collection_toggled)
-            self.collection_grid.addWidget(card, index, 0)
-            self.collection_cards.append(card)
+        if not result.get("success"):
+            self.log_callback(format_log(f"❌ Failed to fetch collections: {result.get('error')}"))
+            return
 
-    def resizeEvent(self, event):
-        if self.all_collections:
-            self.populate_grid(self.all_collections)
-        super().resizeEvent(event)
+        unsized = [name for name, stats in result.get("stats", {}).items() if stats is None]
+        if unsized:
+            self.log_callback(format_log(f"⚠  No stats for {len(unsized)} collection(s)"))
 
     # -----------------------------
     # Selection
     # -----------------------------
 
-    def on_collection_toggled(self, name, selected):
-        if selected:
-            self.selected_collections.add(name)
+    def on_selection_changed(self, count):
+        totals = self.picker.selected_stats()
+        if totals["data_size"]:
+            self.badge.setText(
+                f"SELECTED: {count} · {totals['documents']:,} docs · "
+                f"{format_bytes(totals['data_size'])}"
+            )
         else:
-            self.selected_collections.discard(name)
-        count = len(self.selected_collections)
-        self.badge.setText(f"SELECTED: {count}")
+            self.badge.setText(f"SELECTED: {count}")
 
     def select_all(self):
-        for card in self.collection_cards:
-            card.set_selected(True)
+        self.picker.select_all()
 
     def deselect_all(self):
-        for card in self.collection_cards:
-            card.set_selected(False)
-
-    # -----------------------------
-    # Search
-    # -----------------------------
-
-    def filter_collections(self, text):
-        filtered = [
-            name for name in self.all_collections
-            if text.lower() in name.lower()
-        ]
-        self.populate_grid(filtered)
+        self.picker.deselect_all()
 
     # -----------------------------
     # Run Backup (Non-blocking)
@@ -219,7 +238,8 @@ class BackupTab(QWidget):
 
     def run_backup(self):
 
-        if not self.selected_collections:
+        selected_cols = self.picker.selected_collections()
+        if not selected_cols:
             QMessageBox.warning(self, "Error", "Select at least one collection")
             return
 
@@ -233,25 +253,46 @@ class BackupTab(QWidget):
 
         os.makedirs("./backups", exist_ok=True)
 
+        codec = self.compression.currentData()
+        level = self.compression_level.value()
+
         timestamp = datetime.datetime.now().strftime("%Y-%m-%d_%H-%M-%S")
-        archive_path = f"./backups/{db_name}_backup_{timestamp}.archive.gz"
+        archive_path = f"./backups/{db_name}_backup_{timestamp}{archive_extension(codec)}"
+
+        if codec:
+            # Raw archive on stdout, compressed on every core by the worker,
+            # scanned and hashed on the way so nothing is read back
+            archive_args = ["--archive"]
+            sink = lambda stdout: tee_backup_stream(stdout, archive_path, codec=codec, level=level)
+        else:
+            archive_args = [f"--archive={archive_path}", "--gzip"]
+            sink = None
 
         command = [
             "mongodump",
             "--uri", uri,
             "--db", db_name,
-            f"--archive={archive_path}",
-            "--gzip",
+            *archive_args,
             f"--numParallelCollections={self.slider.value()}"
         ]
 
         # mongodump has no multi-collection include flag.
         # Inverse selection: exclude collections that are NOT selected.
-        all_cols = set(self.all_collections)
-        selected_cols = set(self.selected_collections)
+        all_cols = set(self.picker.collections())
         for col in (all_cols - selected_cols):
             command.append(f"--excludeCollection={col}")
 
+        selected = sorted(selected_cols)
+
+        # History-based estimate; the live ETA takes over once data flows
+        expected = predict_duration(
+            "./backups", db_name, self.picker.selected_stats()["data_size"] or None
+        )
+        if expected:
+            self.log_callback(format_log(
+                f"⏱  Expected duration: ~{int(expected)}s (from recent backups of '{db_name}')"
+            ))
+
         self.progress_bar.setValue(0)
         self.run_btn.setEnabled(False)
         self.cancel_btn.setEnabled(True)
@@ -259,19 +300,21 @@ class BackupTab(QWidget):
         self.worker = CommandWorker(
             command,
             archive_path=archive_path,
-            total_steps=len(self.selected_collections)
+            size_loader=lambda: get_collection_sizes(uri, db_name, selected),
+            on_success=lambda result: self._record_backup(archive_path, uri, db_name, result),
+            stdout_sink=sink,
         )
 
         self.worker.log_signal.connect(self.log_callback)
         self.worker.progress_signal.connect(self.progress_bar.setValue)
         self.worker.stats_signal.connect(self.stats_label.setText)
         self.worker.finished_signal.connect(
-            lambda result: self.on_backup_finished(result, archive_path)
+            lambda result: self.on_backup_finished(result, archive_path, db_name)
         )
 
         self.worker.start()
 
-    def on_backup_finished(self, result, archive_path):
+    def on_backup_finished(self, result, archive_path, db_name):
 
         self.run_btn.setEnabled(True)
         self.cancel_btn.setEnabled(False)
@@ -293,8 +336,63 @@ class BackupTab(QWidget):
             f"✅ Backup created: {archive_path} ({size_mb} MB)"
         )
 
-        # Apply retention policy
-        apply_retention_policy("./backups", keep_last=5)
+        if result.get("manifest_file"):
+            self.log_callback(f"🗂  Manifest written: {result['manifest_file']}")
+        elif result.get("manifest_error"):
+            self.log_callback(f"⚠  Manifest not written: {result['manifest_error']}")
+
+        if result.get("catalog_error"):
+            self.log_callback(f"⚠  Backup not cataloged: {result['catalog_error']}")
+
+        # Per-database GFS rules from ./backups/retention.json (keep 5 by default)
+        retention = apply_retention("./backups", db_name=db_name)
+        if retention.get("deleted"):
+            self.log_callback(format_log(
+                f"🧹 Retention removed {len(retention['deleted'])} old backup(s) of '{db_name}'"
+            ))
+        if not retention.get("success"):
+            self.log_callback(format_log(f"⚠  Retention: {retention.get('error')}"))
+
+    def _record_backup(self, archive_path, uri, db_name, result):
+        # Runs on the worker thread once mongodump has exited cleanly
+        outcome = {}
+        stream = result.get("pipe_result")
+
+        if stream:
+            manifest = {"success": True, "manifest": manifest_from_scan(
+                archive_path, stream["scan"], db_name,
+                result.get("duration_seconds"), stream["compressed_bytes"],
+            )}
+            try:
+                manifest["manifest_file"] = write_manifest(archive_path, manifest["manifest"])
+            except OSError as e:
+                manifest = {"success": False, "error": f"Could not write manifest: {e}",
+                            "manifest": manifest["manifest"]}
+        else:
+            manifest = create_manifest(
+                archive_path,
+                source_db=db_name,
+                duration_seconds=result.get("duration_seconds"),
+            )
+        if manifest.get("success"):
+            outcome["manifest_file"] = manifest["manifest_file"]
+        else:
+            outcome["manifest_error"] = manifest.get("error")
+
+        catalog = record_backup(
+            "./backups",
+            archive_path,
+            db_name,
+            cluster=cluster_key(uri),
+            engine="mongodump",
+            duration_seconds=result.get("duration_seconds"),
+            manifest=manifest.get("manifest"),
+            known_checksum=stream["checksum"] if stream else None,
+        )
+        if not catalog.get("success"):
+            outcome["catalog_error"] = catalog.get("error")
+
+        return outcome
 
     def cancel_backup(self):
         if self.worker:
@@ -2,14 +2,30 @@ from PyQt6.QtWidgets import (
     QWidget, QVBoxLayout, QLabel, QLineEdit,
     QPushButton, QFileDialog,
     QHBoxLayout, QMessageBox,
-    QProgressBar, QSlider
+    QProgressBar, QSlider,
+    QComboBox, QSpinBox, QCheckBox
 )
 from PyQt6.QtCore import Qt
-from pymongo import MongoClient
 
-from app.services.restore_service import validate_restore_connection, build_restore_command
-from app.utils.logger import format_log
-from app.worker import CommandWorker
+from app.services.restore_service import (
+    validate_restore_connection,
+    validate_backup_file,
+    archive_feed,
+    build_restore_command,
+    get_archive_collections,
+    get_archive_sizes,
+)
+from app.services.backup_set_service import is_backup_set
+from app.services.catalog_service import list_backups
+from app.services.client_registry import pooled_client
+from app.services.index_service import index_plan
+from app.services.manifest_service import MANIFEST_SUFFIX, SET_SUFFIX
+from app.utils.logger import format_log, format_bytes
+from app.widgets.collection_picker import CollectionPicker
+from app.worker import CommandWorker, NativeRestoreWorker, IndexBuildWorker, SetRestoreWorker
+
+
+RECENT_BACKUPS_LIMIT = 200
 
 
 class RestoreTab(QWidget):
@@ -17,6 +33,7 @@ class RestoreTab(QWidget):
         super().__init__()
         self.log_callback = log_callback
         self.worker = None
+        self._index_phase = None  # (backup_file, include, exclude) pending after load
         self.init_ui()
 
     def init_ui(self):
@@ -40,7 +57,7 @@ class RestoreTab(QWidget):
         file_lbl = QLabel("Backup Archive")
         file_lbl.setObjectName("sectionLabel")
         self.file = QLineEdit()
-        self.file.setPlaceholderText("Select .archive.gz backup file")
+        self.file.setPlaceholderText("Select .archive.gz / .archive.zst backup file")
         self.file.setReadOnly(True)
 
         browse_btn = QPushButton("📂  Browse")
@@ -52,6 +69,42 @@ class RestoreTab(QWidget):
         file_row.addWidget(self.file, 1)
         file_row.addWidget(browse_btn)
 
+        # Recent backups straight from the catalog (no directory scan)
+        self.recent = QComboBox()
+        self.recent.activated.connect(self.on_recent_selected)
+
+        # ── Collections header ──────────────────────────────────────────
+        coll_title = QLabel("Collections")
+        coll_title.setObjectName("sectionTitle")
+
+        self.badge = QLabel("SELECTED: 0")
+        self.badge.setObjectName("selectedBadge")
+
+        select_all_btn = QPushButton("SELECT ALL")
+        select_all_btn.setObjectName("linkBtn")
+        select_all_btn.clicked.connect(self.select_all)
+
+        none_btn = QPushButton("NONE")
+        none_btn.setObjectName("linkBtn")
+        none_btn.clicked.connect(self.deselect_all)
+
+        coll_header = QHBoxLayout()
+        coll_header.setSpacing(8)
+        coll_header.addWidget(coll_title)
+        coll_header.addWidget(self.badge)
+        coll_header.addStretch()
+        coll_header.addWidget(select_all_btn)
+        coll_header.addWidget(none_btn)
+
+        # ── Filter input ─────────────────────────────────────────────────
+        self.search_input = QLineEdit()
+        self.search_input.setPlaceholderText("🔍  Filter collections...")
+
+        # ── Collection list (virtualized) ──────────────────────────────────
+        self.picker = CollectionPicker()
+        self.picker.selection_changed.connect(self.on_selection_changed)
+        self.search_input.textChanged.connect(self.picker.set_filter)
+
         # ── Parallel Collections ───────────────────────────────────────────
         par_title = QLabel("Parallel Collections")
         par_title.setObjectName("sectionTitle")
@@ -69,6 +122,44 @@ class RestoreTab(QWidget):
         self.slider.setValue(1)
         self.slider.valueChanged.connect(self._update_parallel_label)
 
+        # ── Restore Engine ─────────────────────────────────────────────────
+        engine_title = QLabel("Restore Engine")
+        engine_title.setObjectName("sectionTitle")
+
+        self.engine = QComboBox()
+        self.engine.addItem("mongorestore", "mongorestore")
+        self.engine.addItem("Native (pymongo)", "native")
+        self.engine.currentIndexChanged.connect(self._update_engine_options)
+
+        engine_header = QHBoxLayout()
+        engine_header.addWidget(engine_title)
+        engine_header.addStretch()
+        engine_header.addWidget(self.engine)
+
+        # Native engine tuning: insert batch size + write concern
+        self.batch_size = QSpinBox()
+        self.batch_size.setRange(100, 100000)
+        self.batch_size.setSingleStep(500)
+        self.batch_size.setValue(1000)
+        self.batch_size.setPrefix("Batch ")
+
+        self.write_concern = QComboBox()
+        self.write_concern.addItem("w: 1", 1)
+        self.write_concern.addItem("w: majority", "majority")
+        self.write_concern.addItem("w: 0 (unacknowledged)", 0)
+
+        self.native_options = QWidget()
+        native_row = QHBoxLayout()
+        native_row.setContentsMargins(0, 0, 0, 0)
+        native_row.setSpacing(8)
+        native_row.addWidget(self.batch_size, 1)
+        native_row.addWidget(self.write_concern, 1)
+        self.native_options.setLayout(native_row)
+        self.native_options.setVisible(False)
+
+        # Load data first, then rebuild indexes concurrently as a separate phase
+        self.defer_indexes = QCheckBox("Defer index builds until data is loaded")
+
         # ── Progress ────────────────────────────────────────────────────────
         self.progress_bar = QProgressBar()
         self.progress_bar.setValue(0)
@@ -85,39 +176,126 @@ class RestoreTab(QWidget):
         self.cancel_btn.setEnabled(False)
         self.cancel_btn.clicked.connect(self.cancel_restore)
 
+        self.rebuild_btn = QPushButton("Rebuild Indexes Only")
+        self.rebuild_btn.setObjectName("ghostBtn")
+        self.rebuild_btn.clicked.connect(self.run_index_rebuild)
+
         # ── Assemble ────────────────────────────────────────────────────────
         layout.addWidget(uri_lbl)
         layout.addWidget(self.uri)
         layout.addWidget(db_lbl)
         layout.addWidget(self.db)
         layout.addWidget(file_lbl)
+        layout.addWidget(self.recent)
         layout.addLayout(file_row)
+        layout.addLayout(coll_header)
+        layout.addWidget(self.search_input)
+        layout.addWidget(self.picker, 1)
         layout.addLayout(par_header)
         layout.addWidget(self.slider)
+        layout.addLayout(engine_header)
+        layout.addWidget(self.native_options)
+        layout.addWidget(self.defer_indexes)
         layout.addWidget(self.progress_bar)
         layout.addWidget(self.stats_label)
         layout.addWidget(self.run_btn)
         layout.addWidget(self.cancel_btn)
-        layout.addStretch()
+        layout.addWidget(self.rebuild_btn)
 
         self.setLayout(layout)
 
     def _update_parallel_label(self, value):
         self.parallel_value_label.setText(str(value))
 
+    def _update_engine_options(self):
+        self.native_options.setVisible(self.engine.currentData() == "native")
+
     # -----------------------------
     # File Picker
     # -----------------------------
 
+    def showEvent(self, event):
+        self.load_recent_backups()
+        super().showEvent(event)
+
+    def load_recent_backups(self):
+        self.recent.clear()
+        self.recent.addItem("Recent backups…", None)
+
+        try:
+            backups = list_backups("./backups", limit=RECENT_BACKUPS_LIMIT)
+        except Exception as e:
+            self.log_callback(format_log(f"⚠  Could not read backup catalog: {e}"))
+            return
+
+        for entry in backups:
+            verified = {"ok": "✓ verified", "failed": "✗ failed"}.get(entry["verify_status"], "")
+            size = format_bytes(entry["compressed_bytes"] or 0)
+            self.recent.addItem(
+                f"{entry['db_name']}  ·  {entry['created_at']}  ·  {size}  {verified}".rstrip(),
+                entry["archive_path"],
+            )
+
+    def on_recent_selected(self, index):
+        path = self.recent.itemData(index)
+        if path:
+            self.file.setText(path)
+            self.load_archive_collections(path)
+
     def select_file(self):
         file, _ = QFileDialog.getOpenFileName(
             self,
             "Select Backup Archive",
             "./backups",
-            "MongoDB Archives (*.archive.gz);;All Files (*)"
+            "MongoDB Archives (*.archive.gz *.archive.zst);;Backup Sets (*.manifest.json);;All Files (*)"
         )
+        # A set is a folder; it is picked through its sidecar manifest
+        if file.endswith(MANIFEST_SUFFIX):
+            set_dir = file[: -len(MANIFEST_SUFFIX)] + SET_SUFFIX
+            if is_backup_set(set_dir):
+                file = set_dir
         if file:
             self.file.setText(file)
+            self.load_archive_collections(file)
+
+    # -----------------------------
+    # Archive Collections
+    # -----------------------------
+
+    def load_archive_collections(self, backup_file):
+        collections = get_archive_collections(backup_file)
+        self.search_input.clear()
+        self.picker.set_collections(collections)
+        self.select_all()
+
+        self.log_callback(format_log(f"Archive contains {len(collections)} collections"))
+
+    # -----------------------------
+    # Selection
+    # -----------------------------
+
+    def on_selection_changed(self, count):
+        self.badge.setText(f"SELECTED: {count}")
+
+    def select_all(self):
+        self.picker.select_all()
+
+    def deselect_all(self):
+        self.picker.deselect_all()
+
+    def _namespace_filters(self):
+        """
+        Turn the picked cards into (include, exclude) lists, whichever is shorter.
+        Everything picked means no filter at all.
+        """
+        selected = self.picker.selected_collections()
+        excluded = set(self.picker.collections()) - selected
+
+        if not excluded:
+            return [], []
+        if len(selected) <= len(excluded):
+            return sorted(selected), []
+        return [], sorted(excluded)
 
     # -----------------------------
     # Run Restore (Non-blocking)
@@ -128,18 +306,37 @@ class RestoreTab(QWidget):
         db_name = self.db.text().strip()
         backup_file = self.file.text().strip()
 
+        if self.picker.collections() and not self.picker.selected_collections():
+            QMessageBox.warning(self, "Error", "Select at least one collection")
+            return
+
         # Validate connection
         validation = validate_restore_connection(uri, db_name)
         if not validation.get("success"):
             QMessageBox.warning(self, "Connection Failed", validation.get("error"))
             return
 
+        include, exclude = self._namespace_filters()
+        defer = self.defer_indexes.isChecked()
+        self._index_phase = (backup_file, include, exclude) if defer else None
+
+        if is_backup_set(backup_file):
+            self.run_set_restore(backup_file, uri, db_name, include, exclude)
+            return
+
+        if self.engine.currentData() == "native":
+            self.run_native_restore(backup_file, uri, db_name, include, exclude)
+            return
+
         command, error = build_restore_command(
             backup_file=backup_file,
             uri=uri,
             db_name=db_name,
             drop=True,  # always drop for a clean restore
             parallel=self.slider.value(),
+            include_collections=include,
+            exclude_collections=exclude,
+            defer_indexes=defer,
         )
 
         if error:
@@ -149,12 +346,14 @@ class RestoreTab(QWidget):
         self.progress_bar.setValue(0)
         self.stats_label.setText("Speed: -- | ETA: --")
         self.run_btn.setEnabled(False)
+        self.rebuild_btn.setEnabled(False)
         self.cancel_btn.setEnabled(True)
 
         self.worker = CommandWorker(
             command,
             archive_path=backup_file,
-            total_steps=0,
+            size_loader=lambda: get_archive_sizes(backup_file, include, exclude),
+            stdin_feed=archive_feed(backup_file),  # zstd / parallel gzip inflate here
         )
 
         self.worker.log_signal.connect(self.log_callback)
@@ -166,22 +365,98 @@ class RestoreTab(QWidget):
 
         self.worker.start()
 
-    def on_restore_finished(self, result, uri, db_name):
-        self.run_btn.setEnabled(True)
-        self.cancel_btn.setEnabled(False)
+    def run_native_restore(self, backup_file, uri, db_name, include, exclude):
+        error = validate_backup_file(backup_file)
+        if error:
+            QMessageBox.warning(self, "Error", error)
+            return
+
+        total_bytes = sum(get_archive_sizes(backup_file, include, exclude).values())
+
+        self.progress_bar.setValue(0)
+        self.stats_label.setText("Speed: -- | ETA: --")
+        self.run_btn.setEnabled(False)
+        self.rebuild_btn.setEnabled(False)
+        self.cancel_btn.setEnabled(True)
+
+        self.worker = NativeRestoreWorker(
+            backup_file,
+            uri,
+            db_name,
+            total_bytes=total_bytes,
+            include_collections=include,
+            exclude_collections=exclude,
+            drop=True,
+            workers=self.slider.value(),
+            batch_size=self.batch_size.value(),
+            write_concern=self.write_concern.currentData(),
+            build_indexes=self._index_phase is None,
+        )
+
+        self.worker.log_signal.connect(self.log_callback)
+        self.worker.progress_signal.connect(self.progress_bar.setValue)
+        self.worker.stats_signal.connect(self.stats_label.setText)
+        self.worker.finished_signal.connect(
+            lambda result: self.on_restore_finished(result, uri, db_name)
+        )
+
+        self.worker.start()
+
+    def run_set_restore(self, set_dir, uri, db_name, include, exclude):
+        # One restore per segment, `slider` segments at a time
+        self.progress_bar.setValue(0)
+        self.stats_label.setText("Speed: -- | ETA: --")
+        self.run_btn.setEnabled(False)
+        self.rebuild_btn.setEnabled(False)
+        self.cancel_btn.setEnabled(True)
+
+        self.log_callback(format_log(
+            f"Restoring backup set with {self.slider.value()} concurrent segment(s)..."
+        ))
+
+        self.worker = SetRestoreWorker(
+            set_dir,
+            uri,
+            db_name,
+            include_collections=include,
+            exclude_collections=exclude,
+            drop=True,
+            processes=self.slider.value(),
+            defer_indexes=self._index_phase is not None,
+            engine=self.engine.currentData(),
+            batch_size=self.batch_size.value(),
+            write_concern=self.write_concern.currentData(),
+        )
+
+        self.worker.log_signal.connect(self.log_callback)
+        self.worker.progress_signal.connect(self.progress_bar.setValue)
+        self.worker.stats_signal.connect(self.stats_label.setText)
+        self.worker.finished_signal.connect(
+            lambda result: self.on_restore_finished(result, uri, db_name)
+        )
+
+        self.worker.start()
 
+    def on_restore_finished(self, result, uri, db_name):
         if not result.get("success"):
+            self._set_idle()
             error = result.get("error", "Unknown error")
             self.log_callback(format_log(f"❌ Restore failed: {error}"))
             return
 
         self.progress_bar.setValue(100)
 
+        # Native engine reports its own per-collection throughput
+        for name, stats in sorted(result.get("collections", {}).items()):
+            self.log_callback(format_log(
+                f"   {name}: {stats['documents']:,} docs in {stats['seconds']}s "
+                f"({stats['docs_per_sec']:,.0f} docs/s, {stats['mb_per_sec']} MB/s)"
+            ))
+
         # Query the target DB for the actual collection list
         try:
-            client = MongoClient(uri, serverSelectionTimeoutMS=3000)
-            collections = sorted(client[db_name].list_collection_names())
-            client.close()
+            with pooled_client(uri) as client:
+                collections = sorted(client[db_name].list_collection_names())
             count = len(collections)
             names = ", ".join(collections) if collections else "(none)"
             self.log_callback(format_log(
@@ -190,7 +465,83 @@ class RestoreTab(QWidget):
         except Exception:
             self.log_callback(format_log("✅ Restore completed successfully"))
 
+        if self._index_phase:
+            backup_file, include, exclude = self._index_phase
+            self.start_index_rebuild(backup_file, uri, db_name, include, exclude)
+        else:
+            self._set_idle()
+
+    # -----------------------------
+    # Deferred Index Rebuild
+    # -----------------------------
+
+    def run_index_rebuild(self):
+        """Run the index phase on its own, e.g. to resume after a failure."""
+        uri = self.uri.text().strip()
+        db_name = self.db.text().strip()
+        backup_file = self.file.text().strip()
+
+        error = validate_backup_file(backup_file)
+        if error:
+            QMessageBox.warning(self, "Error", error)
+            return
+
+        validation = validate_restore_connection(uri, db_name)
+        if not validation.get("success"):
+            QMessageBox.warning(self, "Connection Failed", validation.get("error"))
+            return
+
+        include, exclude = self._namespace_filters()
+
+        self.run_btn.setEnabled(False)
+        self.rebuild_btn.setEnabled(False)
+        self.cancel_btn.setEnabled(True)
+        self.start_index_rebuild(backup_file, uri, db_name, include, exclude)
+
+    def start_index_rebuild(self, backup_file, uri, db_name, include, exclude):
+        namespaces = index_plan(backup_file, include, exclude)
+        self._index_phase = None
+
+        self.progress_bar.setValue(0)
+        self.stats_label.setText("Indexes: --")
+        self.log_callback(format_log(
+            f"Rebuilding indexes for {len(namespaces)} collection(s)..."
+        ))
+
+        self.worker = IndexBuildWorker(
+            uri, db_name, namespaces, workers=self.slider.value()
+        )
+
+        self.worker.log_signal.connect(lambda text: self.log_callback(format_log(text)))
+        self.worker.progress_signal.connect(self.progress_bar.setValue)
+        self.worker.stats_signal.connect(self.stats_label.setText)
+        self.worker.finished_signal.connect(self.on_index_rebuild_finished)
+
+        self.worker.start()
+
+    def on_index_rebuild_finished(self, result):
+        self._set_idle()
+
+        if not result.get("success"):
+            self.log_callback(format_log(
+                f"❌ Index rebuild failed: {result.get('error', 'Unknown error')} "
+                f"— run 'Rebuild Indexes Only' to resume"
+            ))
+            return
+
+        self.progress_bar.setValue(100)
+        self.log_callback(format_log(
+            f"✅ Indexes rebuilt — {result['built']} built, "
+            f"{result['skipped']} already present"
+        ))
+
+    def _set_idle(self):
+        self.run_btn.setEnabled(True)
+        self.rebuild_btn.setEnabled(True)
+        self.cancel_btn.setEnabled(False)
+
     def cancel_restore(self):
         if self.worker:
+            self._index_phase = None
             self.worker.cancel()
             self.log_callback(format_log("🛑 Restore cancelled"))
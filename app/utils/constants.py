@@ -23,4 +23,9 @@ def get_version():
     return "0.0.0"
 
 APP_VERSION = get_version()
-DEFAULT_BACKUP_DIR = "./backups"
\ No newline at end of file
+DEFAULT_BACKUP_DIR = "./backups"
+
+# Log panel: lines kept in the view, and how often queued lines are rendered
+LOG_DIR = "./logs"
+LOG_MAX_LINES = 10000
+LOG_FLUSH_MS = 33
@@ -3,3 +3,10 @@ from datetime import datetime
 def format_log(message: str) -> str:
     timestamp = datetime.now().strftime("%H:%M:%S")
     return f"[{timestamp}] {message}"
+
+
+def format_bytes(num: float) -> str:
+    for unit in ("B", "KB", "MB", "GB", "TB"):
+        if abs(num) < 1024 or unit == "TB":
+            return f"{num:.0f} {unit}" if unit == "B" else f"{num:.1f} {unit}"
+        num /= 1024
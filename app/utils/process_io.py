@@ -0,0 +1,69 @@
+try:
+    import psutil
+except ImportError:  # optional; /proc is used on Linux without it
+    psutil = None
+
+
+def _read_proc_io(pid: int):
+    # rchar/wchar count every read()/write(), sockets and pipes included,
+    # so they reflect network traffic as well as archive file I/O
+    counters = {}
+    with open(f"/proc/{pid}/io", "r") as f:
+        for line in f:
+            key, _, value = line.partition(":")
+            counters[key.strip()] = int(value)
+    return counters.get("rchar", 0), counters.get("wchar", 0)
+
+
+def read_io_counters(pid: int):
+    """
+    Cumulative (read_bytes, write_bytes) for a process, or None if unavailable
+    (e.g. macOS without psutil support for I/O counters, or the process is gone).
+    """
+    if psutil is not None:
+        try:
+            io = psutil.Process(pid).io_counters()
+            read = getattr(io, "read_chars", None) or io.read_bytes
+            write = getattr(io, "write_chars", None) or io.write_bytes
+            return read, write
+        except (psutil.Error, AttributeError, NotImplementedError):
+            pass
+
+    try:
+        return _read_proc_io(pid)
+    except (OSError, ValueError):
+        return None
+
+
+class IORateSampler:
+    """
+    Turns cumulative process I/O counters into smoothed read/write rates.
+    """
+
+    def __init__(self, pid: int, smoothing: float = 0.3):
+        self.pid = pid
+        self.smoothing = smoothing
+        self.read_rate = 0.0
+        self.write_rate = 0.0
+        self._last = None
+        self._primed = False
+        self.available = read_io_counters(pid) is not None
+
+    def sample(self, interval: float) -> bool:
+        """Take a sample `interval` seconds after the previous one."""
+        counters = read_io_counters(self.pid)
+        if counters is None:
+            self.available = False
+            return False
+
+        if self._last is not None and interval > 0:
+            read_rate = max(counters[0] - self._last[0], 0) / interval
+            write_rate = max(counters[1] - self._last[1], 0) / interval
+            # First interval seeds the average instead of ramping up from zero
+            a = self.smoothing if self._primed else 1.0
+            self.read_rate = a * read_rate + (1 - a) * self.read_rate
+            self.write_rate = a * write_rate + (1 - a) * self.write_rate
+            self._primed = True
+
+        self._last = counters
+        return True
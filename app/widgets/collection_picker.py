@@ -0,0 +1,383 @@
+from PyQt6.QtWidgets import QListView, QStyledItemDelegate, QStyle, QAbstractItemView
+from PyQt6.QtCore import (
+    Qt, QAbstractListModel, QModelIndex, QSortFilterProxyModel,
+    QSize, QRectF, pyqtSignal, pyqtProperty,
+)
+from PyQt6.QtGui import QColor, QFont, QPainter, QPen
+
+from app.utils.logger import format_bytes
+
+# Per-collection stats (documents / data_size / storage_size / index_size)
+StatsRole = Qt.ItemDataRole.UserRole + 1
+
+
+class CollectionListModel(QAbstractListModel):
+    """
+    Collection names plus their selection state and (optional) stats.
+    Selection lives here, not in widgets, so it survives filtering and scrolling.
+    """
+
+    selection_changed = pyqtSignal(int)  # number selected
+
+    def __init__(self):
+        super().__init__()
+        self._names = []
+        self._rows = {}  # name -> row, for applying streamed stats
+        self._selected = set()
+        self._stats = {}
+
+    # ── Qt model API ─────────────────────────────────────────────────────
+
+    def rowCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self._names)
+
+    def data(self, index, role=Qt.ItemDataRole.DisplayRole):
+        if not index.isValid():
+            return None
+
+        name = self._names[index.row()]
+
+        if role == Qt.ItemDataRole.DisplayRole:
+            return name
+        if role == Qt.ItemDataRole.CheckStateRole:
+            return (
+                Qt.CheckState.Checked if name in self._selected
+                else Qt.CheckState.Unchecked
+            )
+        if role == StatsRole:
+            return self._stats.get(name)
+        return None
+
+    def flags(self, index):
+        return Qt.ItemFlag.ItemIsEnabled | Qt.ItemFlag.ItemIsUserCheckable
+
+    # ── Collections ──────────────────────────────────────────────────────
+
+    def set_collections(self, names):
+        self.beginResetModel()
+        self._names = list(names)
+        self._rows = {name: row for row, name in enumerate(self._names)}
+        self._selected = set()
+        self._stats = {}
+        self.endResetModel()
+        self.selection_changed.emit(0)
+
+    def collections(self):
+        return list(self._names)
+
+    def update_stats(self, batch):
+        """Merge {name: stats} into the model; unknown names are ignored."""
+        rows = []
+        for name, stats in batch.items():
+            row = self._rows.get(name)
+            if row is None or stats is None:
+                continue
+            self._stats[name] = stats
+            rows.append(row)
+
+        if rows:
+            self.dataChanged.emit(
+                self.index(min(rows)), self.index(max(rows)), [StatsRole]
+            )
+            self.selection_changed.emit(len(self._selected))  # totals changed
+
+    def selected_stats(self):
+        """Summed stats over the selected collections that have been sized."""
+        total = {"documents": 0, "data_size": 0, "storage_size": 0, "index_size": 0}
+        for name in self._selected:
+            for key, value in (self._stats.get(name) or {}).items():
+                total[key] = total.get(key, 0) + value
+        return total
+
+    # ── Selection ────────────────────────────────────────────────────────
+
+    def selected(self):
+        return set(self._selected)
+
+    def toggle(self, row: int):
+        name = self._names[row]
+        if name in self._selected:
+            self._selected.discard(name)
+        else:
+            self._selected.add(name)
+
+        index = self.index(row)
+        self.dataChanged.emit(index, index, [Qt.ItemDataRole.CheckStateRole])
+        self.selection_changed.emit(len(self._selected))
+
+    def set_rows_selected(self, rows, state: bool):
+        rows = list(rows)
+        if not rows:
+            return
+
+        for row in rows:
+            if state:
+                self._selected.add(self._names[row])
+            else:
+                self._selected.discard(self._names[row])
+
+        self.dataChanged.emit(
+            self.index(min(rows)), self.index(max(rows)),
+            [Qt.ItemDataRole.CheckStateRole],
+        )
+        self.selection_changed.emit(len(self._selected))
+
+
+class CollectionFilterProxy(QSortFilterProxyModel):
+    """Case-insensitive substring filter over collection names."""
+
+    def __init__(self):
+        super().__init__()
+        self.setFilterCaseSensitivity(Qt.CaseSensitivity.CaseInsensitive)
+
+
+class CollectionCardDelegate(QStyledItemDelegate):
+    """
+    Paints the collection "card": checkbox square on the left, name beside it,
+    stats right-aligned once known. Colours come from the view, which gets
+    them from the theme's QSS.
+    """
+
+    ROW_HEIGHT = 48
+    BOX_SIZE = 20
+    LEFT_MARGIN = 14
+    SPACING = 12
+    MIN_NAME_WIDTH = 120
+
+    def sizeHint(self, option, index):
+        return QSize(option.rect.width(), self.ROW_HEIGHT)
+
+    def paint(self, painter, option, index):
+        view = self.parent()
+        rect = option.rect
+        checked = index.data(Qt.ItemDataRole.CheckStateRole) == Qt.CheckState.Checked
+        hovered = bool(option.state & QStyle.StateFlag.State_MouseOver)
+
+        painter.save()
+        painter.setRenderHint(QPainter.RenderHint.Antialiasing)
+
+        # Row background + bottom divider
+        if checked:
+            painter.fillRect(rect, view.selectedColor)
+        elif hovered:
+            painter.fillRect(rect, view.hoverColor)
+
+        painter.setPen(QPen(view.dividerColor, 1))
+        painter.drawLine(rect.bottomLeft(), rect.bottomRight())
+
+        # Checkbox square
+        box = QRectF(
+            rect.left() + self.LEFT_MARGIN,
+            rect.top() + (rect.height() - self.BOX_SIZE) / 2,
+            self.BOX_SIZE,
+            self.BOX_SIZE,
+        ).adjusted(1, 1, -1, -1)
+
+        if checked:
+            painter.setPen(QPen(view.checkColor, 2))
+            painter.setBrush(view.checkColor)
+        else:
+            painter.setPen(QPen(view.checkBorderColor, 2))
+            painter.setBrush(Qt.BrushStyle.NoBrush)
+        painter.drawRoundedRect(box, 4, 4)
+
+        if checked:
+            tick_font = QFont(option.font)
+            tick_font.setPointSize(9)
+            tick_font.setBold(True)
+            painter.setFont(tick_font)
+            painter.setPen(QColor("#FFFFFF"))
+            painter.drawText(box, Qt.AlignmentFlag.AlignCenter, "✓")
+
+        text_left = rect.left() + self.LEFT_MARGIN + self.BOX_SIZE + self.SPACING
+        text_rect = rect.adjusted(text_left - rect.left(), 0, -16, 0)
+
+        name = index.data(Qt.ItemDataRole.DisplayRole)
+        name_font = QFont(option.font)
+        name_font.setPointSize(11)
+
+        # Stats, right-aligned; shown only if the name keeps enough room
+        stats = index.data(StatsRole)
+        if stats:
+            stats_font = QFont(option.font)
+            stats_font.setPointSize(9)
+            painter.setFont(stats_font)
+
+            stats_text = self.stats_text(stats)
+            stats_width = painter.fontMetrics().horizontalAdvance(stats_text)
+
+            painter.setFont(name_font)
+            name_room = min(painter.fontMetrics().horizontalAdvance(name), self.MIN_NAME_WIDTH)
+
+            if stats_width + self.SPACING + name_room <= text_rect.width():
+                painter.setFont(stats_font)
+                painter.setPen(view.mutedColor)
+                painter.drawText(
+                    text_rect,
+                    Qt.AlignmentFlag.AlignVCenter | Qt.AlignmentFlag.AlignRight,
+                    stats_text,
+                )
+                text_rect = text_rect.adjusted(0, 0, -(stats_width + self.SPACING), 0)
+
+        # Collection name
+        painter.setFont(name_font)
+        painter.setPen(view.textColor)
+
+        name = painter.fontMetrics().elidedText(
+            name,
+            Qt.TextElideMode.ElideRight,
+            text_rect.width(),
+        )
+        painter.drawText(
+            text_rect,
+            Qt.AlignmentFlag.AlignVCenter | Qt.AlignmentFlag.AlignLeft,
+            name,
+        )
+
+        painter.restore()
+
+    @staticmethod
+    def stats_text(stats):
+        return (
+            f"{stats['documents']:,} docs · "
+            f"{format_bytes(stats['data_size'])} data · "
+            f"{format_bytes(stats['storage_size'])} disk · "
+            f"{format_bytes(stats['index_size'])} idx"
+        )
+
+
+class CollectionPicker(QListView):
+    """
+    Virtualized collection list: only visible rows are painted, so thousands
+    of collections cost the same as a handful. Click a row to toggle it.
+    """
+
+    selection_changed = pyqtSignal(int)
+
+    def __init__(self):
+        super().__init__()
+        self.setObjectName("collectionPicker")
+
+        self._text_color = QColor("#E8EDF2")
+        self._hover_color = QColor("#162032")
+        self._selected_color = QColor("#0A2018")
+        self._divider_color = QColor("#1F3050")
+        self._check_color = QColor("#00A848")
+        self._check_border_color = QColor("#3A5070")
+        self._muted_color = QColor("#7B8FA6")
+
+        self.source_model = CollectionListModel()
+        self.proxy_model = CollectionFilterProxy()
+        self.proxy_model.setSourceModel(self.source_model)
+        self.setModel(self.proxy_model)
+        self.setItemDelegate(CollectionCardDelegate(self))
+
+        self.setUniformItemSizes(True)  # lets Qt skip measuring off-screen rows
+        self.setMouseTracking(True)
+        self.setSelectionMode(QAbstractItemView.SelectionMode.NoSelection)
+        self.setEditTriggers(QAbstractItemView.EditTrigger.NoEditTriggers)
+        self.setVerticalScrollMode(QAbstractItemView.ScrollMode.ScrollPerPixel)
+        self.setCursor(Qt.CursorShape.PointingHandCursor)
+
+        self.clicked.connect(self._on_clicked)
+        self.source_model.selection_changed.connect(self.selection_changed)
+
+    # ── Public API ───────────────────────────────────────────────────────
+
+    def set_collections(self, names):
+        self.source_model.set_collections(names)
+
+    def collections(self):
+        return self.source_model.collections()
+
+    def update_stats(self, batch):
+        self.source_model.update_stats(batch)
+
+    def selected_collections(self):
+        return self.source_model.selected()
+
+    def selected_stats(self):
+        return self.source_model.selected_stats()
+
+    def set_filter(self, text: str):
+        self.proxy_model.setFilterFixedString(text)
+
+    def select_all(self):
+        self._set_visible_selected(True)
+
+    def deselect_all(self):
+        self._set_visible_selected(False)
+
+    # ── Internals ────────────────────────────────────────────────────────
+
+    def _set_visible_selected(self, state: bool):
+        # Like the old card grid: SELECT ALL / NONE act on what the filter shows
+        rows = [
+            self.proxy_model.mapToSource(self.proxy_model.index(r, 0)).row()
+            for r in range(self.proxy_model.rowCount())
+        ]
+        self.source_model.set_rows_selected(rows, state)
+
+    def _on_clicked(self, proxy_index):
+        source_index = self.proxy_model.mapToSource(proxy_index)
+        if source_index.isValid():
+            self.source_model.toggle(source_index.row())
+
+    # ── Theme colours (set from QSS via qproperty-*) ─────────────────────
+
+    def _get_text_color(self):
+        return self._text_color
+
+    def _set_text_color(self, color):
+        self._text_color = QColor(color)
+        self.viewport().update()
+
+    def _get_hover_color(self):
+        return self._hover_color
+
+    def _set_hover_color(self, color):
+        self._hover_color = QColor(color)
+        self.viewport().update()
+
+    def _get_selected_color(self):
+        return self._selected_color
+
+    def _set_selected_color(self, color):
+        self._selected_color = QColor(color)
+        self.viewport().update()
+
+    def _get_divider_color(self):
+        return self._divider_color
+
+    def _set_divider_color(self, color):
+        self._divider_color = QColor(color)
+        self.viewport().update()
+
+    def _get_check_color(self):
+        return self._check_color
+
+    def _set_check_color(self, color):
+        self._check_color = QColor(color)
+        self.viewport().update()
+
+    def _get_check_border_color(self):
+        return self._check_border_color
+
+    def _set_check_border_color(self, color):
+        self._check_border_color = QColor(color)
+        self.viewport().update()
+
+    def _get_muted_color(self):
+        return self._muted_color
+
+    def _set_muted_color(self, color):
+        self._muted_color = QColor(color)
+        self.viewport().update()
+
+    textColor = pyqtProperty(QColor, _get_text_color, _set_text_color)
+    hoverColor = pyqtProperty(QColor, _get_hover_color, _set_hover_color)
+    selectedColor = pyqtProperty(QColor, _get_selected_color, _set_selected_color)
+    dividerColor = pyqtProperty(QColor, _get_divider_color, _set_divider_color)
+    checkColor = pyqtProperty(QColor, _get_check_color, _set_check_color)
+    checkBorderColor = pyqtProperty(QColor, _get_check_border_color, _set_check_border_color)
+    mutedColor = pyqtProperty(QColor, _get_muted_color, _set_muted_color)
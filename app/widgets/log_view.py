@@ -0,0 +1,103 @@
+import os
+import datetime
+
+from PyQt6.QtWidgets import QPlainTextEdit
+from PyQt6.QtCore import QTimer
+
+from app.utils.constants import LOG_DIR, LOG_FLUSH_MS, LOG_MAX_LINES
+
+
+class LogView(QPlainTextEdit):
+    """
+    Read-only log panel that stays responsive under very noisy jobs.
+
+    Lines are queued and rendered in one batch per frame, the view keeps
+    only the last `max_lines` lines (oldest dropped first), and every line
+    is also spilled to a session file on disk so nothing is lost.
+    """
+
+    def __init__(self, max_lines: int = LOG_MAX_LINES, flush_ms: int = LOG_FLUSH_MS):
+        super().__init__()
+        self.setReadOnly(True)
+        self.setMaximumBlockCount(max_lines)  # Qt drops the oldest blocks past this
+
+        self._pending = []
+        self._spill = None
+        self._spill_failed = False
+        self.spill_path = None
+
+        self._timer = QTimer(self)
+        self._timer.setInterval(flush_ms)
+        self._timer.timeout.connect(self.flush)
+
+    # ── Public API ───────────────────────────────────────────────────────
+
+    def append_text(self, text: str):
+        """Queue one or more newline-separated lines for the next frame."""
+        self._pending.append(text)
+        if not self._timer.isActive():
+            self._timer.start()
+
+    def flush(self):
+        if not self._pending:
+            self._timer.stop()
+            return
+
+        text = "\n".join(self._pending)
+        self._pending = []
+
+        self._write_spill(text)
+
+        # Lines past the cap would be dropped right away; don't lay them out
+        max_lines = self.maximumBlockCount()
+        if max_lines > 0 and text.count("\n") >= max_lines:
+            text = "\n".join(text.rsplit("\n", max_lines)[1:])
+
+        # Only auto-scroll if the user hasn't scrolled up to read something
+        bar = self.verticalScrollBar()
+        at_bottom = bar.value() >= bar.maximum() - 4
+
+        self.appendPlainText(text)
+
+        if at_bottom:
+            bar.setValue(bar.maximum())
+
+    def clear_log(self):
+        self._pending = []
+        self.clear()
+        if self._spill:
+            self._spill.seek(0)
+            self._spill.truncate()
+
+    def full_log_path(self):
+        """Path of the on-disk copy holding every line, or None if nothing was logged."""
+        self.flush()
+        if self._spill:
+            self._spill.flush()
+        return self.spill_path
+
+    def close_spill(self):
+        if self._spill:
+            self._spill.close()
+            self._spill = None
+
+    # ── Internals ────────────────────────────────────────────────────────
+
+    def _write_spill(self, text: str):
+        if self._spill_failed:
+            return
+
+        if self._spill is None:
+            try:
+                os.makedirs(LOG_DIR, exist_ok=True)
+                stamp = datetime.datetime.now().strftime("%Y-%m-%d_%H-%M-%S")
+                self.spill_path = os.path.join(LOG_DIR, f"mongovault_session_{stamp}.log")
+                self._spill = open(self.spill_path, "w+", encoding="utf-8")
+            except OSError:
+                self._spill_failed = True
+                return
+
+        try:
+            self._spill.write(text + "\n")
+        except OSError:
+            pass
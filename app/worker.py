@@ -1,8 +1,19 @@
 from PyQt6.QtCore import QThread, pyqtSignal
 import subprocess
+import selectors
+import threading
 import time
 import os
 
+from app.services.command_runner import MAX_LINE_BYTES, popen_piped
+from app.services.index_service import rebuild_indexes
+from app.services.mongo_service import discover_collections
+from app.services.parallel_restore_service import restore_archive
+from app.services.progress_tracker import ProgressTracker
+from app.services.set_restore_service import restore_backup_set
+from app.utils.constants import LOG_FLUSH_MS
+from app.utils.process_io import IORateSampler
+
 
 class CommandWorker(QThread):
     log_signal = pyqtSignal(str)
@@ -10,112 +21,444 @@ class CommandWorker(QThread):
     stats_signal = pyqtSignal(str)  # For speed + ETA
     finished_signal = pyqtSignal(dict)
 
-    def __init__(self, command, archive_path, total_steps=0):
+    # Longest wait in select(); bounds cancel latency
+    POLL_INTERVAL = 0.05
+
+    # Fixed cadence for speed/ETA updates, independent of output volume
+    STATS_INTERVAL = 1.0
+
+    READ_SIZE = 64 * 1024
+
+    def __init__(self, command, archive_path, size_loader=None, on_success=None,
+                 stdin_feed=None, stdout_sink=None):
         super().__init__()
         self.command = command
         self.archive_path = archive_path
-        self.total_steps = total_steps
+        self.size_loader = size_loader  # returns {collection: bytes}, runs on this thread
+        self.on_success = on_success  # optional post-step, runs on this thread
+        # Archive data through the child's stdin/stdout (see popen_piped)
+        self.stdin_feed = stdin_feed
+        self.stdout_sink = stdout_sink
         self._process = None
+        self._log_stream = None
+        self._pipe = None
         self._cancelled = False
+        self._tracker = None
+        self._sampler = None
+        self._dup_count = 0  # track repeated duplicate-key noise
+        self._log_lines = []  # coalesced, sent as one log_signal per frame
+
+        # Which side of the child's I/O carries the uncompressed data:
+        # mongodump reads it from the server, mongorestore writes it to the server
+        is_restore = os.path.basename(str(command[0])) == "mongorestore"
+        self.data_side = "write" if is_restore else "read"
 
     def run(self):
         try:
-            self._process = subprocess.Popen(
-                self.command,
-                stdout=subprocess.PIPE,
-                stderr=subprocess.STDOUT,
-                text=True,
-                bufsize=1
+            # Pre-pass: collection sizes weight the progress bar and ETA
+            sizes = self.size_loader() if self.size_loader else {}
+            if self._cancelled:
+                self.finished_signal.emit({"success": False, "error": "Cancelled"})
+                return
+
+            self._tracker = ProgressTracker(sizes)
+
+            self._process, self._log_stream, self._pipe = popen_piped(
+                self.command, self.stdin_feed, self.stdout_sink
             )
 
             start_time = time.time()
-            last_size = 0
-            last_time = start_time
-            completed = 0
-            dup_count = 0  # track repeated duplicate-key noise
-
-            while True:
-
-                # Stream output
-                if self._process.stdout:
-                    line = self._process.stdout.readline()
-                    if line:
-                        clean = line.strip()
-
-                        # Collapse "continuing through error: E11000" spam into a summary
-                        if "continuing through error" in clean and "E11000" in clean:
-                            dup_count += 1
-                            continue  # swallow the raw line
-
-                        # Flush pending dup summary before printing the next real line
-                        if dup_count > 0:
-                            self.log_signal.emit(
-                                f"⚠  {dup_count} duplicate key error(s) skipped "
-                                f"— enable 'Drop Existing Collections' to avoid this"
-                            )
-                            dup_count = 0
-
-                        self.log_signal.emit(clean)
-
-                        if "writing" in clean.lower() or "restoring" in clean.lower():
-                            completed += 1
-                            if self.total_steps > 0:
-                                percent = int((completed / self.total_steps) * 100)
-                                self.progress_signal.emit(min(percent, 100))
-
-                # Track archive size change (growth for backup, stable/read for restore)
-                if os.path.exists(self.archive_path):
-                    current_size = os.path.getsize(self.archive_path)
-                    current_time = time.time()
-
-                    delta_size = abs(current_size - last_size)  # abs covers both directions
-                    delta_time = current_time - last_time
-
-                    if delta_time > 0 and delta_size > 0:
-                        speed = delta_size / delta_time  # bytes/sec
-                        speed_mb = speed / (1024 * 1024)
-
-                        if self.total_steps > 0 and completed > 0:
-                            pct_done = completed / self.total_steps
-                            elapsed = current_time - start_time
-                            eta = (elapsed / pct_done) * (1 - pct_done) if pct_done < 1 else 0
-                        else:
-                            eta = 0
-
-                        eta_display = f"{int(eta)}s" if eta > 0 else "--"
-                        self.stats_signal.emit(f"{speed_mb:.2f} MB/s | ETA: {eta_display}")
-
-                    last_size = current_size
-                    last_time = current_time
-
-                if self._process.poll() is not None:
-                    break
-
-                if self._cancelled:
-                    self._process.terminate()
-                    break
-
-                time.sleep(0.5)
+            self._tracker.start_time = start_time
+            self._sampler = IORateSampler(self._process.pid)
 
+            self._pump_output()
+
+            if self._cancelled:
+                self._stop_process()
             self._process.wait()
+            if self._pipe:
+                self._pipe.join()
 
             # Flush any remaining dup summary after process exits
-            if dup_count > 0:
-                self.log_signal.emit(
-                    f"⚠  {dup_count} duplicate key error(s) skipped "
-                    f"— enable 'Drop Existing Collections' to avoid this"
-                )
+            self._flush_duplicates()
+            self._flush_log()
 
             if self._cancelled:
                 self.finished_signal.emit({"success": False, "error": "Cancelled"})
                 return
 
-            self.finished_signal.emit({
-                "success": self._process.returncode == 0
-            })
+            result = {
+                "success": self._process.returncode == 0,
+                "duration_seconds": time.time() - start_time,
+                "pipe_result": self._pipe.result if self._pipe else None,
+            }
+
+            # As in run_command: after the child failed, a cut stream is a symptom
+            pipe_error = self._pipe.error if self._pipe else None
+            if pipe_error is not None and not (
+                self._process.returncode != 0
+                and (self.stdout_sink is not None or isinstance(pipe_error, BrokenPipeError))
+            ):
+                result.update(success=False, error=f"Archive stream failed: {pipe_error}")
+
+            if result["success"] and self.on_success:
+                result.update(self.on_success(result) or {})
+
+            self.finished_signal.emit(result)
 
         except Exception as e:
             self.finished_signal.emit({"success": False, "error": str(e)})
 
+    def _pump_output(self):
+        """
+        Drain the child's output as fast as it writes, without blocking.
+        Returns at EOF or on cancel; stats tick every STATS_INTERVAL either way.
+        """
+        stdout = self._log_stream
+        os.set_blocking(stdout.fileno(), False)
+
+        selector = selectors.DefaultSelector()
+        selector.register(stdout, selectors.EVENT_READ)
+
+        pending = b""
+        skipping = False  # inside the dropped rest of an over-long line
+        last_size = 0
+        last_docs = 0
+        last_stats = time.time()
+        last_log_flush = last_stats
+        flush_interval = LOG_FLUSH_MS / 1000
+
+        try:
+            while not self._cancelled:
+                if selector.select(self.POLL_INTERVAL):
+                    chunk = stdout.read(self.READ_SIZE)
+                    if chunk == b"":
+                        break  # EOF: child closed its output
+
+                    if chunk:
+                        lines = (pending + chunk).split(b"\n")
+                        pending = lines.pop()
+                        if skipping and lines:
+                            lines.pop(0)  # end of an over-long line already handled
+                            skipping = False
+                        for raw in lines:
+                            self._handle_line(raw)
+
+                        # Don't let a newline-free stream grow without bound:
+                        # keep the head of the line and drop the rest of it
+                        if len(pending) > MAX_LINE_BYTES:
+                            if not skipping:
+                                self._handle_line(pending[:MAX_LINE_BYTES])
+                                skipping = True
+                            pending = b""
+
+                now = time.time()
+                if now - last_log_flush >= flush_interval:
+                    self._flush_log()
+                    last_log_flush = now
+
+                if now - last_stats >= self.STATS_INTERVAL:
+                    interval = now - last_stats
+                    docs = self._tracker.documents()
+                    docs_rate = (docs - last_docs) / interval
+                    if self._sampler.available and self._sampler.sample(interval):
+                        self._emit_io_stats(docs_rate)
+                    else:
+                        last_size = self._emit_stats(last_size, interval)
+                    last_docs = docs
+                    last_stats = now
+
+            if pending and not skipping:
+                self._handle_line(pending)
+            self._flush_log()
+        finally:
+            selector.close()
+
+    def _handle_line(self, raw: bytes):
+        clean = raw.decode("utf-8", errors="replace").strip()
+        if not clean:
+            return
+
+        # Collapse "continuing through error: E11000" spam into a summary
+        if "continuing through error" in clean and "E11000" in clean:
+            self._dup_count += 1
+            return  # swallow the raw line
+
+        # Flush pending dup summary before printing the next real line
+        self._flush_duplicates()
+
+        self._log_lines.append(clean)
+
+        if self._tracker.feed(clean):
+            self.progress_signal.emit(self._tracker.percent())
+
+    def _flush_duplicates(self):
+        if self._dup_count > 0:
+            self._log_lines.append(
+                f"⚠  {self._dup_count} duplicate key error(s) skipped "
+                f"— enable 'Drop Existing Collections' to avoid this"
+            )
+            self._dup_count = 0
+
+    def _flush_log(self):
+        # One cross-thread signal per frame instead of one per output line
+        if self._log_lines:
+            self.log_signal.emit("\n".join(self._log_lines))
+            self._log_lines = []
+
+    def _emit_io_stats(self, docs_rate):
+        """Read/write MB/s from the child's I/O counters; ETA from the data-side rate."""
+        read_mb = self._sampler.read_rate / (1024 * 1024)
+        write_mb = self._sampler.write_rate / (1024 * 1024)
+
+        data_rate = (
+            self._sampler.write_rate if self.data_side == "write"
+            else self._sampler.read_rate
+        )
+        remaining = self._tracker.total - self._tracker.bytes_done()
+
+        if self._tracker.total > 0 and data_rate > 0:
+            eta = remaining / data_rate
+        else:
+            eta = self._tracker.eta_seconds() or 0
+
+        eta_display = f"{int(eta)}s" if eta > 0 else "--"
+        docs_display = f" | {docs_rate:,.0f} docs/s" if docs_rate > 0 else ""
+
+        self.stats_signal.emit(
+            f"R {read_mb:.2f} MB/s | W {write_mb:.2f} MB/s{docs_display} | ETA: {eta_display}"
+        )
+
+    def _emit_stats(self, last_size, interval):
+        """Fallback without I/O counters: speed from archive size change, ETA from progress."""
+        if not os.path.exists(self.archive_path):
+            return last_size
+
+        current_size = os.path.getsize(self.archive_path)
+        delta_size = abs(current_size - last_size)  # abs covers both directions
+
+        if interval > 0 and delta_size > 0:
+            speed_mb = delta_size / interval / (1024 * 1024)
+
+            eta = self._tracker.eta_seconds() or 0
+            eta_display = f"{int(eta)}s" if eta > 0 else "--"
+            self.stats_signal.emit(f"{speed_mb:.2f} MB/s | ETA: {eta_display}")
+
+        return current_size
+
+    def _stop_process(self):
+        self._process.terminate()
+        try:
+            self._process.wait(timeout=5)
+        except subprocess.TimeoutExpired:
+            self._process.kill()
+
+    def cancel(self):
+        self._cancelled = True
+
+
+class NativeRestoreWorker(QThread):
+    """Runs the pymongo restore engine off the GUI thread."""
+
+    log_signal = pyqtSignal(str)
+    progress_signal = pyqtSignal(int)
+    stats_signal = pyqtSignal(str)
+    finished_signal = pyqtSignal(dict)
+
+    def __init__(self, backup_file, uri, db_name, total_bytes=0, **restore_options):
+        super().__init__()
+        self.backup_file = backup_file
+        self.uri = uri
+        self.db_name = db_name
+        self.total_bytes = total_bytes
+        self.restore_options = restore_options
+        self._cancel_event = threading.Event()
+        self._start_time = None
+
+    def run(self):
+        self._start_time = time.time()
+
+        try:
+            result = restore_archive(
+                self.backup_file,
+                self.uri,
+                self.db_name,
+                progress_callback=self._on_progress,
+                cancel_event=self._cancel_event,
+                **self.restore_options,
+            )
+        except Exception as e:
+            result = {"success": False, "error": str(e)}
+
+        self.finished_signal.emit(result)
+
+    def _on_progress(self, documents, bytes_read):
+        elapsed = time.time() - self._start_time
+        if elapsed <= 0:
+            return
+
+        docs_per_sec = documents / elapsed
+        speed_mb = bytes_read / elapsed / (1024 * 1024)
+
+        eta_display = "--"
+        if self.total_bytes > 0:
+            pct_done = min(bytes_read / self.total_bytes, 1.0)
+            self.progress_signal.emit(int(pct_done * 100))
+            if 0 < pct_done < 1:
+                eta_display = f"{int(elapsed / pct_done * (1 - pct_done))}s"
+
+        self.stats_signal.emit(
+            f"{speed_mb:.2f} MB/s | {docs_per_sec:,.0f} docs/s | ETA: {eta_display}"
+        )
+
+    def cancel(self):
+        self._cancel_event.set()
+
+
+class SetRestoreWorker(QThread):
+    """Restores a backup set's segments concurrently off the GUI thread."""
+
+    log_signal = pyqtSignal(str)
+    progress_signal = pyqtSignal(int)
+    stats_signal = pyqtSignal(str)
+    finished_signal = pyqtSignal(dict)
+
+    def __init__(self, set_dir, uri, db_name, **restore_options):
+        super().__init__()
+        self.set_dir = set_dir
+        self.uri = uri
+        self.db_name = db_name
+        self.restore_options = restore_options
+        self._cancel_event = threading.Event()
+        self._start_time = None
+
+    def run(self):
+        self._start_time = time.time()
+
+        try:
+            result = restore_backup_set(
+                self.set_dir,
+                self.uri,
+                self.db_name,
+                progress_callback=self._on_progress,
+                cancel_event=self._cancel_event,
+                **self.restore_options,
+            )
+        except Exception as e:
+            result = {"success": False, "error": str(e)}
+
+        for segment in result.get("segment_results", []):
+            status = "✓" if segment.get("success") else "✗"
+            self.log_signal.emit(f"   {status} {segment['file']} ({segment.get('seconds', 0)}s)")
+
+        self.finished_signal.emit(result)
+
+    def _on_progress(self, done_bytes, total_bytes):
+        elapsed = time.time() - self._start_time
+        if elapsed <= 0 or total_bytes <= 0:
+            return
+
+        pct_done = min(done_bytes / total_bytes, 1.0)
+        self.progress_signal.emit(int(pct_done * 100))
+
+        eta_display = "--"
+        if 0 < pct_done < 1:
+            eta_display = f"{int(elapsed / pct_done * (1 - pct_done))}s"
+
+        speed_mb = done_bytes / elapsed / (1024 * 1024)
+        self.stats_signal.emit(f"{speed_mb:.2f} MB/s compressed | ETA: {eta_display}")
+
+    def cancel(self):
+        self._cancel_event.set()
+
+
+class CollectionDiscoveryWorker(QThread):
+    """
+    Lists collections and fetches their stats off the GUI thread.
+    Names arrive first; stats follow in small batches as they come back.
+    """
+
+    names_signal = pyqtSignal(list)
+    stats_signal = pyqtSignal(dict)  # {collection: stats or None}
+    finished_signal = pyqtSignal(dict)
+
+    # Coalesce stats into one signal per interval instead of one per collection
+    BATCH_INTERVAL = 0.1
+
+    def __init__(self, uri, db_name):
+        super().__init__()
+        self.uri = uri
+        self.db_name = db_name
+        self._cancel_event = threading.Event()
+        self._batch = {}
+        self._last_emit = 0.0
+
+    def run(self):
+        try:
+            result = discover_collections(
+                self.uri,
+                self.db_name,
+                on_names=self.names_signal.emit,
+                on_stats=self._on_stats,
+                cancel_event=self._cancel_event,
+            )
+        except Exception as e:
+            result = {"success": False, "error": str(e)}
+
+        self._emit_batch()
+        self.finished_signal.emit(result)
+
+    def _on_stats(self, name, stats):
+        self._batch[name] = stats
+        if time.time() - self._last_emit >= self.BATCH_INTERVAL:
+            self._emit_batch()
+
+    def _emit_batch(self):
+        if self._batch:
+            self.stats_signal.emit(self._batch)
+            self._batch = {}
+        self._last_emit = time.time()
+
+    def cancel(self):
+        self._cancel_event.set()
+
+
+class IndexBuildWorker(QThread):
+    """Rebuilds archive indexes on the target as a separate, resumable phase."""
+
+    log_signal = pyqtSignal(str)
+    progress_signal = pyqtSignal(int)
+    stats_signal = pyqtSignal(str)
+    finished_signal = pyqtSignal(dict)
+
+    def __init__(self, uri, db_name, namespaces, workers=4):
+        super().__init__()
+        self.uri = uri
+        self.db_name = db_name
+        self.namespaces = namespaces
+        self.workers = workers
+        self._cancel_event = threading.Event()
+
+    def run(self):
+        try:
+            result = rebuild_indexes(
+                self.uri,
+                self.db_name,
+                self.namespaces,
+                workers=self.workers,
+                progress_callback=self._on_progress,
+                cancel_event=self._cancel_event,
+            )
+        except Exception as e:
+            result = {"success": False, "error": str(e)}
+
+        self.finished_signal.emit(result)
+
+    def _on_progress(self, done, total, collection):
+        self.log_signal.emit(f"Indexes built for {collection}")
+        self.stats_signal.emit(f"Indexes: {done}/{total}")
+        if total > 0:
+            self.progress_signal.emit(int(done / total * 100))
+
     def cancel(self):
-        self._cancelled = True
\ No newline at end of file
+        self._cancel_event.set()